@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+SHENRON Lightning Benchmark
+Measures end-to-end latency of LIGHTNING wishes through the API and checks
+them against the lightning SLO (LIGHTNING_SLO_SECONDS).
+
+Every wish is sent with use_cache=false so each run is a real GOKU call;
+--rag adds (cached) knowledge base retrieval. With --compare-council the
+same questions also run in COUNCIL mode for reference.
+
+Usage:
+    python scripts/benchmark_lightning.py
+    python scripts/benchmark_lightning.py --url http://<VM100_IP>:5000 --runs 10 --rag --json results.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "services")
+sys.path.insert(0, SERVICES_DIR)
+
+from shenron_v4_orchestrator import LIGHTNING_SLO_SECONDS
+
+QUESTIONS = [
+    "How do I check which process is listening on port 8080 on vm150?",
+    "What is the safest way to rotate the nginx logs on the web server?",
+    "Why would a systemd service restart in a loop after a config change?",
+    "How can I confirm the ChromaDB knowledge base finished ingesting?",
+    "What should I check when SSH to vm120 suddenly times out?",
+    "How do I free disk space on the orchestrator without deleting models?",
+]
+
+
+def timed_wish(url, query, power_mode, use_rag, timeout):
+    """One synchronous wish; returns (seconds, result)."""
+    start = time.perf_counter()
+    response = requests.post(
+        f"{url.rstrip('/')}/api/shenron/grant-wish",
+        json={"query": query, "power_mode": power_mode, "use_rag": use_rag, "use_cache": False},
+        timeout=timeout
+    )
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed, response.json()
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def benchmark_mode(url, power_mode, runs, use_rag, timeout):
+    samples, failures = [], 0
+    for i in range(runs):
+        try:
+            elapsed, result = timed_wish(url, QUESTIONS[i % len(QUESTIONS)], power_mode, use_rag, timeout)
+        except requests.RequestException as exc:
+            print(f"   ❌ {power_mode} run {i + 1}: {exc}")
+            failures += 1
+            continue
+        samples.append(elapsed)
+        print(f"   {power_mode:<10} run {i + 1}: {elapsed:.2f}s ({result.get('synthesis_method')})")
+
+    if not samples:
+        return {"power_mode": power_mode, "runs": runs, "failures": failures}
+    return {
+        "power_mode": power_mode,
+        "runs": runs,
+        "failures": failures,
+        "median_s": round(statistics.median(samples), 3),
+        "p95_s": round(percentile(samples, 0.95), 3),
+        "max_s": round(max(samples), 3),
+        "slo_attainment": round(sum(1 for s in samples if s <= LIGHTNING_SLO_SECONDS) / len(samples), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LIGHTNING wishes against the latency SLO")
+    parser.add_argument("--url", default="http://localhost:5000", help="SHENRON API base URL")
+    parser.add_argument("--runs", type=int, default=6, help="Wishes per power mode")
+    parser.add_argument("--rag", action="store_true", help="Send use_rag=true (cached retrieval)")
+    parser.add_argument("--compare-council", action="store_true", help="Also time the same questions in COUNCIL mode")
+    parser.add_argument("--timeout", type=float, default=900, help="Per-request timeout in seconds")
+    parser.add_argument("--json", help="Write raw results to this file")
+    args = parser.parse_args()
+
+    print(f"⚡ SHENRON lightning benchmark against {args.url} (SLO {LIGHTNING_SLO_SECONDS:.1f}s)")
+    print(f"   {args.runs} runs, RAG {'on' if args.rag else 'off'}\n")
+
+    modes = ["lightning"] + (["council"] if args.compare_council else [])
+    results = [benchmark_mode(args.url, mode, args.runs, args.rag, args.timeout) for mode in modes]
+
+    print(f"\n{'MODE':<11}{'MEDIAN s':>10}{'P95 s':>9}{'MAX s':>9}{'SLO MET':>9}{'FAILED':>8}")
+    for result in results:
+        if "median_s" not in result:
+            print(f"{result['power_mode']:<11}{'-':>10}{'-':>9}{'-':>9}{'-':>9}{result['failures']:>8}")
+            continue
+        print(f"{result['power_mode']:<11}{result['median_s']:>10}{result['p95_s']:>9}{result['max_s']:>9}"
+              f"{result['slo_attainment'] * 100:>8.0f}%{result['failures']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"   Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+SHENRON Prompt Prefix Benchmark
+Compares prompt-processing time of the "single" and "system" fighter prompt
+layouts for all six warriors against an LM Studio / llama.cpp endpoint.
+
+Each request generates a single token, so its latency is dominated by prompt
+processing. Every fighter/layout pair gets one warm-up call (fills the KV
+cache with the persona prefix), then --runs calls with different questions;
+with the "system" layout those only need to process the new user content.
+
+Usage:
+    python scripts/benchmark_prompt_prefix.py
+    python scripts/benchmark_prompt_prefix.py --url http://<VM100_IP>:1234/v1 --runs 5 --json results.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "services")
+sys.path.insert(0, SERVICES_DIR)
+
+from shenron_v4_orchestrator import FIGHTERS, LM_STUDIO_API, PROMPT_LAYOUTS, build_fighter_messages
+
+QUESTIONS = [
+    "How do I check which process is listening on port 8080 on vm150?",
+    "What is the safest way to rotate the nginx logs on the web server?",
+    "Why would a systemd service restart in a loop after a config change?",
+    "How can I confirm the ChromaDB knowledge base finished ingesting?",
+    "What should I check when SSH to vm120 suddenly times out?",
+    "How do I free disk space on the orchestrator without deleting models?",
+]
+
+CONTEXT = (
+    "[infrastructure.md > Hosts] vm100 runs LM Studio and the SHENRON API; "
+    "vm150 serves shenron.lightspeedup.com behind nginx; vm120 is TrueNAS storage."
+)
+
+
+def timed_completion(url, model, messages, timeout):
+    """One 1-token completion; returns (seconds, prompt_tokens, server prompt_ms or None)."""
+    start = time.perf_counter()
+    response = requests.post(
+        f"{url.rstrip('/')}/chat/completions",
+        json={"model": model, "messages": messages, "temperature": 0, "max_tokens": 1},
+        timeout=timeout
+    )
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    data = response.json()
+    usage = data.get("usage") or {}
+    # llama.cpp reports its own prompt timing; LM Studio exposes usage only
+    prompt_ms = (data.get("timings") or {}).get("prompt_ms")
+    return elapsed, usage.get("prompt_tokens"), prompt_ms
+
+
+def benchmark_fighter(url, fighter, layout, runs, timeout):
+    # Warm-up: loads the model and fills the KV cache with the persona prefix
+    timed_completion(url, fighter.model, build_fighter_messages(fighter, QUESTIONS[0], CONTEXT, layout=layout),
+                     timeout)
+
+    samples, server_ms, prompt_tokens = [], [], None
+    for i in range(runs):
+        question = QUESTIONS[(i + 1) % len(QUESTIONS)]
+        elapsed, tokens, prompt_ms = timed_completion(
+            url, fighter.model, build_fighter_messages(fighter, question, CONTEXT, layout=layout), timeout
+        )
+        samples.append(elapsed * 1000)
+        prompt_tokens = tokens or prompt_tokens
+        if prompt_ms is not None:
+            server_ms.append(prompt_ms)
+
+    return {
+        "fighter": fighter.name,
+        "model": fighter.model,
+        "layout": layout,
+        "runs": runs,
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "server_prompt_ms": round(statistics.median(server_ms), 1) if server_ms else None,
+        "prompt_tokens": prompt_tokens
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single vs system prompt layouts per warrior")
+    parser.add_argument("--url", default=LM_STUDIO_API, help="OpenAI-compatible base URL (default: LM_STUDIO_API)")
+    parser.add_argument("--runs", type=int, default=3, help="Measured calls per fighter and layout")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request timeout in seconds")
+    parser.add_argument("--json", help="Write raw results to this file")
+    args = parser.parse_args()
+
+    print(f"🐉 SHENRON prompt prefix benchmark against {args.url}")
+    print(f"   {len(FIGHTERS)} warriors x {len(PROMPT_LAYOUTS)} layouts x {args.runs} runs (+1 warm-up)\n")
+
+    results = []
+    for fighter in FIGHTERS:
+        for layout in PROMPT_LAYOUTS:
+            try:
+                result = benchmark_fighter(args.url, fighter, layout, args.runs, args.timeout)
+            except requests.RequestException as exc:
+                print(f"   ❌ {fighter.name} ({layout}): {exc}")
+                continue
+            results.append(result)
+
+    print(f"{'WARRIOR':<10}{'LAYOUT':<8}{'MEDIAN ms':>11}{'MIN ms':>9}{'SERVER ms':>11}{'TOKENS':>8}")
+    for result in results:
+        server = result["server_prompt_ms"] if result["server_prompt_ms"] is not None else "-"
+        tokens = result["prompt_tokens"] if result["prompt_tokens"] is not None else "-"
+        print(f"{result['fighter']:<10}{result['layout']:<8}{result['median_ms']:>11}"
+              f"{result['min_ms']:>9}{server:>11}{tokens:>8}")
+
+    by_layout = {}
+    for result in results:
+        by_layout.setdefault(result["layout"], []).append(result["median_ms"])
+    if all(layout in by_layout for layout in ("single", "system")):
+        single, system = sum(by_layout["single"]), sum(by_layout["system"])
+        saved = (1 - system / single) * 100 if single else 0.0
+        print(f"\n⚡ Council total: single {single:.0f} ms -> system {system:.0f} ms ({saved:.1f}% less)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"   Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,20 +5,60 @@ SHENRON v3.0 - Phase 1: Ingest Knowledge Base into ChromaDB
 ============================================================================
 This script reads all markdown files from the knowledge base and creates
 vector embeddings for semantic search (RAG).
+
+Files are chunked along their markdown structure (headings, lists, fenced
+code) into chunks that fit the embedding model's token window; every chunk
+records its heading path.
+
+Runs are incremental: a manifest of file and chunk content hashes is kept
+next to the database and only new or changed chunks are embedded.
+Use --full to re-embed everything.
+
+--pipeline runs reading/chunking, embedding and ChromaDB writes as separate
+stages, with embedding spread over a pool of CPU worker processes.
 ============================================================================
 """
 
+import argparse
+import hashlib
+import json
 import os
+import queue
+import re
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import chromadb
-from chromadb.utils import embedding_functions
 from datetime import datetime
 
+try:
+    from transformers import AutoTokenizer
+except ImportError:
+    AutoTokenizer = None
+
+# Shared SHENRON service modules (BM25 index used by hybrid retrieval)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "services"))
+from embedding_service import get_embedding_service
+from hybrid_search import BM25_INDEX_FILE, BM25Index
+
 # Configuration
 KNOWLEDGE_BASE_PATH = r"C:\GOKU-AI\knowledge-base"
 CHROMA_DB_PATH = r"C:\GOKU-AI\chroma_db"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Fast, efficient model
+MANIFEST_PATH = os.path.join(CHROMA_DB_PATH, "ingest_manifest.json")
+BM25_INDEX_PATH = os.path.join(CHROMA_DB_PATH, BM25_INDEX_FILE)
+CHUNKER_VERSION = "markdown-v1"
+CHUNK_TOKENS = 240  # all-MiniLM-L6-v2 truncates at 256 word pieces (incl. [CLS]/[SEP])
+MIN_CHUNK_TOKENS = 64  # smaller sections are merged into the next chunk
+BATCH_SIZE = 166  # ChromaDB limit
+
+# Pipeline mode (--pipeline)
+PIPELINE_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # embedding processes
+EMBED_BATCH_SIZE = 256  # chunks per embedding task
+PIPELINE_QUEUE_DEPTH = 4  # batches buffered between stages (backpressure)
 
 def print_header(text):
     """Print formatted header"""
@@ -42,30 +82,590 @@ def print_info(text):
     """Print info message"""
     print(f"   ℹ️  {text}")
 
-def chunk_text(text, chunk_size=500, overlap=100):
+# ============================================================================
+# MARKDOWN CHUNKER - headings / lists / fenced code, token-budgeted
+# ============================================================================
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+FENCE_RE = re.compile(r"^\s*(`{3,}|~{3,})")
+LIST_ITEM_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+
+_tokenizer = None
+
+def get_tokenizer():
+    """Embedding model tokenizer (None -> word-count estimate)."""
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = False
+        if AutoTokenizer is not None:
+            try:
+                _tokenizer = AutoTokenizer.from_pretrained(f"sentence-transformers/{EMBEDDING_MODEL}")
+            except Exception as e:
+                print_info(f"Tokenizer unavailable ({e}) - estimating tokens from word count")
+    return _tokenizer or None
+
+def count_tokens(text):
+    """Word-piece tokens the embedding model will see (without [CLS]/[SEP])."""
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return int(len(text.split()) * 1.3) + 1
+
+def parse_markdown_blocks(text):
     """
-    Split text into overlapping chunks for better context preservation.
+    Split markdown into structural blocks.
+    
+    Returns a list of dicts: {"type", "text", "heading_path"} where type is
+    heading, code, list or paragraph. Fenced code is never broken up here
+    and lists keep their items (and indented continuation lines) together.
+    """
+    blocks = []
+    headings = []  # stack of (level, title)
+    lines = text.splitlines()
+    current = None
+    
+    def path():
+        return " > ".join(title for _, title in headings)
     
-    Args:
-        text: The text to chunk
-        chunk_size: Number of words per chunk
-        overlap: Number of words to overlap between chunks
+    def flush():
+        nonlocal current
+        if current and current["lines"]:
+            blocks.append({
+                "type": current["type"],
+                "text": "\n".join(current["lines"]).strip("\n"),
+                "heading_path": current["heading_path"]
+            })
+        current = None
     
-    Returns:
-        List of text chunks
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        
+        fence = FENCE_RE.match(line)
+        if fence:
+            flush()
+            marker = fence.group(1)
+            code_lines = [line]
+            i += 1
+            while i < len(lines):
+                code_lines.append(lines[i])
+                if lines[i].strip().startswith(marker[0] * len(marker)) and lines[i].strip().strip(marker[0]) == "":
+                    break
+                i += 1
+            blocks.append({"type": "code", "text": "\n".join(code_lines), "heading_path": path()})
+            i += 1
+            continue
+        
+        heading = HEADING_RE.match(line)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, heading.group(2)))
+            blocks.append({"type": "heading", "text": line.strip(), "heading_path": path()})
+            i += 1
+            continue
+        
+        if not line.strip():
+            # Blank lines end paragraphs; lists may continue after one
+            if current and current["type"] == "list":
+                nxt = lines[i + 1] if i + 1 < len(lines) else ""
+                if LIST_ITEM_RE.match(nxt) or nxt.startswith(("  ", "\t")):
+                    current["lines"].append("")
+                    i += 1
+                    continue
+            flush()
+            i += 1
+            continue
+        
+        if LIST_ITEM_RE.match(line):
+            if not current or current["type"] != "list":
+                flush()
+                current = {"type": "list", "lines": [], "heading_path": path()}
+            current["lines"].append(line)
+        elif current and current["type"] == "list" and line.startswith(("  ", "\t")):
+            current["lines"].append(line)
+        else:
+            if not current or current["type"] != "paragraph":
+                flush()
+                current = {"type": "paragraph", "lines": [], "heading_path": path()}
+            current["lines"].append(line)
+        i += 1
+    
+    flush()
+    return blocks
+
+def split_oversized_block(block, max_tokens):
+    """
+    Break a block that exceeds the budget at the finest natural boundary:
+    list items / lines first, then sentences, then words. Code pieces are
+    re-fenced so every chunk stays valid markdown.
     """
-    words = text.split()
+    text = block["text"]
+    fence_open = fence_close = ""
+    if block["type"] == "code":
+        lines = text.split("\n")
+        fence_open = lines[0]
+        if len(lines) > 1 and FENCE_RE.match(lines[-1]):
+            fence_close = lines[-1]
+            lines = lines[1:-1]
+        else:
+            fence_close = FENCE_RE.match(fence_open).group(1)
+            lines = lines[1:]
+        units = lines
+        joiner = "\n"
+    elif block["type"] == "list":
+        units = re.split(r"\n(?=\s*(?:[-*+]|\d+[.)])\s+)", text)
+        joiner = "\n"
+    else:
+        units = re.split(r"(?<=[.!?])\s+", text)
+        joiner = " "
+    
+    overhead = count_tokens(f"{fence_open}\n{fence_close}") if fence_open else 0
+    budget = max(16, max_tokens - overhead)
+    
+    # Any single unit still over budget is cut by words
+    pieces = []
+    for unit in units:
+        if count_tokens(unit) <= budget:
+            pieces.append(unit)
+            continue
+        words = unit.split(" ")
+        part = []
+        for word in words:
+            if part and count_tokens(" ".join(part + [word])) > budget:
+                pieces.append(" ".join(part))
+                part = []
+            part.append(word)
+        if part:
+            pieces.append(" ".join(part))
+    
+    # Greedily re-pack pieces up to the budget
+    packed, part = [], []
+    for piece in pieces:
+        if part and count_tokens(joiner.join(part + [piece])) > budget:
+            packed.append(joiner.join(part))
+            part = []
+        part.append(piece)
+    if part:
+        packed.append(joiner.join(part))
+    
+    if fence_open:
+        packed = [f"{fence_open}\n{p}\n{fence_close}" for p in packed]
+    return [dict(block, text=p) for p in packed]
+
+def chunk_markdown(text, max_tokens=None, min_tokens=None):
+    """
+    Pack markdown blocks into chunks of at most max_tokens model tokens.
+    
+    Blocks are never split unless they alone exceed the budget. A heading
+    starts a new chunk once the current one holds at least min_tokens, so
+    tiny sections are merged with their neighbours instead of producing
+    near-empty chunks. No overlap is needed because chunk boundaries fall
+    on structural boundaries.
+    
+    Returns a list of {"text", "heading_path", "token_count"}.
+    """
+    max_tokens = max_tokens or CHUNK_TOKENS
+    min_tokens = MIN_CHUNK_TOKENS if min_tokens is None else min_tokens
+    separator_tokens = count_tokens("\n\n") or 1
+    
     chunks = []
+    current, current_tokens, current_path = [], 0, ""
+    
+    def flush():
+        nonlocal current, current_tokens, current_path
+        if current:
+            chunk = "\n\n".join(current)
+            chunks.append({"text": chunk, "heading_path": current_path, "token_count": count_tokens(chunk)})
+        current, current_tokens, current_path = [], 0, ""
     
-    for i in range(0, len(words), chunk_size - overlap):
-        chunk = ' '.join(words[i:i + chunk_size])
-        if chunk:
-            chunks.append(chunk)
+    def add(text, heading_path, tokens, starts_section):
+        nonlocal current_tokens, current_path
+        if current and (
+            (starts_section and current_tokens >= min_tokens)
+            or current_tokens + separator_tokens + tokens > max_tokens
+        ):
+            flush()
+        if not current:
+            current_path = heading_path
+        current.append(text)
+        current_tokens += tokens + (separator_tokens if len(current) > 1 else 0)
+    
+    # Headings are held back and glued to the block that follows them, so a
+    # heading never ends up as the dangling last line of the previous chunk.
+    pending_headings = []
+    for block in parse_markdown_blocks(text):
+        if block["type"] == "heading":
+            pending_headings.append(block["text"])
+            continue
+        
+        prefix = "\n\n".join(pending_headings)
+        prefix_tokens = count_tokens(prefix) + separator_tokens if prefix else 0
+        pending_headings = []
+        
+        tokens = count_tokens(block["text"])
+        if prefix_tokens + tokens <= max_tokens:
+            pieces = [block["text"]]
+        else:
+            pieces = [p["text"] for p in split_oversized_block(block, max_tokens - prefix_tokens)]
+        
+        for index, piece in enumerate(pieces):
+            if index == 0 and prefix:
+                piece = f"{prefix}\n\n{piece}"
+            piece_tokens = tokens + prefix_tokens if len(pieces) == 1 else count_tokens(piece)
+            add(piece, block["heading_path"], piece_tokens, starts_section=bool(prefix) and index == 0)
     
+    # Trailing headings without content
+    if pending_headings:
+        prefix = "\n\n".join(pending_headings)
+        add(prefix, current_path, count_tokens(prefix), starts_section=True)
+    
+    flush()
     return chunks
 
-def ingest_knowledge_base():
-    """Main ingestion function"""
+def hash_text(text):
+    """Stable content hash used for change detection and chunk IDs."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def load_manifest():
+    """Load the ingest manifest (file + chunk hashes of the last run)."""
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def save_manifest(manifest):
+    """Write the manifest atomically so a crash never leaves it half-written."""
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def manifest_settings():
+    """Settings that invalidate every stored embedding when they change."""
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        "chunker": CHUNKER_VERSION,
+        "chunk_tokens": CHUNK_TOKENS,
+        "min_chunk_tokens": MIN_CHUNK_TOKENS
+    }
+
+def build_file_chunks(file, content):
+    """
+    Chunk one file and give every chunk a content-addressed ID, so an
+    unchanged chunk keeps its ID (and its embedding) across runs.
+    """
+    chunks = chunk_markdown(content)
+    entries = []
+    seen_ids = set()
+    for i, chunk_info in enumerate(chunks):
+        chunk = chunk_info["text"]
+        chunk_hash = hash_text(chunk)
+        chunk_id = f"{file.stem}_{chunk_hash[:16]}"
+        # Identical chunks inside one file need distinct IDs
+        suffix = 1
+        while chunk_id in seen_ids:
+            chunk_id = f"{file.stem}_{chunk_hash[:16]}_{suffix}"
+            suffix += 1
+        seen_ids.add(chunk_id)
+        entries.append({
+            "id": chunk_id,
+            "hash": chunk_hash,
+            "document": chunk,
+            "metadata": {
+                "source": file.name,
+                "chunk_index": i,
+                "total_chunks": len(chunks),
+                "heading_path": chunk_info["heading_path"],
+                "token_count": chunk_info["token_count"],
+                "content_hash": chunk_hash,
+                "ingested_at": datetime.now().isoformat()
+            }
+        })
+    return entries
+
+def in_batches(items, batch_size=BATCH_SIZE):
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+def new_plan():
+    """Change set built while diffing the corpus against the manifest."""
+    return {
+        "manifest": {"settings": manifest_settings(), "files": {}},
+        "to_relabel": [],     # unchanged content whose chunk_index / total_chunks moved
+        "to_delete": [],
+        "unchanged_files": 0,
+        "unchanged_chunks": 0
+    }
+
+def plan_changes(md_files, old_files, plan):
+    """
+    Read and chunk every file, yielding the new or changed chunks that need
+    embedding. Everything else (manifest, relabels, stale IDs) goes into plan.
+    """
+    for file in md_files:
+        try:
+            # Read file content
+            with open(file, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            print_error(f"Failed to process {file.name}: {e}")
+            # Keep the previous state of unreadable files untouched
+            if file.name in old_files:
+                plan["manifest"]["files"][file.name] = old_files[file.name]
+            continue
+        
+        file_hash = hash_text(content)
+        previous = old_files.get(file.name)
+        
+        if previous and previous.get("file_hash") == file_hash:
+            plan["manifest"]["files"][file.name] = previous
+            plan["unchanged_files"] += 1
+            plan["unchanged_chunks"] += len(previous.get("chunks", {}))
+            continue
+        
+        entries = build_file_chunks(file, content)
+        previous_chunks = (previous or {}).get("chunks", {})
+        # Every reused chunk carries total_chunks, so a new count relabels them all
+        count_changed = len(entries) != len(previous_chunks)
+        current_chunks = {}
+        changed = 0
+        
+        for entry in entries:
+            current_chunks[entry["id"]] = {"hash": entry["hash"], "index": entry["metadata"]["chunk_index"]}
+            old_chunk = previous_chunks.get(entry["id"])
+            if old_chunk and old_chunk.get("hash") == entry["hash"]:
+                plan["unchanged_chunks"] += 1
+                if count_changed or old_chunk.get("index") != entry["metadata"]["chunk_index"]:
+                    plan["to_relabel"].append(entry)
+            else:
+                changed += 1
+                yield entry
+        
+        stale = [chunk_id for chunk_id in previous_chunks if chunk_id not in current_chunks]
+        plan["to_delete"].extend(stale)
+        
+        plan["manifest"]["files"][file.name] = {"file_hash": file_hash, "chunks": current_chunks}
+        print_info(f"{file.name}: {len(entries)} chunks "
+                   f"({changed} to embed, {len(stale)} stale)")
+
+def finish_plan(collection, old_files, plan, reconcile):
+    """Collect stale IDs of removed files (and, if needed, unknown live IDs)."""
+    to_delete = plan["to_delete"]
+    
+    # Files that disappeared since the last run
+    for file_name, previous in old_files.items():
+        if file_name not in plan["manifest"]["files"]:
+            removed = list(previous.get("chunks", {}).keys())
+            to_delete.extend(removed)
+            print_info(f"{file_name}: removed ({len(removed)} chunks to delete)")
+    
+    # Without a trustworthy manifest, anything in the collection that is not
+    # part of the current corpus is stale (e.g. IDs from the old scheme).
+    if reconcile:
+        try:
+            live_ids = set(collection.get(include=[])["ids"])
+            wanted_ids = {
+                chunk_id
+                for info in plan["manifest"]["files"].values()
+                for chunk_id in info.get("chunks", {})
+            }
+            to_delete.extend(sorted(live_ids - wanted_ids - set(to_delete)))
+        except Exception as e:
+            print_error(f"Could not list existing chunks for reconciliation: {e}")
+
+def open_bm25_index(rebuild):
+    """
+    Load the persisted BM25 index for an incremental update.
+    Returns (index, needs_rebuild); a missing/corrupt index is rebuilt
+    from the collection once all vector changes have been applied.
+    """
+    if not rebuild and os.path.exists(BM25_INDEX_PATH):
+        try:
+            return BM25Index.load(BM25_INDEX_PATH), False
+        except (OSError, ValueError) as e:
+            print_info(f"BM25 index unreadable ({e}) - rebuilding")
+    return BM25Index(), True
+
+def rebuild_bm25_index(collection):
+    """Build the BM25 index from every chunk currently in the collection."""
+    index = BM25Index()
+    records = collection.get(include=["documents"])
+    for doc_id, document in zip(records["ids"], records["documents"]):
+        index.add(doc_id, document or "")
+    return index
+
+# ============================================================================
+# PIPELINE MODE - read/chunk -> embed (process pool) -> write
+# ============================================================================
+
+_worker_service = None
+
+def _init_embed_worker(model_name, threads_per_worker):
+    """Load the embedding model once per worker process."""
+    global _worker_service
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    _worker_service = get_embedding_service(model_name)
+    _worker_service.embedding_function  # load now, not on the first batch
+
+def _embed_batch(documents):
+    """Embed one batch in a worker (same model/settings as the collection)."""
+    return _worker_service.embed_documents(documents)
+
+class PipelineFailed(Exception):
+    """Raised in a stage when another stage has already failed."""
+
+def _put(q, item, failed):
+    """Blocking put that gives up once another stage has failed."""
+    while True:
+        if failed.is_set():
+            raise PipelineFailed()
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+def _get(q, failed):
+    while True:
+        if failed.is_set():
+            raise PipelineFailed()
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+def run_embedding_pipeline(entries, collection, workers=PIPELINE_WORKERS,
+                           embed_batch_size=EMBED_BATCH_SIZE, bm25_index=None):
+    """
+    Stream chunk entries through three stages connected by bounded queues:
+    
+      reader  (thread)  - pulls entries (file reading + chunking) into batches
+      embed   (thread)  - farms batches out to a ProcessPoolExecutor,
+                          at most 2 x workers batches in flight
+      writer  (thread)  - upserts precomputed embeddings into ChromaDB
+                          (and adds the chunks to bm25_index, if given)
+    
+    A slow stage fills the queue in front of it, which blocks the stage
+    before it - memory stays bounded however large the corpus is.
+    
+    Returns (chunks_written, elapsed_seconds).
+    """
+    done = object()
+    failed = threading.Event()
+    errors = []
+    batch_queue = queue.Queue(maxsize=PIPELINE_QUEUE_DEPTH)
+    write_queue = queue.Queue(maxsize=PIPELINE_QUEUE_DEPTH)
+    written = [0]
+    start = time.time()
+    
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_embed_worker,
+        initargs=(EMBEDDING_MODEL, threads_per_worker)
+    )
+    
+    def stage(fn):
+        def runner():
+            try:
+                fn()
+            except PipelineFailed:
+                pass
+            except BaseException as e:
+                errors.append(e)
+                failed.set()
+        return runner
+    
+    def reader():
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) >= embed_batch_size:
+                _put(batch_queue, batch, failed)
+                batch = []
+        if batch:
+            _put(batch_queue, batch, failed)
+        _put(batch_queue, done, failed)
+    
+    def embedder():
+        in_flight = deque()
+        max_in_flight = workers * 2
+        while True:
+            batch = _get(batch_queue, failed)
+            if batch is done:
+                break
+            future = executor.submit(_embed_batch, [e["document"] for e in batch])
+            in_flight.append((batch, future))
+            # Hand off completed work in order; block once the pool is saturated
+            while in_flight and (len(in_flight) >= max_in_flight or in_flight[0][1].done()):
+                ready_batch, ready_future = in_flight.popleft()
+                _put(write_queue, (ready_batch, ready_future.result()), failed)
+        while in_flight:
+            ready_batch, ready_future = in_flight.popleft()
+            _put(write_queue, (ready_batch, ready_future.result()), failed)
+        _put(write_queue, done, failed)
+    
+    def writer():
+        while True:
+            item = _get(write_queue, failed)
+            if item is done:
+                break
+            batch, embeddings = item
+            for offset in range(0, len(batch), BATCH_SIZE):
+                part = batch[offset:offset + BATCH_SIZE]
+                collection.upsert(
+                    ids=[e["id"] for e in part],
+                    documents=[e["document"] for e in part],
+                    metadatas=[e["metadata"] for e in part],
+                    embeddings=embeddings[offset:offset + BATCH_SIZE]
+                )
+            if bm25_index is not None:
+                for e in batch:
+                    bm25_index.add(e["id"], e["document"])
+            written[0] += len(batch)
+            elapsed = time.time() - start
+            print_info(f"Wrote {written[0]} chunks ({written[0] / elapsed:.1f} chunks/s)")
+    
+    stages = [
+        threading.Thread(target=stage(reader), name="ingest-reader", daemon=True),
+        threading.Thread(target=stage(embedder), name="ingest-embedder", daemon=True),
+        threading.Thread(target=stage(writer), name="ingest-writer", daemon=True)
+    ]
+    try:
+        for thread in stages:
+            thread.start()
+        for thread in stages:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        failed.set()
+        raise
+    finally:
+        executor.shutdown(wait=not failed.is_set(), cancel_futures=failed.is_set())
+    
+    if errors:
+        raise errors[0]
+    return written[0], time.time() - start
+
+def ingest_knowledge_base(full_rebuild=False, pipeline=False, workers=PIPELINE_WORKERS,
+                          embed_batch_size=EMBED_BATCH_SIZE):
+    """
+    Main ingestion function (incremental by default).
+
+    Only new or changed chunks are embedded; chunks of removed files and
+    chunks that no longer exist are deleted. Writes use upsert on the live
+    collection, so RAG keeps answering from the old data while this runs.
+    """
     
     print_header("🐉 SHENRON v3.0 - Knowledge Base Ingestion")
     
@@ -79,7 +679,7 @@ def ingest_knowledge_base():
     
     # Step 2: List knowledge base files
     print_step(2, "Scanning knowledge base files...")
-    md_files = list(Path(KNOWLEDGE_BASE_PATH).glob("*.md"))
+    md_files = sorted(Path(KNOWLEDGE_BASE_PATH).glob("*.md"))
     
     if not md_files:
         print_error("No markdown files found in knowledge base!")
@@ -96,20 +696,12 @@ def ingest_knowledge_base():
         # Create persistent client
         client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
         
-        # Initialize embedding function
-        embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=EMBEDDING_MODEL
-        )
-        
-        # Delete existing collection if it exists (fresh start)
-        try:
-            client.delete_collection(name="knowledge_base")
-            print_info("Deleted existing collection (fresh start)")
-        except:
-            pass
+        # Initialize embedding function (process-wide shared model)
+        embedding_service = get_embedding_service(EMBEDDING_MODEL)
+        embedding_function = embedding_service.embedding_function
         
-        # Create new collection
-        collection = client.create_collection(
+        # Reuse the live collection - it is never deleted, so RAG stays available
+        collection = client.get_or_create_collection(
             name="knowledge_base",
             embedding_function=embedding_function,
             metadata={"description": "Seth's infrastructure knowledge base"}
@@ -117,69 +709,100 @@ def ingest_knowledge_base():
         
         print_success(f"ChromaDB initialized at: {CHROMA_DB_PATH}")
         print_info(f"Using embedding model: {EMBEDDING_MODEL}")
+        print_info(f"Collection currently holds {collection.count()} chunks")
     except Exception as e:
         print_error(f"Failed to initialize ChromaDB: {e}")
         return False
     
-    # Step 4: Process and ingest files
-    print_step(4, "Processing and embedding knowledge base files...")
+    # Step 4: Diff files and chunks against the manifest, embed what changed
+    manifest = load_manifest()
+    reconcile = full_rebuild or manifest is None
+    if manifest and manifest.get("settings") != manifest_settings():
+        print_info("Embedding/chunking settings changed - re-embedding everything")
+        full_rebuild = reconcile = True
+    if manifest is None:
+        print_info("No ingest manifest found - reconciling against the collection")
+    old_files = {} if full_rebuild or manifest is None else manifest.get("files", {})
     
-    total_chunks = 0
-    documents = []
-    metadatas = []
-    ids = []
+    plan = new_plan()
+    bm25_index, bm25_rebuild = open_bm25_index(rebuild=reconcile)
+    # A rebuilt index is read back from the collection, no need to feed it
+    bm25_feed = None if bm25_rebuild else bm25_index
     
-    for file in md_files:
+    if pipeline:
+        print_step(4, f"Streaming changes through the embedding pipeline "
+                      f"({workers} workers, batches of {embed_batch_size})...")
         try:
-            # Read file content
-            with open(file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Split into chunks
-            chunks = chunk_text(content, chunk_size=500, overlap=100)
-            
-            print_info(f"Processing {file.name}: {len(chunks)} chunks")
-            
-            # Add each chunk to collection
-            for i, chunk in enumerate(chunks):
-                chunk_id = f"{file.stem}_chunk_{i}"
-                documents.append(chunk)
-                metadatas.append({
-                    "source": file.name,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    "ingested_at": datetime.now().isoformat()
-                })
-                ids.append(chunk_id)
-            
-            total_chunks += len(chunks)
-            
+            embedded, elapsed = run_embedding_pipeline(
+                plan_changes(md_files, old_files, plan), collection,
+                workers=workers, embed_batch_size=embed_batch_size, bm25_index=bm25_feed
+            )
         except Exception as e:
-            print_error(f"Failed to process {file.name}: {e}")
-            continue
+            print_error(f"Embedding pipeline failed: {e}")
+            return False
+        finish_plan(collection, old_files, plan, reconcile)
+        print_success(f"{plan['unchanged_files']} unchanged files skipped, {plan['unchanged_chunks']} chunks reused")
+    else:
+        print_step(4, "Detecting new, changed and removed content...")
+        to_upsert = list(plan_changes(md_files, old_files, plan))
+        finish_plan(collection, old_files, plan, reconcile)
+        embedded = len(to_upsert)
+        print_success(f"{plan['unchanged_files']} unchanged files skipped, {plan['unchanged_chunks']} chunks reused")
+        print_info(f"{embedded} chunks to embed, {len(plan['to_relabel'])} to relabel, "
+                   f"{len(plan['to_delete'])} to delete")
+    
+    to_relabel = plan["to_relabel"]
+    to_delete = plan["to_delete"]
+    new_manifest = plan["manifest"]
     
-    # Step 5: Add all documents to ChromaDB
-    print_step(5, f"Adding {total_chunks} chunks to vector database...")
+    # Step 5: Apply changes to ChromaDB (upsert first, delete last)
+    print_step(5, "Applying changes to vector database...")
     try:
-        # ChromaDB has a limit on batch size, so we add in batches
-        batch_size = 166  # ChromaDB limit
-        for i in range(0, len(documents), batch_size):
-            batch_docs = documents[i:i+batch_size]
-            batch_metas = metadatas[i:i+batch_size]
-            batch_ids = ids[i:i+batch_size]
-            
-            collection.add(
-                documents=batch_docs,
-                metadatas=batch_metas,
-                ids=batch_ids
+        if not pipeline:
+            start = time.time()
+            batches = list(in_batches(to_upsert))
+            for batch_number, batch in enumerate(batches, start=1):
+                collection.upsert(
+                    ids=[e["id"] for e in batch],
+                    documents=[e["document"] for e in batch],
+                    metadatas=[e["metadata"] for e in batch]
+                )
+                if bm25_feed is not None:
+                    for e in batch:
+                        bm25_feed.add(e["id"], e["document"])
+                print_info(f"Upserted batch {batch_number}/{len(batches)}")
+            elapsed = time.time() - start
+        
+        # Metadata-only update: no re-embedding for moved-but-identical chunks
+        for batch in in_batches(to_relabel):
+            collection.update(
+                ids=[e["id"] for e in batch],
+                metadatas=[e["metadata"] for e in batch]
             )
-            print_info(f"Added batch {i//batch_size + 1}/{(len(documents) + batch_size - 1)//batch_size}")
         
-        print_success(f"Successfully added {total_chunks} chunks to database")
+        for batch in in_batches(to_delete):
+            collection.delete(ids=batch)
+        
+        # Keyword index for hybrid retrieval (written before the manifest, so
+        # an interrupted run re-applies both on the next ingest)
+        if bm25_rebuild:
+            bm25_index = rebuild_bm25_index(collection)
+        else:
+            for chunk_id in to_delete:
+                bm25_index.remove(chunk_id)
+        bm25_index.save(BM25_INDEX_PATH)
+        print_info(f"BM25 index: {len(bm25_index)} chunks ({'rebuilt' if bm25_rebuild else 'updated'})")
+        
+        save_manifest(new_manifest)
+        print_success(f"Embedded {embedded} chunks, deleted {len(to_delete)} stale chunks")
+        if embedded:
+            print_info(f"Throughput: {embedded / max(elapsed, 1e-9):.1f} chunks/s")
     except Exception as e:
-        print_error(f"Failed to add documents: {e}")
+        print_error(f"Failed to apply changes: {e}")
         return False
     
+    total_chunks = sum(len(info.get("chunks", {})) for info in new_manifest["files"].values())
+    
     # Step 6: Verify ingestion
     print_step(6, "Verifying ingestion...")
     try:
@@ -189,7 +812,7 @@ def ingest_knowledge_base():
         # Test query
         print_info("Testing semantic search...")
         results = collection.query(
-            query_texts=["What is Seth's name?"],
+            query_embeddings=[embedding_service.embed_query("What is Seth's name?")],
             n_results=1
         )
         
@@ -212,9 +835,12 @@ def ingest_knowledge_base():
     print("╚════════════════════════════════════════════════════════════════╝")
     print("")
     print("📊 INGESTION SUMMARY:")
-    print(f"   - Files processed: {len(md_files)}")
+    print(f"   - Files processed: {len(md_files)} ({plan['unchanged_files']} unchanged)")
     print(f"   - Total chunks: {total_chunks}")
+    print(f"   - Chunks embedded this run: {embedded}")
+    print(f"   - Chunks deleted this run: {len(to_delete)}")
     print(f"   - Database location: {CHROMA_DB_PATH}")
+    print(f"   - BM25 index: {BM25_INDEX_PATH}")
     print(f"   - Embedding model: {EMBEDDING_MODEL}")
     print("")
     print("🐉 RAG is now operational!")
@@ -224,9 +850,38 @@ def ingest_knowledge_base():
     
     return True
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest the knowledge base into ChromaDB")
+    parser.add_argument(
+        "--full", action="store_true",
+        help="re-embed every chunk (still upserts in place; the collection is never dropped)"
+    )
+    parser.add_argument(
+        "--pipeline", action="store_true",
+        help="run read/chunk, embedding and writes as parallel stages"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=PIPELINE_WORKERS,
+        help=f"embedding worker processes in pipeline mode (default: {PIPELINE_WORKERS})"
+    )
+    parser.add_argument(
+        "--embed-batch-size", type=int, default=EMBED_BATCH_SIZE,
+        help=f"chunks per embedding task in pipeline mode (default: {EMBED_BATCH_SIZE})"
+    )
+    args = parser.parse_args()
+    if args.workers < 1 or args.embed_batch_size < 1:
+        parser.error("--workers and --embed-batch-size must be at least 1")
+    return args
+
 if __name__ == "__main__":
     try:
-        success = ingest_knowledge_base()
+        args = parse_args()
+        success = ingest_knowledge_base(
+            full_rebuild=args.full,
+            pipeline=args.pipeline,
+            workers=args.workers,
+            embed_batch_size=args.embed_batch_size
+        )
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\n⚠️  Ingestion cancelled by user")
@@ -15,12 +15,10 @@ Exposes SHENRON orchestrator as HTTP API with:
 ============================================================================
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import sys
 import os
-import threading
-import uuid
 import time
 import json
 import urllib.request
@@ -44,6 +42,8 @@ if hasattr(sys.stderr, "reconfigure"):
 # Import the orchestrator
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from shenron_v4_orchestrator import ShenronOrchestrator, WishCancelled
+from job_store import FINISHED_STATUSES, JobStore, JobWorkerPool
+from event_bus import EventBus
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for web GUI
@@ -55,9 +55,20 @@ print(" SHENRON is ready to grant wishes!\n")
 
 # -------------------------------------------------------------------------
 # Async job management for Cloudflare-safe long running requests
+# Jobs live in SQLite (WAL) and are drained by a fixed worker pool, so they
+# survive restarts and a burst of wishes cannot overload LM Studio.
+# Progress is event driven: orchestrator stage events are persisted on the
+# job and published on an in-process bus for long-poll / SSE subscribers.
 # -------------------------------------------------------------------------
-jobs = {}
-jobs_lock = threading.Lock()
+JOB_DB_PATH = r"C:\GOKU-AI\shenron_jobs.db"
+JOB_WORKERS = 3
+JOB_MODE_LIMITS = {
+    "lightning": 2,
+    "council": 1,
+    "ultra": 1
+}
+MAX_QUEUED_JOBS = 50
+JOB_TTL_SECONDS = 24 * 3600  # finished jobs are garbage collected after this
 
 JOB_EXPECTED_DURATIONS = {
     "lightning": 120,   # seconds
@@ -65,60 +76,75 @@ JOB_EXPECTED_DURATIONS = {
     "ultra": 1800
 }
 
-def create_job_record(query, power_mode, agent_mode=False):
-    job_id = str(uuid.uuid4())
+# Warrior answers expected per mode; each warrior_done advances progress
+JOB_EXPECTED_WARRIORS = {
+    "lightning": 1,
+    "council": 5,
+    "ultra": 10
+}
+JOB_LONG_POLL_MAX = 55  # seconds, below Cloudflare's 100s origin timeout
+
+job_store = JobStore(JOB_DB_PATH, ttl=JOB_TTL_SECONDS)
+job_events = EventBus()
+# Streamed wishes ("stream": true) are jobs as well; their raw orchestrator
+# events - token deltas included - are published here (not persisted) for
+# the SSE response to tail.
+WISH_STREAM_HISTORY = 5000  # events buffered per streamed wish
+wish_streams = EventBus(history=WISH_STREAM_HISTORY)
+
+def create_job_record(query, power_mode, agent_mode=False, use_rag=True, use_cache=True, stream_tokens=False):
     expected_duration = JOB_EXPECTED_DURATIONS.get(power_mode, 300)
-    with jobs_lock:
-        jobs[job_id] = {
-            "status": "queued",
-            "created_at": time.time(),
-            "query_preview": query[:120],
-            "power_mode": power_mode,
-            "agent_mode": agent_mode,
-            "progress": 0,
-            "message": "Queued for processing",
-            "events": [{
-                "timestamp": time.time(),
-                "type": "info",
-                "message": "Wish queued for processing"
-            }],
-            "expected_duration": expected_duration,
-            "pending_actions": [],
-            "artifacts": []
+    return job_store.create({
+        "status": "queued",
+        "created_at": time.time(),
+        "query_preview": query[:120],
+        "power_mode": power_mode,
+        "agent_mode": agent_mode,
+        "progress": 0,
+        "message": "Queued for processing",
+        "events": [{
+            "seq": 1,
+            "timestamp": time.time(),
+            "type": "info",
+            "message": "Wish queued for processing"
+        }],
+        "last_event_seq": 1,
+        "expected_duration": expected_duration,
+        "pending_actions": [],
+        "artifacts": [],
+        # Everything needed to (re)run the wish after a restart
+        "request": {
+            "query": query,
+            "use_rag": use_rag,
+            "use_cache": use_cache,
+            "stream_tokens": stream_tokens
         }
-    return job_id
+    })
 
 def update_job_record(job_id, **fields):
-    with jobs_lock:
-        if job_id in jobs:
-            jobs[job_id].update(fields)
+    job_store.update(job_id, **fields)
 
 def get_job_record(job_id):
-    with jobs_lock:
-        return jobs.get(job_id, {}).copy()
+    return job_store.get(job_id)
 
-def append_job_event(job_id, message, event_type="info"):
-    with jobs_lock:
-        job = jobs.get(job_id)
-        if not job:
-            return
-        events = job.setdefault("events", [])
-        events.append({
-            "timestamp": time.time(),
-            "type": event_type,
-            "message": message
-        })
-        if len(events) > 100:
-            del events[:-100]
+def publish_job_event(job_id, event):
+    job_events.publish(job_id, event)
+    if event.get("status") in FINISHED_STATUSES:
+        job_events.close(job_id)
+
+def append_job_event(job_id, event_message, event_type="info", **fields):
+    """Persist an event (plus any record fields) and publish it to subscribers."""
+    return job_store.append_event(job_id, event_message, event_type,
+                                  publish=lambda event: publish_job_event(job_id, event), **fields)
 
 def is_cancellation_requested(job_id: str) -> bool:
-    with jobs_lock:
-        job = jobs.get(job_id)
-        return bool(job and job.get("cancel_requested"))
+    return bool(job_store.get(job_id).get("cancel_requested"))
 
 def finalize_cancelled_job(job_id: str, message: str = "Wish cancelled by user"):
-    update_job_record(
+    append_job_event(
         job_id,
+        message,
+        "warning",
         status="cancelled",
         completed_at=time.time(),
         progress=100,
@@ -126,14 +152,9 @@ def finalize_cancelled_job(job_id: str, message: str = "Wish cancelled by user")
         pending_actions=[],
         artifacts=[]
     )
-    append_job_event(job_id, message, "warning")
 
 def request_job_cancellation(job_id: str):
-    with jobs_lock:
-        job = jobs.get(job_id)
-        if not job:
-            return False, "Job not found"
-
+    def cancel(job):
         status = job.get("status", "queued")
         if status in ("completed", "failed", "cancelled"):
             return False, f"Job already {status}"
@@ -145,13 +166,19 @@ def request_job_cancellation(job_id: str):
             job["completed_at"] = time.time()
             job["progress"] = 100
             job["message"] = "Cancelled before start"
-            message = "Wish cancelled before processing began"
-        else:
-            job["message"] = "Cancellation requested... attempting to halt safely"
-            message = "Cancellation requested during processing"
+            return True, "Wish cancelled before processing began"
+
+        job["message"] = "Cancellation requested... attempting to halt safely"
+        return True, "Cancellation requested during processing"
+
+    outcome = job_store.mutate(job_id, cancel)
+    if outcome is None:
+        return False, "Job not found"
 
-    append_job_event(job_id, message, "warning")
-    return True, message
+    success, message = outcome
+    if success:
+        append_job_event(job_id, message, "warning")
+    return success, message
 
 def fetch_lm_studio_status():
     url = "http://127.0.0.1:1234/v1/models"
@@ -219,51 +246,62 @@ def get_system_metrics():
 
     recent_events = []
     now = time.time()
-    with jobs_lock:
-        metrics["jobs"]["total"] = len(jobs)
-        for job_id, job in jobs.items():
-            status = job.get("status", "queued")
-            status_counts = metrics["jobs"]["status_counts"]
-            status_counts[status] = status_counts.get(status, 0) + 1
-
-            job_summary = {
+    all_jobs = job_store.list_jobs()
+    metrics["jobs"]["total"] = len(all_jobs)
+    for job_id, job in all_jobs:
+        status = job.get("status", "queued")
+        status_counts = metrics["jobs"]["status_counts"]
+        status_counts[status] = status_counts.get(status, 0) + 1
+
+        job_summary = {
+            "job_id": job_id,
+            "query_preview": job.get("query_preview", ""),
+            "power_mode": job.get("power_mode"),
+            "progress": job.get("progress"),
+            "message": job.get("message"),
+            "created_at": job.get("created_at"),
+            "started_at": job.get("started_at"),
+            "agent_mode": job.get("agent_mode", False)
+        }
+
+        if job.get("started_at"):
+            job_summary["elapsed"] = now - job["started_at"]
+
+        if status == "running":
+            metrics["jobs"]["running"].append(job_summary)
+        elif status == "queued":
+            metrics["jobs"]["queued"].append(job_summary)
+        elif status == "completed":
+            metrics["jobs"]["recent_completed"].append(job_summary)
+        elif status == "action_required":
+            metrics["jobs"]["action_required"].append(job_summary)
+
+        events = job.get("events") or []
+        for event in events[-3:]:
+            recent_events.append({
                 "job_id": job_id,
-                "query_preview": job.get("query_preview", ""),
-                "power_mode": job.get("power_mode"),
-                "progress": job.get("progress"),
-                "message": job.get("message"),
-                "created_at": job.get("created_at"),
-                "started_at": job.get("started_at"),
-                "agent_mode": job.get("agent_mode", False)
-            }
-
-            if job.get("started_at"):
-                job_summary["elapsed"] = now - job["started_at"]
-
-            if status == "running":
-                metrics["jobs"]["running"].append(job_summary)
-            elif status == "queued":
-                metrics["jobs"]["queued"].append(job_summary)
-            elif status == "completed":
-                metrics["jobs"]["recent_completed"].append(job_summary)
-            elif status == "action_required":
-                metrics["jobs"]["action_required"].append(job_summary)
-
-            events = job.get("events") or []
-            for event in events[-3:]:
-                recent_events.append({
-                    "job_id": job_id,
-                    "message": event.get("message"),
-                    "type": event.get("type", "info"),
-                    "timestamp": event.get("timestamp"),
-                    "power_mode": job.get("power_mode")
-                })
+                "message": event.get("message"),
+                "type": event.get("type", "info"),
+                "timestamp": event.get("timestamp"),
+                "power_mode": job.get("power_mode")
+            })
 
     recent_events.sort(key=lambda e: e.get("timestamp") or 0, reverse=True)
     metrics["recent_events"] = recent_events[:10]
     metrics["jobs"]["timeout_settings"] = JOB_EXPECTED_DURATIONS
-    metrics["jobs"]["recent_completed"] = metrics["jobs"]["recent_completed"][:5]
+    metrics["jobs"]["recent_completed"] = sorted(
+        metrics["jobs"]["recent_completed"], key=lambda j: j.get("created_at") or 0, reverse=True
+    )[:5]
+    metrics["jobs"]["workers"] = job_workers.snapshot()
+    metrics["jobs"]["event_bus"] = job_events.snapshot()
     metrics["lm_studio"] = fetch_lm_studio_status()
+    metrics["fighter_pool"] = shenron.fighter_pool.health_check()
+    metrics["lm_backends"] = shenron.fighter_pool.backends.snapshot()
+    metrics["answer_cache"] = shenron.answer_cache.stats()
+    metrics["embedding_service"] = shenron.embedding_service.get_stats()
+    metrics["speculation"] = dict(shenron.speculation_stats)
+    metrics["lightning"] = shenron.lightning_snapshot()
+    metrics["ssh_pool"] = shenron.ssh_pool.snapshot()
 
     return metrics
 
@@ -277,8 +315,12 @@ def health_check():
         "features": ["rag", "synthesis", "agent_mode"]
     })
 
-def perform_grant_wish(query, power_mode='council', use_rag=True, job_id=None, cancel_checker=None):
-    """Core wish processing logic shared by sync/async flows."""
+def perform_grant_wish(query, power_mode='council', use_rag=True, job_id=None, cancel_checker=None, on_event=None,
+                       use_cache=True, stream_tokens=False):
+    """
+    Core wish processing logic shared by sync/async/stream flows.
+    stream_tokens=True also forwards LM token deltas to on_event (SSE only).
+    """
     POWER_MODES = {
         'lightning': {'name': 'LIGHTNING', 'icon': '⚡', 'power': '1,000'},
         'council': {'name': 'COUNCIL', 'icon': '🔥', 'power': '9,000'},
@@ -294,11 +336,14 @@ def perform_grant_wish(query, power_mode='council', use_rag=True, job_id=None, c
         raise WishCancelled()
 
     if power_mode == 'lightning':
-        result = execute_lightning_mode(query, cancel_checker=cancel_checker)
+        result = execute_lightning_mode(query, use_rag=use_rag, cancel_checker=cancel_checker, on_event=on_event,
+                                        use_cache=use_cache, stream_tokens=stream_tokens)
     elif power_mode == 'ultra':
-        result = execute_ultra_instinct_mode(query, use_rag, cancel_checker=cancel_checker)
+        result = execute_ultra_instinct_mode(query, use_rag, cancel_checker=cancel_checker, on_event=on_event,
+                                             stream_tokens=stream_tokens)
     else:
-        result = shenron.grant_wish(query, use_rag=use_rag, cancel_checker=cancel_checker)
+        result = shenron.grant_wish(query, use_rag=use_rag, cancel_checker=cancel_checker, on_event=on_event,
+                                    power_mode='council', use_cache=use_cache, stream_tokens=stream_tokens)
 
     result['power_mode'] = mode_info['name']
     result['power_level'] = mode_info['power']
@@ -314,49 +359,85 @@ def perform_grant_wish(query, power_mode='council', use_rag=True, job_id=None, c
 
     return result
 
-def process_wish_job(job_id, query, power_mode, use_rag, agent_mode):
+def job_progress_listener(job_id, power_mode, stream=False):
+    """
+    on_event callback for an async job: turns orchestrator stage events into
+    persisted job events with real progress. With stream=True every event,
+    token deltas included, is also published to wish_streams.
+    """
+    expected = JOB_EXPECTED_WARRIORS.get(power_mode, JOB_EXPECTED_WARRIORS["council"])
+    state = {"warriors": 0, "progress": 10}
+
+    def advance(progress):
+        state["progress"] = max(state["progress"], progress)
+        return state["progress"]
+
+    def on_event(event):
+        if stream:
+            wish_streams.publish(job_id, dict(event))
+        kind = event.get("type")
+        event_type = "info"
+        fields = {}
+        if kind == "rag_done":
+            message = f"Knowledge base searched ({event.get('chunks', 0)} chunks, {event.get('mode') or 'vector'})"
+            fields["progress"] = advance(20)
+        elif kind == "cache_hit":
+            message = "Answer served from cache"
+            fields["progress"] = advance(90)
+        elif kind == "speculation_start":
+            message = f"Validator council launched alongside GOKU ({len(event.get('fighters') or [])} warriors)"
+        elif kind == "speculation_cancelled":
+            message = "GOKU confident - validator council cancelled"
+        elif kind == "warrior_done":
+            state["warriors"] += 1
+            fighter = f"{event.get('emoji') or ''} {event.get('fighter', 'Warrior')}".strip()
+            response_time = event.get("response_time")
+            if event.get("success", True):
+                message = f"{fighter} completed in {response_time:.1f}s" if response_time else f"{fighter} completed"
+                event_type = "success"
+            else:
+                message = f"{fighter} failed"
+                event_type = "error"
+            fields["progress"] = advance(round(20 + 60 * min(1.0, state["warriors"] / expected), 1))
+        elif kind == "warrior_cut_off":
+            message = f"{event.get('fighter')} cut off by quorum"
+        elif kind == "warrior_late":
+            message = f"{event.get('fighter')} arrived late (kept as addendum)"
+        elif kind == "refinement_start":
+            message = f"Ultra Instinct refinement: {', '.join(event.get('fighters') or [])} re-examine the disagreement"
+        elif kind == "synthesis_start":
+            message = f"Synthesizing {len(event.get('fighters') or [])} warrior answers"
+            fields["progress"] = advance(85)
+        else:
+            return
+        if "progress" in fields:
+            fields["message"] = message
+        append_job_event(job_id, message, event_type, **fields)
+
+    return on_event
+
+def process_wish_job(job_id, query, power_mode, use_rag, agent_mode, use_cache=True, stream_tokens=False):
     """Background worker for asynchronous wish processing."""
     if is_cancellation_requested(job_id):
         finalize_cancelled_job(job_id, "Cancellation acknowledged before processing")
         return
 
-    start_time = time.time()
-    update_job_record(
+    append_job_event(
         job_id,
+        "Consulting SHENRON council",
+        "info",
         status="running",
-        started_at=start_time,
+        started_at=time.time(),
         progress=10,
         message="Consulting SHENRON council"
     )
-    append_job_event(job_id, "Consulting SHENRON council", "info")
-
-    def progress_worker():
-        while True:
-            with jobs_lock:
-                job = jobs.get(job_id)
-                if not job or job.get("status") != "running":
-                    break
-                elapsed = time.time() - job.get("started_at", time.time())
-                expected = job.get("expected_duration", JOB_EXPECTED_DURATIONS.get(power_mode, 300))
-                if expected <= 0:
-                    expected = 60
-                fraction = min(0.85, elapsed / expected)
-                computed_progress = round(10 + fraction * 80, 1)
-                if computed_progress > job.get("progress", 0):
-                    job["progress"] = computed_progress
-                if job.get("message") == "Consulting SHENRON council":
-                    job["message"] = f"Consulting SHENRON council ({int(job['progress'])}%)"
-            time.sleep(5)
-
-    threading.Thread(target=progress_worker, daemon=True).start()
 
     try:
-        if is_cancellation_requested(job_id):
-            finalize_cancelled_job(job_id, "Cancellation acknowledged before processing")
-            return
-
         cancel_checker = lambda: is_cancellation_requested(job_id)
-        result = perform_grant_wish(query, power_mode=power_mode, use_rag=use_rag, job_id=job_id, cancel_checker=cancel_checker)
+        result = perform_grant_wish(query, power_mode=power_mode, use_rag=use_rag, job_id=job_id,
+                                    cancel_checker=cancel_checker,
+                                    on_event=job_progress_listener(job_id, power_mode, stream=stream_tokens),
+                                    use_cache=use_cache, stream_tokens=stream_tokens)
 
         if is_cancellation_requested(job_id):
             finalize_cancelled_job(job_id, "Wish cancelled after processing step")
@@ -366,8 +447,13 @@ def process_wish_job(job_id, query, power_mode, use_rag, agent_mode):
         pending_actions = result.get("pending_actions") or []
 
         if pending_actions and not artifacts:
-            update_job_record(
+            for action in pending_actions[:5]:
+                summary = action.get("summary") or action.get("status") or "Pending directive"
+                append_job_event(job_id, f"{action.get('source', 'Warrior')}: {summary}", "info")
+            append_job_event(
                 job_id,
+                f"{len(pending_actions)} follow-up action(s) detected – awaiting MCP execution",
+                "warning",
                 status="action_required",
                 completed_at=time.time(),
                 progress=95,
@@ -376,15 +462,13 @@ def process_wish_job(job_id, query, power_mode, use_rag, agent_mode):
                 pending_actions=pending_actions,
                 artifacts=artifacts
             )
-            append_job_event(job_id, f"{len(pending_actions)} follow-up action(s) detected – awaiting MCP execution", "warning")
-            for action in pending_actions[:5]:
-                summary = action.get("summary") or action.get("status") or "Pending directive"
-                append_job_event(job_id, f"{action.get('source', 'Warrior')}: {summary}", "info")
             return
 
         if not artifacts and not result.get("wish_granted", False):
-            update_job_record(
+            append_job_event(
                 job_id,
+                "Wish ended without verifiable artifacts",
+                "error",
                 status="failed",
                 completed_at=time.time(),
                 progress=100,
@@ -394,23 +478,8 @@ def process_wish_job(job_id, query, power_mode, use_rag, agent_mode):
                 artifacts=artifacts,
                 message="Wish concluded without artifacts"
             )
-            append_job_event(job_id, "Wish ended without verifiable artifacts", "error")
             return
 
-        # Record detailed events
-        warrior_responses = result.get("warrior_responses") or []
-        for warrior in warrior_responses:
-            fighter = warrior.get("fighter", "Warrior")
-            emoji = warrior.get("emoji", "")
-            response_time = warrior.get("response_time")
-            success = warrior.get("success", True)
-            event_type = "success" if success else "error"
-            if success:
-                msg = f"{emoji} {fighter} completed in {response_time:.1f}s" if response_time else f"{emoji} {fighter} completed"
-            else:
-                msg = f"{emoji} {fighter} failed"
-            append_job_event(job_id, msg.strip(), event_type)
-
         consensus = result.get("consensus") or {}
         consensus_type = consensus.get("type")
         if consensus_type:
@@ -427,8 +496,10 @@ def process_wish_job(job_id, query, power_mode, use_rag, agent_mode):
         if result.get("passes"):
             append_job_event(job_id, f"Ultra Instinct passes: {result['passes']}", "info")
 
-        update_job_record(
+        append_job_event(
             job_id,
+            "Wish granted successfully",
+            "success",
             status="completed",
             completed_at=time.time(),
             progress=100,
@@ -437,25 +508,97 @@ def process_wish_job(job_id, query, power_mode, use_rag, agent_mode):
             pending_actions=pending_actions,
             artifacts=artifacts
         )
-        append_job_event(job_id, "Wish granted successfully", "success")
     except WishCancelled:
         finalize_cancelled_job(job_id, "Wish cancelled by user")
-        append_job_event(job_id, "Wish cancelled", "warning")
     except Exception as exc:
-        update_job_record(
+        append_job_event(
             job_id,
+            f"Wish failed: {exc}",
+            "error",
             status="failed",
             completed_at=time.time(),
             progress=100,
             error=str(exc),
             message=f"Failed: {exc}"
         )
-        append_job_event(job_id, f"Wish failed: {exc}", "error")
+
+def run_queued_wish(job_id, job):
+    """JobWorkerPool handler: run a claimed job from its stored request."""
+    wish = job.get("request") or {}
+    try:
+        process_wish_job(
+            job_id,
+            wish.get("query", job.get("query_preview", "")),
+            job.get("power_mode", "council"),
+            wish.get("use_rag", True),
+            job.get("agent_mode", False),
+            wish.get("use_cache", True),
+            wish.get("stream_tokens", False)
+        )
+    finally:
+        if wish.get("stream_tokens"):
+            # The job record is final now; the SSE response drains and reads it
+            wish_streams.close(job_id)
+
+job_workers = JobWorkerPool(
+    job_store,
+    run_queued_wish,
+    workers=JOB_WORKERS,
+    mode_limits=JOB_MODE_LIMITS,
+    max_queued=MAX_QUEUED_JOBS
+)
+job_workers.start()
+_recovered = job_workers.stats["recovered"]
+if _recovered.get("queued"):
+    print(f" Resuming {_recovered['queued']} queued wish(es) from {JOB_DB_PATH}")
+
+SSE_KEEPALIVE_SECONDS = 15
+
+def format_sse(event_type, payload, event_id=None):
+    """Serialize one Server-Sent Event frame."""
+    frame = f"id: {event_id}\n" if event_id is not None else ""
+    return frame + f"event: {event_type}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+def stream_wish_events(job_id, query, power_mode):
+    """
+    Tail a streamed wish job: its token/progress events as SSE, then one
+    final result / cancelled / error event from the job record.
+    The client disconnecting cancels the job.
+    """
+    finished = False
+    try:
+        yield format_sse("start", {"job_id": job_id, "query_preview": query[:120], "power_mode": power_mode})
+        for event in wish_streams.subscribe(job_id, keepalive=SSE_KEEPALIVE_SECONDS):
+            if event is None:
+                # Also covers a job cancelled while still queued (never run)
+                if get_job_record(job_id).get("status") in FINISHED_STATUSES:
+                    break
+                # Comment frame keeps proxies (Cloudflare) from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            event = {key: value for key, value in event.items() if key != "seq"}
+            yield format_sse(event.pop("type", "message"), event)
+
+        job = get_job_record(job_id)
+        finished = True
+        if job.get("result") is not None:
+            yield format_sse("result", {"result": job["result"]})
+        elif job.get("status") == "cancelled":
+            yield format_sse("cancelled", {"message": job.get("message") or "Wish cancelled"})
+        else:
+            yield format_sse("error", {"error": job.get("error") or "Wish failed", "wish_granted": False})
+    finally:
+        if not finished:
+            request_job_cancellation(job_id)
 
 @app.route('/api/shenron/grant-wish', methods=['POST'])
 def grant_wish():
     """
-    Main endpoint: Grant a wish with POWER MODE support (sync or async)
+    Main endpoint: Grant a wish with POWER MODE support (sync, async or stream)
+
+    With "stream": true the response is text/event-stream carrying
+    warrior_token / warrior_done / synthesis_start / synthesis_token events
+    as they are generated, followed by one final "result" event.
     """
     try:
         data = request.get_json() or {}
@@ -468,24 +611,43 @@ def grant_wish():
 
         query = data['query']
         power_mode = data.get('power_mode', 'council')
-        use_rag = data.get('use_rag', True)
+        # Lightning stays a pure single-shot call unless RAG is asked for
+        use_rag = data.get('use_rag', power_mode != 'lightning')
         async_mode = bool(data.get('async_mode') or data.get('async'))
         agent_mode = bool(data.get('agent_mode'))
+        stream_mode = bool(data.get('stream'))
+        use_cache = bool(data.get('use_cache', True))
+
+        if stream_mode or async_mode:
+            # Both go through the job queue: admission, per-mode limits, store
+            admitted, reason = job_workers.admit()
+            if not admitted:
+                return jsonify({
+                    "error": reason,
+                    "wish_granted": False
+                }), 429, {"Retry-After": "30"}
+
+            job_id = create_job_record(query, power_mode, agent_mode, use_rag=use_rag, use_cache=use_cache,
+                                       stream_tokens=stream_mode)
+            job_workers.notify()
+
+        if stream_mode:
+            return Response(
+                stream_with_context(stream_wish_events(job_id, query, power_mode)),
+                mimetype='text/event-stream',
+                headers={
+                    'Cache-Control': 'no-cache',
+                    'X-Accel-Buffering': 'no'
+                }
+            )
 
         if async_mode:
-            job_id = create_job_record(query, power_mode, agent_mode)
-            worker = threading.Thread(
-                target=process_wish_job,
-                args=(job_id, query, power_mode, use_rag, agent_mode),
-                daemon=True
-            )
-            worker.start()
             return jsonify({
                 "job_id": job_id,
                 "status": "queued"
             }), 202
 
-        result = perform_grant_wish(query, power_mode=power_mode, use_rag=use_rag)
+        result = perform_grant_wish(query, power_mode=power_mode, use_rag=use_rag, use_cache=use_cache)
         return jsonify(result)
 
     except Exception as e:
@@ -495,13 +657,78 @@ def grant_wish():
             "wish_granted": False
         }), 500
 
+def wait_for_job_events(job_id, job, after, timeout):
+    """Long-poll: block until the job has events newer than `after` (or it finishes)."""
+    if job.get("status") in FINISHED_STATUSES or job.get("last_event_seq", 0) > after:
+        return job
+    job_events.wait(job_id, after, timeout=min(timeout, JOB_LONG_POLL_MAX))
+    return get_job_record(job_id) or job
+
+def stream_job_events(job_id, after=0):
+    """
+    SSE subscription for one job: replays stored events newer than `after`
+    (Last-Event-ID), then forwards live events until the job finishes.
+    """
+    job = get_job_record(job_id)
+    for event in job.get("events") or []:
+        if event.get("seq", 0) > after:
+            after = event["seq"]
+            yield format_sse(event.get("type", "info"), {**event, "job_id": job_id}, event_id=event["seq"])
+
+    if job.get("status") not in FINISHED_STATUSES:
+        for event in job_events.subscribe(job_id, after, keepalive=SSE_KEEPALIVE_SECONDS):
+            if event is None:
+                # Also covers a job finished by a path that did not publish
+                if get_job_record(job_id).get("status") in FINISHED_STATUSES:
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event.get("type", "info"), {**event, "job_id": job_id}, event_id=event["seq"])
+
+    job = get_job_record(job_id)
+    yield format_sse("end", {
+        "job_id": job_id,
+        "status": job.get("status"),
+        "progress": job.get("progress"),
+        "result": job.get("result"),
+        "error": job.get("error")
+    })
+
+@app.route('/api/shenron/job-events/<job_id>', methods=['GET'])
+def job_events_stream(job_id):
+    """Server-Sent Events stream of a job's progress events."""
+    if not get_job_record(job_id):
+        return jsonify({"error": "Job not found"}), 404
+    after = request.headers.get('Last-Event-ID') or request.args.get('after') or 0
+    try:
+        after = int(after)
+    except ValueError:
+        after = 0
+    return Response(
+        stream_with_context(stream_job_events(job_id, after)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @app.route('/api/shenron/job-status/<job_id>', methods=['GET'])
 def job_status(job_id):
-    """Return status/result for asynchronous wish processing."""
+    """
+    Return status/result for asynchronous wish processing.
+
+    Long-poll with ?wait=<seconds>&after=<last_event_seq>: the request is
+    held until a newer event exists or the job finishes.
+    """
     job = get_job_record(job_id)
     if not job:
         return jsonify({"error": "Job not found"}), 404
 
+    wait = request.args.get('wait', type=float)
+    if wait:
+        job = wait_for_job_events(job_id, job, request.args.get('after', 0, type=int), wait)
+
     response = {
         "job_id": job_id,
         "status": job.get("status", "unknown"),
@@ -513,6 +740,7 @@ def job_status(job_id):
         "completed_at": job.get("completed_at"),
         "message": job.get("message"),
         "events": job.get("events", []),
+        "last_event_seq": job.get("last_event_seq", 0),
         "expected_duration": job.get("expected_duration"),
         "pending_actions": job.get("pending_actions", []),
         "artifacts": job.get("artifacts", [])
@@ -552,88 +780,33 @@ def system_metrics():
     return jsonify(get_system_metrics())
 
 
-def execute_lightning_mode(query, cancel_checker=None):
+def execute_lightning_mode(query, use_rag=False, cancel_checker=None, on_event=None, use_cache=True,
+                           stream_tokens=False):
     """
     ⚡ LIGHTNING MODE: Single warrior (Goku), fastest response
     - Power: 1,000
     - Accuracy: 85-90%
-    - Time: 5-10s
-    """
-    import time
-    
-    start_time = time.time()
-    
-    if cancel_checker and cancel_checker():
-        raise WishCancelled()
+    - Time: 5-10s (SLO tracked in /api/shenron/metrics -> lightning)
 
-    # Use the orchestrator's consult_council but limit to partial result
-    # For now, just use standard grant_wish with RAG disabled
-    result = shenron.grant_wish(query, use_rag=False, cancel_checker=cancel_checker)
-    
-    # Extract just Goku's response (first warrior)
-    if result.get('warrior_responses'):
-        goku_response = result['warrior_responses'][0]
-        
-        total_time = time.time() - start_time
-        
-        return shenron.post_process_result({
-            'query': query,
-            'rag_used': False,
-            'warrior_responses': [goku_response],
-            'synthesized_answer': goku_response['answer'],
-            'consensus': {'type': 'single_warrior', 'message': 'Lightning mode - single warrior response'},
-            'synthesis_method': 'lightning',
-            'total_time': total_time,
-            'wish_granted': True
-        })
-    
-    # Fallback to standard result
-    result['synthesis_method'] = 'lightning'
-    return shenron.post_process_result(result)
+    One pooled GOKU call (no cascade, no synthesis); RAG only when the
+    request sets use_rag, served from the retrieval cache.
+    """
+    return shenron.lightning_wish(query, use_rag=use_rag, cancel_checker=cancel_checker, on_event=on_event,
+                                  use_cache=use_cache, stream_tokens=stream_tokens)
 
 
-def execute_ultra_instinct_mode(query, use_rag=True, cancel_checker=None):
+def execute_ultra_instinct_mode(query, use_rag=True, cancel_checker=None, on_event=None, stream_tokens=False):
     """
     🐉 ULTRA INSTINCT MODE: Multi-pass with conflict resolution
     - Power: OVER 9000!
     - Accuracy: 99.99999999%
     - Time: 60-180s
+
+    Pass 2 only re-asks the warriors that disagree with the council, showing
+    them their peers' answers; RAG context and agreeing answers are reused.
     """
-    import time
-    
-    start_time = time.time()
-    
-    # Pass 1: Standard council consensus
-    result_pass1 = shenron.grant_wish(query, use_rag=use_rag, cancel_checker=cancel_checker)
-    
-    # Check consensus for conflicts
-    consensus_type = result_pass1.get('consensus', {}).get('type', 'unknown')
-    
-    if consensus_type in ['split', 'conflicted', 'weak']:
-        # Pass 2: Re-query with focus on conflict resolution
-        print(f"   🐉 Detected {consensus_type} consensus - initiating second pass...")
-        
-        debate_query = f"Regarding '{query}', synthesize the best answer considering all perspectives."
-        if cancel_checker and cancel_checker():
-            raise WishCancelled()
-        result_pass2 = shenron.grant_wish(debate_query, use_rag=use_rag, cancel_checker=cancel_checker)
-        
-        # Use second pass synthesis as final answer
-        final_answer = result_pass2['synthesized_answer']
-        passes = 2
-    else:
-        # Consensus is strong, use first pass
-        final_answer = result_pass1['synthesized_answer']
-        passes = 1
-    
-    total_time = time.time() - start_time
-    
-    result_pass1['synthesized_answer'] = final_answer
-    result_pass1['synthesis_method'] = 'ultra_instinct'
-    result_pass1['total_time'] = total_time
-    result_pass1['passes'] = passes
-    
-    return shenron.post_process_result(result_pass1)
+    return shenron.ultra_wish(query, use_rag=use_rag, cancel_checker=cancel_checker, on_event=on_event,
+                              stream_tokens=stream_tokens)
 
 @app.route('/api/shenron/search-knowledge', methods=['POST'])
 def search_knowledge():
@@ -643,7 +816,8 @@ def search_knowledge():
     Request:
         {
             "query": "infrastructure details",
-            "n_results": 3
+            "n_results": 3,
+            "rerank": false          // optional cross-encoder rerank
         }
     """
     try:
@@ -654,13 +828,16 @@ def search_knowledge():
 
         query = data['query']
         n_results = data.get('n_results', 3)
+        rerank = bool(data.get('rerank', False))
 
-        context = shenron.search_knowledge_base(query, n_results=n_results)
+        context, chunk_ids, retrieval = shenron.retrieve_context(query, n_results=n_results, rerank=rerank)
 
         return jsonify({
             "query": query,
             "context": context,
-            "found": bool(context)
+            "found": bool(context),
+            "chunk_ids": chunk_ids,
+            "retrieval": retrieval
         })
 
     except Exception as e:
@@ -803,7 +980,7 @@ if __name__ == '__main__':
 
     print(" API ENDPOINTS:")
     print("   GET  /health                      - Health check")
-    print("   POST /api/shenron/grant-wish      - Grant a wish (main)")
+    print("   POST /api/shenron/grant-wish      - Grant a wish (main, \"stream\": true for SSE)")
     print("   POST /api/shenron/search-knowledge - Search knowledge base")
     print("   GET  /api/shenron/fighters        - List all fighters")
     print("   POST /api/shenron/execute-command - Execute SSH command (agent mode)")
@@ -10,12 +10,14 @@ With MCP Tools Integration
 Extends SHENRON with file operations, terminal access, and autonomous capabilities.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import requests
 import json
+import time
 from datetime import datetime
-from mcp_tools import MCPTools, ToolPermissions
+from mcp_tools import (BATCH_ITEM_TIMEOUT, BATCH_MAX_ITEMS, BATCH_PER_HOST, TAIL_FOLLOW_INTERVAL, TAIL_FOLLOW_MAX,
+                       MCPTools, ToolPermissions, normalize_directive)
 import re
 import logging
 
@@ -205,52 +207,20 @@ def require_agent_mode_sudo(data):
             return True
     return False
 
-# ============================================================================
-# ROUTE: Execute MCP Tool
-# ============================================================================
-
-@app.route('/api/shenron/execute-tool', methods=['POST'])
-def execute_tool():
+def authorize_tool_request(tool, vm_ip, params, agent_mode):
     """
-    Execute MCP tool directly (requires Agent Mode)
-    
-    Request:
-    {
-        "tool": "read_file",
-        "vm_ip": "<VM150_IP>",
-        "params": {"file_path": "/var/www/index.html"},
-        "agent_mode": true
-    }
+    Security checks for one tool call (sudo, permissions, command and
+    path validation), audited. Returns None if allowed, else the reason.
     """
-    data = request.json
-
-    audit_log('tool_attempt', {
-        'ip': request.remote_addr,
-        'tool': data.get('tool'),
-        'vm_ip': data.get('vm_ip'),
-        'params': data.get('params', {}),
-        'agent_mode': data.get('agent_mode', False)
-    })
-
-    tool = data.get('tool')
-    vm_ip = data.get('vm_ip')
-    params = data.get('params', {})
-    agent_mode = data.get('agent_mode', False)
-
-    # SECURITY: Sudo must require agent_mode
-    if require_agent_mode_sudo(data):
+    if require_agent_mode_sudo({'tool': tool, 'params': params, 'agent_mode': agent_mode}):
         audit_log('sudo_denied', {
             'ip': request.remote_addr,
             'tool': tool,
             'vm_ip': vm_ip,
             'command': params.get('command')
         })
-        return jsonify({
-            'success': False,
-            'error': 'Sudo operations require Agent Mode and 2FA.'
-        }), 403
+        return 'Sudo operations require Agent Mode and 2FA.'
 
-    # Security check
     command = params.get('command') if tool == 'run_command' else None
     allowed, reason = ToolPermissions.check_permission(tool, command, agent_mode)
 
@@ -265,13 +235,10 @@ def execute_tool():
                 'command': command,
                 'reason': cmd_reason
             })
-            return jsonify({
-                'success': False,
-                'error': f'Permission denied: {cmd_reason}'
-            }), 403
+            return f'Permission denied: {cmd_reason}'
 
-    # File path validation for read_file, write_file
-    if tool in ['read_file', 'write_file']:
+    # File path validation for read_file, write_file, tail_log
+    if tool in ['read_file', 'write_file', 'tail_log']:
         file_path = params.get('file_path')
         if file_path:
             path_valid, path_reason = validate_file_path(file_path)
@@ -283,10 +250,7 @@ def execute_tool():
                     'file_path': file_path,
                     'reason': path_reason
                 })
-                return jsonify({
-                    'success': False,
-                    'error': f'Permission denied: {path_reason}'
-                }), 403
+                return f'Permission denied: {path_reason}'
 
     if not allowed:
         audit_log('permission_denied', {
@@ -295,36 +259,52 @@ def execute_tool():
             'vm_ip': vm_ip,
             'reason': reason
         })
+        return f'Permission denied: {reason}'
+
+    return None
+
+# ============================================================================
+# ROUTE: Execute MCP Tool
+# ============================================================================
+
+@app.route('/api/shenron/execute-tool', methods=['POST'])
+def execute_tool():
+    """
+    Execute MCP tool directly (requires Agent Mode)
+    
+    Request:
+    {
+        "tool": "read_file",
+        "vm_ip": "<VM150_IP>",
+        "params": {"file_path": "/var/www/index.html"},
+        "agent_mode": true
+    }
+    """
+    data = request.json
+
+    audit_log('tool_attempt', {
+        'ip': request.remote_addr,
+        'tool': data.get('tool'),
+        'vm_ip': data.get('vm_ip'),
+        'params': data.get('params', {}),
+        'agent_mode': data.get('agent_mode', False)
+    })
+
+    tool = data.get('tool')
+    vm_ip = data.get('vm_ip')
+    params = data.get('params', {})
+    agent_mode = data.get('agent_mode', False)
+
+    denied = authorize_tool_request(tool, vm_ip, params, agent_mode)
+    if denied:
         return jsonify({
             'success': False,
-            'error': f'Permission denied: {reason}'
+            'error': denied
         }), 403
 
     # Execute tool
     try:
-        if tool == 'read_file':
-            result = mcp.read_file(vm_ip, params['file_path'], 
-                                  params.get('offset', 0), params.get('limit'))
-        
-        elif tool == 'write_file':
-            result = mcp.write_file(vm_ip, params['file_path'], 
-                                   params['content'], params.get('append', False))
-        
-        elif tool == 'run_command':
-            result = mcp.run_command(vm_ip, params['command'], 
-                                    params.get('timeout', 30), params.get('sudo', False))
-        
-        elif tool == 'list_directory':
-            result = mcp.list_directory(vm_ip, params['directory'])
-        
-        elif tool == 'search_files':
-            result = mcp.search_files(vm_ip, params['pattern'], 
-                                     params.get('directory', '/'))
-        
-        elif tool == 'get_system_info':
-            result = mcp.get_system_info(vm_ip)
-        
-        else:
+        if tool not in MCPTools.TOOLS:
             audit_log('unknown_tool', {
                 'ip': request.remote_addr,
                 'tool': tool,
@@ -335,6 +315,8 @@ def execute_tool():
                 'error': f'Unknown tool: {tool}'
             }), 400
         
+        result = mcp.execute(tool, vm_ip, params)
+        
         audit_log('tool_success', {
             'ip': request.remote_addr,
             'tool': tool,
@@ -356,6 +338,194 @@ def execute_tool():
         }), 500
 
 
+# ============================================================================
+# ROUTE: Execute MCP Tools in Batch (fleet-wide fan-out)
+# ============================================================================
+
+@app.route('/api/shenron/execute-batch', methods=['POST'])
+def execute_batch():
+    """
+    Execute many MCP tools across VMs concurrently
+    
+    Request:
+    {
+        "directives": [
+            {"tool": "get_system_info", "vm_ip": "<VM150_IP>"},
+            {"tool": "run_command", "vm": "<VM101_IP>", "command": "uptime"}
+        ],
+        "agent_mode": true,
+        "timeout": 60,          // per directive, seconds
+        "max_per_host": 2,      // concurrent directives per VM
+        "stream": false         // true = text/event-stream, one event per result
+    }
+    
+    Directives use the execute-tool shape (vm_ip + params) or the warrior
+    directive shape (vm, path, command, ...). Denied directives are
+    reported and never run; the rest run concurrently and results come
+    back in completion order.
+    """
+    data = request.json or {}
+    directives = data.get('directives') or []
+    agent_mode = data.get('agent_mode', False)
+    item_timeout = min(float(data.get('timeout', BATCH_ITEM_TIMEOUT)), BATCH_ITEM_TIMEOUT * 5)
+    per_host = max(1, int(data.get('max_per_host', BATCH_PER_HOST)))
+
+    if not isinstance(directives, list) or not directives:
+        return jsonify({'success': False, 'error': 'No directives provided'}), 400
+    if len(directives) > BATCH_MAX_ITEMS:
+        return jsonify({
+            'success': False,
+            'error': f'Too many directives ({len(directives)} > {BATCH_MAX_ITEMS})'
+        }), 400
+
+    audit_log('batch_attempt', {
+        'ip': request.remote_addr,
+        'directives': len(directives),
+        'agent_mode': agent_mode
+    })
+
+    # Every directive passes the same checks as execute-tool
+    denied, runnable, runnable_index = [], [], []
+    for index, directive in enumerate(directives):
+        tool, vm_ip, params = normalize_directive(directive)
+        if tool not in MCPTools.TOOLS or not vm_ip:
+            reason = f'Unknown tool: {tool}' if tool not in MCPTools.TOOLS else 'Missing vm_ip'
+        else:
+            reason = authorize_tool_request(tool, vm_ip, params, agent_mode)
+        if reason:
+            denied.append({
+                'index': index,
+                'tool': tool,
+                'vm_ip': vm_ip,
+                'success': False,
+                'denied': True,
+                'error': reason
+            })
+        else:
+            runnable.append(directive)
+            runnable_index.append(index)
+
+    remote_addr = request.remote_addr
+    start_time = time.time()
+
+    def results():
+        for item in denied:
+            yield item
+        for item in mcp.iter_batch(runnable, item_timeout=item_timeout, per_host=per_host):
+            item['index'] = runnable_index[item['index']]
+            audit_log('batch_item', {
+                'ip': remote_addr,
+                'tool': item['tool'],
+                'vm_ip': item['vm_ip'],
+                'success': item['success'],
+                'timed_out': item['timed_out']
+            })
+            yield item
+
+    def summarize(items):
+        return {
+            'total': len(directives),
+            'succeeded': sum(1 for item in items if item['success']),
+            'failed': sum(1 for item in items if not item['success'] and not item.get('denied')),
+            'denied': len(denied),
+            'timed_out': sum(1 for item in items if item.get('timed_out')),
+            'elapsed': round(time.time() - start_time, 3),
+            'slowest': max((item.get('elapsed', 0) for item in items), default=0)
+        }
+
+    if data.get('stream'):
+        def stream():
+            items = []
+            for item in results():
+                items.append(item)
+                yield f"event: result\ndata: {json.dumps(item)}\n\n"
+            yield f"event: end\ndata: {json.dumps(summarize(items))}\n\n"
+
+        return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    items = list(results())
+    summary = summarize(items)
+    return jsonify({
+        'success': summary['succeeded'] == len(directives),
+        'results': items,
+        'summary': summary
+    })
+
+
+# ============================================================================
+# ROUTE: Tail / Follow a Remote Log
+# ============================================================================
+
+@app.route('/api/shenron/tail-log', methods=['POST'])
+def tail_log():
+    """
+    New lines of a remote log since the last call, filtered on the VM
+    
+    Request:
+    {
+        "vm_ip": "<VM150_IP>",
+        "file_path": "/var/log/nginx/error.log",
+        "pattern": "upstream|timeout",   // optional, POSIX extended regex
+        "level": "warning",              // optional minimum severity
+        "lines": 100,                    // newest matches returned per call
+        "cursor": "1234:56789",          // optional, from a previous response
+        "session": "quest-42",           // optional, remembers the cursor for this caller
+        "follow": 0                      // seconds; > 0 = text/event-stream
+    }
+    
+    Without follow this is execute-tool for tail_log. With follow, an
+    event is sent whenever new matching lines arrive (keepalive comments
+    in between) until the time is up or the client goes away.
+    """
+    data = request.json or {}
+    vm_ip = data.get('vm_ip')
+    params = {key: data[key] for key in ('file_path', 'pattern', 'level', 'lines', 'ignore_case',
+                                         'cursor', 'from_start', 'reset', 'session') if key in data}
+    agent_mode = data.get('agent_mode', False)
+    follow = min(float(data.get('follow', 0) or 0), TAIL_FOLLOW_MAX)
+
+    if not vm_ip or not params.get('file_path'):
+        return jsonify({'success': False, 'error': 'vm_ip and file_path are required'}), 400
+
+    denied = authorize_tool_request('tail_log', vm_ip, params, agent_mode)
+    if denied:
+        return jsonify({
+            'success': False,
+            'error': denied
+        }), 403
+
+    audit_log('tail_log', {
+        'ip': request.remote_addr,
+        'vm_ip': vm_ip,
+        'file_path': params['file_path'],
+        'follow': follow
+    })
+
+    if follow <= 0:
+        return jsonify(mcp.execute('tail_log', vm_ip, params))
+
+    file_path = params.pop('file_path')
+    interval = max(0.5, float(data.get('interval', TAIL_FOLLOW_INTERVAL)))
+
+    def stream():
+        cursor = None
+        for result in mcp.follow_log(vm_ip, file_path, duration=follow, interval=interval, **params):
+            if not result['success']:
+                yield f"event: error\ndata: {json.dumps(result)}\n\n"
+                return
+            # The first poll always goes out (initial tail + cursor), then only changes
+            if cursor is None or result['returned'] or result['reset']:
+                yield f"event: lines\ndata: {json.dumps(result)}\n\n"
+            else:
+                yield ": keepalive\n\n"
+            cursor = result['cursor']
+        yield f"event: end\ndata: {json.dumps({'cursor': cursor})}\n\n"
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 # ============================================================================
 # ROUTE: Grant Wish (Enhanced with MCP)
 # ============================================================================
@@ -9,17 +9,183 @@ Ultra Instinct Foundation
 Provides SHENRON with file access and command execution across all VMs.
 """
 
-import paramiko
 import os
 import json
+import base64
+import posixpath
+import shlex
+import stat
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ssh_pool import get_ssh_pool
+
+# Batch fan-out (many tools / VMs in one request)
+BATCH_MAX_ITEMS = 50
+BATCH_MAX_WORKERS = 16
+BATCH_PER_HOST = 2  # concurrent tools per VM (the SSH pool caps channels as well)
+BATCH_ITEM_TIMEOUT = 60  # seconds per directive once it started
+
+# read_file / write_file stream over SFTP on the pooled transport: each
+# window is fetched as pipelined 32KB requests (no wc/sed/echo round trips)
+SFTP_WINDOW = 256 * 1024  # bytes requested per round of pipelined reads/writes
+READ_MAX_BYTES = 16 * 1024 * 1024  # content returned by one read_file call
+FILE_ENCODINGS = ('utf-8', 'base64')  # base64 for binary content in and out
+MAX_SYMLINK_HOPS = 40  # write_file follows at most this many links (like the kernel's ELOOP)
+
+# get_system_info: every metric from one remote exec (POSIX sh + awk, no
+# top/free). CPU is busy/total jiffies over a 0.25s /proc/stat window;
+# memory uses MemAvailable; disk comes from df -P (statvfs of /).
+# Fed to sh through a heredoc so the login shell's flavour does not matter.
+SYSTEM_INFO_TTL = 10  # seconds a probe result is served from cache
+SYSTEM_INFO_TIMEOUT = 15  # seconds the probe may take
+SYSTEM_INFO_PROBE = r'''sh <<'SHENRON_PROBE'
+set -- $(head -n 1 /proc/stat)
+b1=$(( $2 + $3 + $4 + $7 + $8 + $9 )); t1=$(( b1 + $5 + $6 ))
+sleep 0.25
+set -- $(head -n 1 /proc/stat)
+b2=$(( $2 + $3 + $4 + $7 + $8 + $9 )); t2=$(( b2 + $5 + $6 ))
+df -P / | awk -v host="$(hostname)" -v busy=$(( b2 - b1 )) -v total=$(( t2 - t1 )) '
+  FILENAME == "/proc/meminfo" { mem[$1] = $2; next }
+  FILENAME == "/proc/uptime" { uptime = $1; next }
+  FILENAME == "/proc/loadavg" { load = $1 "," $2 "," $3; next }
+  FNR == 2 { disk_total = $2; disk_used = $3; disk_free = $4 }
+  END {
+    mem_total = mem["MemTotal:"]; mem_free = mem["MemAvailable:"]
+    if (mem_free == "") mem_free = mem["MemFree:"] + mem["Buffers:"] + mem["Cached:"]
+    cpu = 0; if (total > 0) cpu = 100 * busy / total
+    memory = 0; if (mem_total > 0) memory = 100 * (mem_total - mem_free) / mem_total
+    disk = 0; if (disk_used + disk_free > 0) disk = 100 * disk_used / (disk_used + disk_free)
+    printf "{\"hostname\": \"%s\", \"cpu_usage\": %.1f, \"memory_usage\": %.1f, \"memory_total_mb\": %.1f, ", host, cpu, memory, mem_total / 1024
+    printf "\"disk_usage\": %.1f, \"disk_total_gb\": %.2f, \"disk_free_gb\": %.2f, ", disk, disk_total / 1048576, disk_free / 1048576
+    printf "\"uptime_seconds\": %d, \"load_average\": [%s]}\n", uptime, load
+  }' /proc/meminfo /proc/uptime /proc/loadavg -
+SHENRON_PROBE
+'''
+
+# tail_log: only what was appended since the caller's cursor is scanned,
+# and only matching lines cross the wire (awk filters on the VM). Callers
+# pass back the returned cursor, or name a session to have it remembered
+# per (session, vm, file); a new inode (rotation) or a smaller size
+# (copytruncate) restarts at 0. A trailing partial line is left for the next
+# call. File, patterns and limits reach the script through the environment,
+# so nothing user-supplied is spliced into the shell code.
+TAIL_DEFAULT_LINES = 100  # newest matching lines returned per call
+TAIL_MAX_BYTES = 4 * 1024 * 1024  # log bytes scanned per call; the rest is picked up next call
+TAIL_FOLLOW_INTERVAL = 2  # seconds between polls when following
+TAIL_FOLLOW_MAX = 300  # longest follow, seconds
+TAIL_SESSION_CURSORS = 1024  # remembered (session, vm, file) offsets, least recently used dropped
+# Severity words per level, lowest first; level=X matches X and above
+LOG_LEVELS = {
+    'debug': ('DEBUG', 'TRACE'),
+    'info': ('INFO',),
+    'notice': ('NOTICE',),
+    'warning': ('WARN', 'WARNING'),
+    'error': ('ERR', 'ERROR'),
+    'critical': ('CRIT', 'CRITICAL', 'FATAL', 'ALERT', 'EMERG', 'PANIC'),
+}
+TAIL_SCRIPT = r'''sh <<'SHENRON_TAIL'
+st=$(stat -L -c '%i %s' -- "$F") || exit 2
+set -- $st
+ino=$1 size=$2 skip=0 reset=
+if [ "$OFF" -lt 0 ]; then
+  # First look: the newest MAX bytes, from just before a line start
+  off=0; reset=start
+  if [ "$size" -gt "$MAX" ]; then off=$(( size - MAX - 1 )); skip=1; fi
+elif [ -n "$INODE" ] && [ "$ino" != "$INODE" ]; then off=0; reset=rotated
+elif [ "$size" -lt "$OFF" ]; then off=0; reset=truncated
+else off=$OFF; fi
+n=$(( size - off )); [ "$n" -gt $(( MAX + skip )) ] && n=$(( MAX + skip ))
+echo "$ino $size $off $reset"
+tail -c +$(( off + 1 )) -- "$F" | head -c "$n" | LC_ALL=C awk -v n="$n" -v skip="$skip" -v keep="$KEEP" '
+  BEGIN { re = ENVIRON["RE"]; lre = ENVIRON["LEVEL_RE"]; icase = ENVIRON["ICASE"] == "1"; if (icase) re = tolower(re) }
+  { end_pos = pos + length($0) + 1; if (end_pos > n) exit; pos = end_pos }
+  NR == 1 && skip { next }
+  lre != "" && toupper($0) !~ lre { next }
+  re != "" && (icase ? tolower($0) : $0) !~ re { next }
+  { matched++; ring[matched % keep] = $0 }
+  END {
+    first = matched > keep ? matched - keep + 1 : 1
+    for (i = first; i <= matched; i++) print ring[i % keep]
+    printf "\036 %d %d\n", pos, matched
+  }'
+SHENRON_TAIL
+'''
+
+
+def level_pattern(level: str) -> str:
+    """awk ERE matching the severity words of level and above (on upper-cased lines)"""
+    names = list(LOG_LEVELS)
+    if level.lower() not in LOG_LEVELS:
+        raise ValueError(f"Unknown log level: {level} (use one of {', '.join(names)})")
+    words = [word for name in names[names.index(level.lower()):] for word in LOG_LEVELS[name]]
+    return f"(^|[^A-Z])({'|'.join(words)})([^A-Z]|$)"
+
+
+def format_uptime(seconds: int) -> str:
+    """'up 3 days, 4:05' (like uptime(1))"""
+    days, rest = divmod(int(seconds), 86400)
+    hours, minutes = divmod(rest // 60, 60)
+    prefix = f"{days} day{'s' if days != 1 else ''}, " if days else ''
+    return f"up {prefix}{hours}:{minutes:02d}"
+
+
+def _skip_lines(data: bytes, pos: int, count: int) -> Tuple[int, int]:
+    """Advance past up to `count` newlines from pos: (new_pos, newlines_passed)"""
+    passed = 0
+    while passed < count:
+        newline = data.find(b'\n', pos)
+        if newline < 0:
+            return len(data), passed
+        pos = newline + 1
+        passed += 1
+    return pos, passed
+
+
+def normalize_directive(directive: Dict) -> Tuple[str, str, Dict]:
+    """
+    (tool, vm_ip, params) from either the API shape
+    {"tool", "vm_ip", "params": {...}} or a warrior directive
+    {"tool", "vm", "path", "command", "content", "timeout", ...}
+    """
+    tool = directive.get('tool')
+    vm_ip = directive.get('vm_ip') or directive.get('vm')
+    if 'params' in directive:
+        return tool, vm_ip, dict(directive.get('params') or {})
+    
+    params = {}
+    path = directive.get('path') or directive.get('file_path')
+    if tool in ('read_file', 'write_file', 'tail_log'):
+        params['file_path'] = path
+    elif tool in ('list_directory', 'search_files') and (path or directive.get('directory')):
+        params['directory'] = directive.get('directory') or path
+    for key in ('command', 'content', 'timeout', 'sudo', 'append', 'pattern', 'offset', 'limit',
+                'byte_offset', 'max_bytes', 'encoding', 'compress', 'level', 'lines', 'cursor', 'ignore_case',
+                'session'):
+        if key in directive:
+            params[key] = directive[key]
+    return tool, vm_ip, params
 
 class MCPTools:
     """MCP Tool Executor for SHENRON"""
     
     def __init__(self, log_file=None):
-        self.ssh_connections = {}
+        # Shared keep-alive transports (one per VM, channels multiplexed)
+        self.ssh_pool = get_ssh_pool()
+        self.ssh_targets = {}
+        # get_system_info cache: vm_ip -> (fetched_at, result), one probe per VM at a time
+        self._system_info_cache = {}
+        self._system_info_locks = {}
+        self._cache_lock = threading.Lock()
+        # tail_log offsets: (session, vm_ip, file_path) -> (inode, byte offset)
+        self._tail_cursors = OrderedDict()
+        # Worker threads for iter_batch (started on demand)
+        self._batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='mcp-batch')
         # Default log file path (OS-agnostic)
         if log_file is None:
             if os.name == 'nt':  # Windows
@@ -59,84 +225,246 @@ class MCPTools:
         with open(self.log_file, 'a') as f:
             f.write(json.dumps(log_entry) + '\n')
     
-    def _get_ssh_connection(self, vm_ip: str) -> paramiko.SSHClient:
-        """Get or create SSH connection to VM"""
-        if vm_ip not in self.ssh_connections:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
+    def _get_ssh_target(self, vm_ip: str, compress: bool = False) -> Dict:
+        """Pool target (host, user, auth) for a VM; compress=True uses a zlib transport"""
+        if vm_ip not in self.ssh_targets:
             creds = self.vm_credentials.get(vm_ip)
             if not creds:
                 raise ValueError(f"No credentials configured for VM {vm_ip}")
+            if not creds.get('key') and not creds.get('password'):
+                raise ValueError(f"No authentication method for VM {vm_ip}")
             
-            try:
-                if creds.get('key'):
-                    ssh.connect(vm_ip, username=creds['username'], 
-                               key_filename=creds['key'])
-                elif creds.get('password'):
-                    ssh.connect(vm_ip, username=creds['username'], 
-                               password=creds['password'])
+            self.ssh_targets[vm_ip] = {
+                'host': vm_ip,
+                'user': creds['username'],
+                'key_filename': creds.get('key'),
+                'password': creds.get('password')
+            }
+        
+        if compress:
+            return {**self.ssh_targets[vm_ip], 'compress': True}
+        return self.ssh_targets[vm_ip]
+    
+    def _exec(self, vm_ip: str, command: str, timeout: Optional[int] = None) -> Tuple[int, str, str]:
+        """Run command on the VM's pooled SSH connection: (exit_code, stdout, stderr)"""
+        return self.ssh_pool.exec(self._get_ssh_target(vm_ip), command, timeout=timeout)
+    
+    def _sftp(self, vm_ip: str, compress: bool = False, timeout: Optional[float] = None):
+        """SFTP client on the VM's pooled SSH connection (context manager)"""
+        return self.ssh_pool.sftp(self._get_ssh_target(vm_ip, compress), timeout=timeout)
+    
+    # ========================================================================
+    # DISPATCH & BATCH FAN-OUT
+    # ========================================================================
+    
+    TOOLS = ('read_file', 'write_file', 'run_command', 'list_directory', 'search_files', 'get_system_info',
+             'tail_log')
+    
+    def execute(self, tool: str, vm_ip: str, params: Dict) -> Dict:
+        """Run one tool by name with API-style params"""
+        if tool == 'read_file':
+            return self.read_file(vm_ip, params['file_path'], params.get('offset', 0), params.get('limit'),
+                                  params.get('byte_offset'), params.get('max_bytes'),
+                                  params.get('encoding', 'utf-8'), params.get('compress', False),
+                                  params.get('timeout'))
+        if tool == 'write_file':
+            return self.write_file(vm_ip, params['file_path'], params['content'], params.get('append', False),
+                                   params.get('encoding', 'utf-8'), params.get('compress', False),
+                                   params.get('timeout'))
+        if tool == 'run_command':
+            return self.run_command(vm_ip, params['command'], params.get('timeout', 30), params.get('sudo', False))
+        if tool == 'list_directory':
+            return self.list_directory(vm_ip, params['directory'], params.get('timeout'))
+        if tool == 'search_files':
+            return self.search_files(vm_ip, params['pattern'], params.get('directory', '/'),
+                                     timeout=params.get('timeout'))
+        if tool == 'get_system_info':
+            return self.get_system_info(vm_ip, params.get('max_age', SYSTEM_INFO_TTL),
+                                        min(params.get('timeout') or SYSTEM_INFO_TIMEOUT, SYSTEM_INFO_TIMEOUT))
+        if tool == 'tail_log':
+            return self.tail_log(vm_ip, params['file_path'], params.get('pattern'), params.get('level'),
+                                 params.get('lines', TAIL_DEFAULT_LINES), params.get('ignore_case', False),
+                                 params.get('cursor'), params.get('from_start', False), params.get('reset', False),
+                                 session=params.get('session'), timeout=params.get('timeout'))
+        raise ValueError(f"Unknown tool: {tool}")
+    
+    def iter_batch(self, directives: List[Dict], item_timeout: float = BATCH_ITEM_TIMEOUT,
+                   per_host: int = BATCH_PER_HOST) -> Iterator[Dict]:
+        """
+        Run many (tool, vm, params) directives concurrently and yield each
+        result as soon as it completes.
+        
+        - At most per_host directives run against one VM at a time; the
+          rest of that VM's queue starts as slots free up
+        - A directive running longer than item_timeout (measured from when
+          it actually starts) is reported as timed out; every tool also gets
+          item_timeout as its own exec / SFTP channel timeout
+        - A timed-out call keeps its host slot until it really returns; once
+          it has held the slot for another item_timeout, the host counts as
+          hung and its queued directives fail as timed out without starting
+        - Whole batch takes roughly as long as the slowest host
+        
+        Yields: {'index', 'tool', 'vm_ip', 'success', 'timed_out', 'elapsed', 'result'}
+        """
+        queues: Dict[str, deque] = {}
+        for index, directive in enumerate(directives):
+            tool, vm_ip, params = normalize_directive(directive)
+            params['timeout'] = min(params.get('timeout') or item_timeout, item_timeout)
+            queues.setdefault(vm_ip, deque()).append((index, tool, vm_ip, params))
+        
+        batch_start = time.time()
+        running = {}
+        abandoned = {}  # timed-out items still executing: future -> (vm_ip, timed out at); they keep their slot
+        inflight: Counter = Counter()
+        
+        def timed(clock, tool, vm_ip, params):
+            clock.append(time.time())  # the timeout runs from here, not from submit
+            return self.execute(tool, vm_ip, params)
+        
+        def launch(vm_ip):
+            queue = queues[vm_ip]
+            while queue and inflight[vm_ip] < per_host:
+                index, tool, _, params = queue.popleft()
+                clock = []
+                future = self._batch_executor.submit(timed, clock, tool, vm_ip, params)
+                running[future] = (index, tool, vm_ip, clock)
+                inflight[vm_ip] += 1
+        
+        for vm_ip in queues:
+            launch(vm_ip)
+        
+        # Keep going while results are due, or while a host's queue waits on an abandoned slot
+        while running or any(queues.values()):
+            deadlines = [clock[0] + item_timeout for _, _, _, clock in running.values() if clock]
+            deadlines += [since + item_timeout for vm_ip, since in abandoned.values() if queues[vm_ip]]
+            timeout = min(deadlines) - time.time() if deadlines else item_timeout
+            done, _ = wait(list(running) + list(abandoned), timeout=max(0.0, timeout),
+                           return_when=FIRST_COMPLETED)
+            now = time.time()
+            
+            for future in [f for f in done if f in abandoned]:
+                vm_ip, _ = abandoned.pop(future)
+                inflight[vm_ip] -= 1
+                launch(vm_ip)
+            
+            expired = [f for f, (_, _, _, clock) in running.items()
+                       if f not in done and clock and now - clock[0] >= item_timeout]
+            
+            for future in [f for f in done if f in running] + expired:
+                index, tool, vm_ip, clock = running.pop(future)
+                timed_out = future in expired
+                if timed_out:
+                    # The call cannot be interrupted - its slot frees when it really returns
+                    abandoned[future] = (vm_ip, now)
+                    result = {'success': False, 'error': f'Timed out after {item_timeout}s'}
                 else:
-                    raise ValueError(f"No authentication method for VM {vm_ip}")
+                    inflight[vm_ip] -= 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'success': False, 'error': str(e)}
                 
-                self.ssh_connections[vm_ip] = ssh
-            except Exception as e:
-                self._log_action('ssh_connect', vm_ip, 'connect', str(e), False)
-                raise
-        
-        return self.ssh_connections[vm_ip]
+                yield {
+                    'index': index,
+                    'tool': tool,
+                    'vm_ip': vm_ip,
+                    'success': bool(result.get('success')),
+                    'timed_out': timed_out,
+                    'elapsed': round(now - clock[0], 3),
+                    'result': result
+                }
+                launch(vm_ip)
+            
+            # A host still held by a timed-out call after another item_timeout is hung:
+            # fail its queue instead of stalling the batch until the call returns
+            hung = {vm_ip for vm_ip, since in abandoned.values() if queues[vm_ip] and now - since >= item_timeout}
+            for vm_ip in sorted(hung):
+                while queues[vm_ip]:
+                    index, tool, _, _ = queues[vm_ip].popleft()
+                    yield {
+                        'index': index,
+                        'tool': tool,
+                        'vm_ip': vm_ip,
+                        'success': False,
+                        'timed_out': True,
+                        'elapsed': round(now - batch_start, 3),
+                        'result': {'success': False,
+                                   'error': f'Not started: {vm_ip} is still busy with a call that timed out'}
+                    }
     
     # ========================================================================
     # FILE OPERATIONS
     # ========================================================================
     
     def read_file(self, vm_ip: str, file_path: str, offset: int = 0, 
-                  limit: Optional[int] = None) -> Dict:
+                  limit: Optional[int] = None, byte_offset: Optional[int] = None,
+                  max_bytes: Optional[int] = None, encoding: str = 'utf-8',
+                  compress: bool = False, timeout: Optional[float] = None) -> Dict:
         """
-        Read file from any VM
+        Read file from any VM (streamed over SFTP)
         
         Args:
             vm_ip: Target VM IP address
             file_path: Full path to file
             offset: Starting line number (0-indexed)
             limit: Maximum lines to read (None = all)
+            byte_offset: Read a byte range from here instead of lines
+                         (negative = from the end of the file)
+            max_bytes: Length of the byte range (None = to the end)
+            encoding: 'utf-8' (invalid bytes replaced) or 'base64'
+            compress: Transfer over a zlib-compressed SSH transport
+            timeout: Seconds to wait on any SFTP reply (None = no limit)
         
         Returns:
             {
                 'success': bool,
                 'content': str,
-                'lines': int,
-                'file_size': int
+                'lines': int,             # lines in content
+                'total_lines': int|None,  # lines in the file, when read to the end
+                'file_size': int,
+                'bytes_read': int,
+                'next_offset': int,       # byte offset to continue from
+                'eof': bool,
+                'truncated': bool         # stopped at READ_MAX_BYTES
             }
         """
         try:
-            ssh = self._get_ssh_connection(vm_ip)
-            
-            # Get file size first
-            stdin, stdout, stderr = ssh.exec_command(f'wc -l "{file_path}"')
-            total_lines = int(stdout.read().decode().split()[0])
+            if encoding not in FILE_ENCODINGS:
+                raise ValueError(f"Unsupported encoding: {encoding}")
             
-            # Read file content
-            if limit:
-                cmd = f'sed -n "{offset+1},{offset+limit}p" "{file_path}"'
-            else:
-                cmd = f'tail -n +{offset+1} "{file_path}"'
+            with self._sftp(vm_ip, compress, timeout) as sftp:
+                file_size = sftp.stat(file_path).st_size
+                with sftp.open(file_path, 'rb') as f:
+                    if byte_offset is not None or max_bytes is not None:
+                        data, start, total_lines = self._read_byte_range(f, file_size, byte_offset or 0, max_bytes)
+                    else:
+                        data, start, total_lines = self._read_line_range(f, file_size, offset, limit)
             
-            stdin, stdout, stderr = ssh.exec_command(cmd)
-            content = stdout.read().decode()
-            error = stderr.read().decode()
+            truncated = len(data) > READ_MAX_BYTES
+            data = data[:READ_MAX_BYTES]
+            next_offset = start + len(data)
+            if truncated:
+                total_lines = None
             
-            if error:
-                raise Exception(error)
+            if encoding == 'base64':
+                content = base64.b64encode(data).decode('ascii')
+            else:
+                content = data.decode('utf-8', errors='replace')
             
             result = {
                 'success': True,
                 'content': content,
-                'lines': total_lines,
-                'file_size': len(content)
+                'encoding': encoding,
+                'lines': data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0),
+                'total_lines': total_lines,
+                'file_size': file_size,
+                'bytes_read': len(data),
+                'next_offset': next_offset,
+                'eof': next_offset >= file_size,
+                'truncated': truncated
             }
             
-            self._log_action('read_file', vm_ip, file_path, f'Read {len(content)} bytes', True)
+            self._log_action('read_file', vm_ip, file_path, f'Read {len(data)} bytes', True)
             return result
             
         except Exception as e:
@@ -147,49 +475,111 @@ class MCPTools:
                 'content': ''
             }
     
+    @staticmethod
+    def _read_byte_range(f, file_size: int, byte_offset: int, max_bytes: Optional[int]) -> Tuple[bytes, int, None]:
+        """Seek straight to the range; readv pipelines the requests"""
+        start = max(0, file_size + byte_offset) if byte_offset < 0 else min(byte_offset, file_size)
+        length = file_size - start if max_bytes is None else min(max(0, max_bytes), file_size - start)
+        length = min(length, READ_MAX_BYTES + 1)
+        data = b''.join(f.readv([(start, length)])) if length else b''
+        return data, start, None
+    
+    @staticmethod
+    def _read_line_range(f, file_size: int, offset: int, limit: Optional[int]) -> Tuple[bytes, int, Optional[int]]:
+        """
+        Scan windows from the start: skip `offset` lines, keep `limit` lines.
+        Stops as soon as the range is complete, so the head of a large file
+        costs one window rather than the whole file.
+        """
+        end = offset + limit if limit is not None else None
+        line, kept, kept_size, start = 0, [], 0, None
+        position = 0
+        while position < file_size:
+            window = b''.join(f.readv([(position, min(SFTP_WINDOW, file_size - position))]))
+            if not window:
+                break
+            pos = 0
+            if line < offset:
+                pos, passed = _skip_lines(window, 0, offset - line)
+                line += passed
+            if line >= offset:
+                if start is None:
+                    start = position + pos
+                if end is None:
+                    stop = len(window)
+                    line += window.count(b'\n', pos)
+                else:
+                    stop, passed = _skip_lines(window, pos, end - line)
+                    line += passed
+                kept.append(window[pos:stop])
+                kept_size += stop - pos
+                if stop < len(window):
+                    break
+            position += len(window)
+            if (end is not None and line >= end) or kept_size > READ_MAX_BYTES:
+                break
+        
+        data = b''.join(kept)
+        start = file_size if start is None else start
+        # wc -l semantics: the newline count, known once the scan hit the end
+        total_lines = line if start + len(data) >= file_size else None
+        return data, start, total_lines
+    
     def write_file(self, vm_ip: str, file_path: str, content: str, 
-                   append: bool = False) -> Dict:
+                   append: bool = False, encoding: str = 'utf-8',
+                   compress: bool = False, timeout: Optional[float] = None) -> Dict:
         """
-        Write content to file on any VM
+        Write content to file on any VM (streamed over SFTP)
+        
+        Overwrites follow symlinks and replace the real target: a temporary
+        file next to it gets the old mode and owner and is renamed over it
+        (posix-rename), so readers never see a partial file. If that is not
+        possible - the directory is not writable, or the owner cannot be
+        restored (chown needs root) - the file is truncated and rewritten in
+        place like `echo > file` (atomic=False), keeping inode and owner.
+        Appends stream directly.
         
         Args:
             vm_ip: Target VM IP address
             file_path: Full path to file
-            content: Content to write
+            content: Content to write (written verbatim)
             append: If True, append instead of overwrite
+            encoding: 'utf-8' or 'base64' (content is base64 of the bytes)
+            compress: Transfer over a zlib-compressed SSH transport
+            timeout: Seconds to wait on any SFTP reply (None = no limit)
         
         Returns:
             {
                 'success': bool,
                 'bytes_written': int,
-                'file_path': str
+                'file_path': str,
+                'real_path': str,   # file written after following symlinks
+                'atomic': bool      # replaced by rename (False: in place / append)
             }
         """
         try:
-            ssh = self._get_ssh_connection(vm_ip)
+            if encoding not in FILE_ENCODINGS:
+                raise ValueError(f"Unsupported encoding: {encoding}")
+            data = base64.b64decode(content) if encoding == 'base64' else content.encode('utf-8')
             
-            # Escape special characters in content
-            safe_content = content.replace('"', '\\"').replace('$', '\\$')
-            
-            # Write using echo (safer than heredoc for SSH)
-            operator = '>>' if append else '>'
-            cmd = f'echo -e "{safe_content}" {operator} "{file_path}"'
-            
-            stdin, stdout, stderr = ssh.exec_command(cmd)
-            error = stderr.read().decode()
-            
-            if error:
-                raise Exception(error)
+            with self._sftp(vm_ip, compress, timeout) as sftp:
+                if append:
+                    self._write_stream(sftp, file_path, 'ab', data)
+                    real_path, atomic = file_path, False
+                else:
+                    real_path, atomic = self._replace_file(sftp, file_path, data)
             
             result = {
                 'success': True,
-                'bytes_written': len(content),
+                'bytes_written': len(data),
                 'file_path': file_path,
+                'real_path': real_path,
+                'atomic': atomic,
                 'mode': 'append' if append else 'overwrite'
             }
             
             self._log_action('write_file', vm_ip, file_path, 
-                           f'Wrote {len(content)} bytes', True)
+                           f'Wrote {len(data)} bytes', True)
             return result
             
         except Exception as e:
@@ -199,8 +589,58 @@ class MCPTools:
                 'error': str(e)
             }
     
+    @staticmethod
+    def _resolve_symlinks(sftp, path: str):
+        """Follow symlinks to the real file: (path, its attributes or None if it does not exist)"""
+        for _ in range(MAX_SYMLINK_HOPS):
+            try:
+                attrs = sftp.lstat(path)
+            except FileNotFoundError:
+                return path, None
+            if not stat.S_ISLNK(attrs.st_mode):
+                return path, attrs
+            path = posixpath.normpath(posixpath.join(posixpath.dirname(path), sftp.readlink(path)))
+        raise IOError(f"Too many levels of symbolic links: {path}")
+    
+    def _replace_file(self, sftp, file_path: str, data: bytes) -> Tuple[str, bool]:
+        """Overwrite the real file behind file_path: (real_path, replaced atomically)"""
+        real_path, attrs = self._resolve_symlinks(sftp, file_path)
+        directory, name = posixpath.split(real_path)
+        tmp_path = posixpath.join(directory, f'.{name}.shenron-{uuid.uuid4().hex[:8]}.tmp')
+        try:
+            self._write_stream(sftp, tmp_path, 'wb', data)
+            if attrs is not None:
+                sftp.chmod(tmp_path, stat.S_IMODE(attrs.st_mode))
+                sftp.chown(tmp_path, attrs.st_uid, attrs.st_gid)
+            sftp.posix_rename(tmp_path, real_path)
+            return real_path, True
+        except PermissionError:
+            # Directory not writable or owner not restorable: rewrite in place
+            self._remove_quietly(sftp, tmp_path)
+            self._write_stream(sftp, real_path, 'wb', data)
+            return real_path, False
+        except Exception:
+            self._remove_quietly(sftp, tmp_path)
+            raise
+    
+    @staticmethod
+    def _remove_quietly(sftp, path: str):
+        try:
+            sftp.remove(path)
+        except Exception:
+            pass
+    
+    @staticmethod
+    def _write_stream(sftp, path: str, mode: str, data: bytes):
+        """Pipelined writes (no per-request ack wait); close() collects the acks"""
+        with sftp.open(path, mode) as f:
+            f.set_pipelined(True)
+            view = memoryview(data)
+            for pos in range(0, len(data), SFTP_WINDOW):
+                f.write(view[pos:pos + SFTP_WINDOW])
+    
     def search_files(self, vm_ip: str, pattern: str, directory: str = '/',
-                     file_pattern: str = '*') -> Dict:
+                     file_pattern: str = '*', timeout: Optional[float] = None) -> Dict:
         """
         Search for files matching pattern
         
@@ -209,6 +649,7 @@ class MCPTools:
             pattern: Text pattern to search for (grep)
             directory: Directory to search in
             file_pattern: File name pattern (e.g., '*.py')
+            timeout: Seconds the search may take (None = no limit)
         
         Returns:
             {
@@ -218,13 +659,10 @@ class MCPTools:
             }
         """
         try:
-            ssh = self._get_ssh_connection(vm_ip)
-            
             # Use grep to search files
             cmd = f'grep -r -n "{pattern}" {directory} --include="{file_pattern}"'
             
-            stdin, stdout, stderr = ssh.exec_command(cmd)
-            output = stdout.read().decode()
+            _, output, _ = self._exec(vm_ip, cmd, timeout=timeout)
             
             matches = []
             for line in output.split('\n'):
@@ -255,13 +693,14 @@ class MCPTools:
                 'matches': []
             }
     
-    def list_directory(self, vm_ip: str, directory: str) -> Dict:
+    def list_directory(self, vm_ip: str, directory: str, timeout: Optional[float] = None) -> Dict:
         """
         List files and directories
         
         Args:
             vm_ip: Target VM IP address
             directory: Directory path
+            timeout: Seconds the listing may take (None = no limit)
         
         Returns:
             {
@@ -271,11 +710,8 @@ class MCPTools:
             }
         """
         try:
-            ssh = self._get_ssh_connection(vm_ip)
-            
             # List files
-            stdin, stdout, stderr = ssh.exec_command(f'ls -la "{directory}"')
-            output = stdout.read().decode()
+            _, output, _ = self._exec(vm_ip, f'ls -la "{directory}"', timeout=timeout)
             
             files = []
             directories = []
@@ -342,17 +778,11 @@ class MCPTools:
             }
         """
         try:
-            ssh = self._get_ssh_connection(vm_ip)
-            
             if sudo:
                 command = f'sudo {command}'
             
             start_time = datetime.now()
-            stdin, stdout, stderr = ssh.exec_command(command, timeout=timeout)
-            
-            stdout_text = stdout.read().decode()
-            stderr_text = stderr.read().decode()
-            exit_code = stdout.channel.recv_exit_status()
+            exit_code, stdout_text, stderr_text = self._exec(vm_ip, command, timeout=timeout)
             
             execution_time = (datetime.now() - start_time).total_seconds()
             
@@ -379,9 +809,10 @@ class MCPTools:
                 'exit_code': -1
             }
     
-    def get_system_info(self, vm_ip: str) -> Dict:
+    def get_system_info(self, vm_ip: str, max_age: float = SYSTEM_INFO_TTL,
+                        timeout: float = SYSTEM_INFO_TIMEOUT) -> Dict:
         """
-        Get system information from VM
+        Get system information from VM (one remote exec, cached for max_age seconds)
         
         Returns:
             {
@@ -389,55 +820,206 @@ class MCPTools:
                 'cpu_usage': float,
                 'memory_usage': float,
                 'disk_usage': float,
-                'uptime': str
+                'uptime': str,
+                'uptime_seconds': int,
+                'load_average': [float, float, float],
+                'cached': bool,
+                'age': float
             }
         """
+        with self._cache_lock:
+            vm_lock = self._system_info_locks.setdefault(vm_ip, threading.Lock())
+        
+        # Concurrent callers for the same VM wait for one probe instead of each running it
+        with vm_lock:
+            cached = self._system_info_cache.get(vm_ip)
+            if cached and time.time() - cached[0] <= max_age:
+                return {**cached[1], 'cached': True, 'age': round(time.time() - cached[0], 2)}
+            
+            try:
+                exit_code, output, error = self._exec(vm_ip, SYSTEM_INFO_PROBE, timeout=timeout)
+                if exit_code != 0:
+                    raise Exception(error.strip() or f'Probe exited with {exit_code}')
+                
+                info = json.loads(output)
+                result = {
+                    'success': True,
+                    **info,
+                    'uptime': format_uptime(info['uptime_seconds'])
+                }
+                self._system_info_cache[vm_ip] = (time.time(), result)
+                self._log_action('get_system_info', vm_ip, 'probe',
+                               f"CPU {info['cpu_usage']}%, RAM {info['memory_usage']}%", True)
+                return {**result, 'cached': False, 'age': 0.0}
+                
+            except Exception as e:
+                self._log_action('get_system_info', vm_ip, 'probe', str(e), False)
+                return {
+                    'success': False,
+                    'error': str(e)
+                }
+    
+    # ========================================================================
+    # LOG TAIL
+    # ========================================================================
+    
+    def tail_log(self, vm_ip: str, file_path: str, pattern: Optional[str] = None,
+                 level: Optional[str] = None, lines: int = TAIL_DEFAULT_LINES,
+                 ignore_case: bool = False, cursor: Optional[str] = None,
+                 from_start: bool = False, reset: bool = False,
+                 max_bytes: int = TAIL_MAX_BYTES, session: Optional[str] = None,
+                 timeout: Optional[float] = None) -> Dict:
+        """
+        New lines of a log since the previous call, filtered on the VM
+        
+        A call without a cursor returns the newest `lines` matches; pass
+        the returned `cursor` back to get only what was appended since.
+        With a session (e.g. a quest id) the cursor is also remembered per
+        session, VM and file, so repeating the call continues on its own.
+        The MCPTools instance is shared, so nothing is remembered without one.
+        
+        Args:
+            vm_ip: Target VM IP address
+            file_path: Full path to the log
+            pattern: awk/POSIX extended regex lines must match
+            level: Minimum severity (debug, info, notice, warning, error, critical)
+            lines: Newest matching lines to return (older matches are counted only)
+            ignore_case: Case-insensitive pattern
+            cursor: Continue from this cursor instead of the remembered one
+            from_start: Scan from the beginning of the file
+            reset: Forget the session's remembered offset (tail like a first call)
+            max_bytes: Log bytes scanned per call
+            session: Caller identity the offset is remembered under
+            timeout: Seconds the remote scan may take (None = no limit)
+        
+        Returns:
+            {
+                'success': bool,
+                'content': str,      # matching lines, oldest first
+                'matched': int,      # matches in the scanned range
+                'returned': int,
+                'bytes_scanned': int,
+                'file_size': int,
+                'cursor': str,       # "inode:offset"
+                'reset': str|None,   # start, rotated or truncated
+                'more': bool         # unscanned bytes left (call again)
+            }
+        """
+        key = (str(session), vm_ip, file_path) if session else None
         try:
-            # Get hostname
-            hostname_result = self.run_command(vm_ip, 'hostname')
-            hostname = hostname_result['stdout'].strip()
+            lines = max(1, int(lines))
+            max_bytes = max(1, int(max_bytes))
+            stored = None
+            if key and not reset:
+                with self._cache_lock:
+                    stored = self._tail_cursors.get(key)
+            if from_start:
+                inode, offset = '', 0
+            elif cursor:
+                inode, _, offset = str(cursor).partition(':')
+                offset = int(offset)
+            elif stored:
+                inode, offset = stored
+            else:
+                inode, offset = '', -1
             
-            # Get CPU usage (Linux)
-            cpu_result = self.run_command(vm_ip, "top -bn1 | grep 'Cpu(s)' | awk '{print $2}'")
-            cpu_usage = float(cpu_result['stdout'].strip().replace('%', ''))
+            env = {
+                'F': file_path,
+                'OFF': offset,
+                'INODE': inode,
+                'MAX': max_bytes,
+                'KEEP': lines,
+                'RE': pattern or '',
+                'LEVEL_RE': level_pattern(level) if level else '',
+                'ICASE': 1 if ignore_case else 0
+            }
+            command = ' '.join(f'{name}={shlex.quote(str(value))}' for name, value in env.items())
+            exit_code, stdout, stderr = self._exec(vm_ip, f'{command} {TAIL_SCRIPT}', timeout=timeout)
             
-            # Get memory usage
-            mem_result = self.run_command(vm_ip, "free | grep Mem | awk '{print ($3/$2) * 100.0}'")
-            memory_usage = float(mem_result['stdout'].strip())
+            output = stdout.split('\n')
+            trailer = next((line for line in reversed(output) if line.startswith('\036')), None)
+            if exit_code != 0 or trailer is None:
+                raise Exception(stderr.strip() or f'tail failed (exit {exit_code})')
             
-            # Get disk usage
-            disk_result = self.run_command(vm_ip, "df -h / | tail -1 | awk '{print $5}'")
-            disk_usage = float(disk_result['stdout'].strip().replace('%', ''))
+            header = output[0].split()
+            inode, file_size, start = header[0], int(header[1]), int(header[2])
+            reset_reason = header[3] if len(header) > 3 else None
+            consumed, matched = trailer[1:].split()
+            consumed, matched = int(consumed), int(matched)
+            matches = output[1:output.index(trailer)]
             
-            # Get uptime
-            uptime_result = self.run_command(vm_ip, 'uptime')
-            uptime = uptime_result['stdout'].strip()
+            scanned = min(file_size - start, max_bytes + (1 if reset_reason == 'start' and start else 0))
+            if consumed == 0 and scanned >= max_bytes:
+                # One line longer than the scan window: step over it
+                consumed = scanned
+            next_offset = start + consumed
             
-            return {
+            if key:
+                with self._cache_lock:
+                    self._tail_cursors[key] = (inode, next_offset)
+                    self._tail_cursors.move_to_end(key)
+                    while len(self._tail_cursors) > TAIL_SESSION_CURSORS:
+                        self._tail_cursors.popitem(last=False)
+            
+            result = {
                 'success': True,
-                'hostname': hostname,
-                'cpu_usage': cpu_usage,
-                'memory_usage': memory_usage,
-                'disk_usage': disk_usage,
-                'uptime': uptime
+                'file_path': file_path,
+                'content': '\n'.join(matches),
+                'matched': matched,
+                'returned': len(matches),
+                'bytes_scanned': consumed,
+                'file_size': file_size,
+                'cursor': f'{inode}:{next_offset}',
+                'reset': reset_reason,
+                'more': next_offset < file_size and scanned >= max_bytes
             }
             
+            self._log_action('tail_log', vm_ip, file_path,
+                           f'{len(matches)} lines ({matched} matched, {consumed} bytes scanned)', True)
+            return result
+            
         except Exception as e:
+            self._log_action('tail_log', vm_ip, file_path, str(e), False)
             return {
                 'success': False,
-                'error': str(e)
+                'error': str(e),
+                'content': ''
             }
     
+    def follow_log(self, vm_ip: str, file_path: str, duration: float = 60,
+                   interval: float = TAIL_FOLLOW_INTERVAL, cancel_checker=None,
+                   **filters) -> Iterator[Dict]:
+        """
+        Poll tail_log for `duration` seconds, yielding every poll's result
+        (empty ones included, so streams can send keepalives). Stops early
+        on a failure or when cancel_checker() returns True.
+        """
+        deadline = time.time() + min(duration, TAIL_FOLLOW_MAX)
+        result = self.tail_log(vm_ip, file_path, **filters)
+        filters.pop('reset', None)
+        filters.pop('from_start', None)
+        while True:
+            yield result
+            if not result['success'] or time.time() >= deadline:
+                return
+            if not result['more']:
+                time.sleep(max(0.0, min(interval, deadline - time.time())))
+            if cancel_checker and cancel_checker():
+                return
+            filters['cursor'] = result['cursor']
+            result = self.tail_log(vm_ip, file_path, **filters)
+    
     def close_all_connections(self):
-        """Close all SSH connections"""
-        for vm_ip, ssh in self.ssh_connections.items():
+        """Close the pooled SSH connections this instance used"""
+        for vm_ip, target in self.ssh_targets.items():
             try:
-                ssh.close()
+                self.ssh_pool.close(target)
+                self.ssh_pool.close({**target, 'compress': True})
                 self._log_action('ssh_close', vm_ip, 'close', 'Connection closed', True)
             except:
                 pass
         
-        self.ssh_connections = {}
+        self.ssh_targets = {}
 
 
 # ============================================================================
@@ -452,7 +1034,8 @@ class ToolPermissions:
         'read_file',
         'list_directory',
         'search_files',
-        'get_system_info'
+        'get_system_info',
+        'tail_log'
     ]
     
     # MODERATE: Requires Agent Mode with 2FA
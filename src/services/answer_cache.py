@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+SHENRON Answer Cache - exact + semantic cache in front of grant_wish
+Keyed on normalized query + fingerprint of the retrieved RAG chunk IDs
++ the request options that change the answer (rerank, speculation, ...)
+"""
+
+import copy
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Per power mode policy:
+#   ttl                   seconds an answer stays servable
+#   similarity_threshold  cosine similarity for a semantic hit (None = exact only)
+CACHE_POLICIES: Dict[str, Dict[str, Any]] = {
+    "lightning": {"enabled": True, "ttl": 600, "similarity_threshold": 0.97},
+    "council": {"enabled": True, "ttl": 300, "similarity_threshold": 0.95},
+    # Ultra Instinct is the "maximum accuracy" mode - always consult the council
+    "ultra": {"enabled": False, "ttl": 0, "similarity_threshold": None},
+}
+DEFAULT_MAX_ENTRIES = 256
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    normalized = re.sub(r"\s+", " ", query.strip().lower())
+    return normalized.rstrip("?!. ")
+
+
+def context_fingerprint(chunk_ids: Iterable[str]) -> str:
+    """Order-independent hash of the RAG chunks a wish was answered from."""
+    joined = "\n".join(sorted(chunk_ids))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_variant(**options: Any) -> str:
+    """Stable key part for the request options an answer was produced with."""
+    return "|".join(f"{name}={options[name]}" for name in sorted(options))
+
+
+def has_directives(result: Dict[str, Any]) -> bool:
+    """True if the answer carries tool directives / actions (agent or MCP follow-up)."""
+    return bool(result.get("tool_directives") or result.get("pending_actions"))
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+class AnswerCache:
+    """
+    Thread-safe LRU cache of post-processed wish results.
+
+    Lookups try an exact key first, then (if the power mode allows it)
+    the closest cached query with the same RAG fingerprint and variant by
+    embedding similarity. Expired entries are dropped lazily; the least
+    recently used entry is evicted once max_entries is reached.
+
+    Answers carrying executable directives are never stored: they act on
+    the state of a specific VM at a specific time, and a near-match query
+    ("restart vm150" vs "restart vm151") must not replay them.
+    """
+
+    def __init__(self, embed_fn: Optional[Callable[[List[str]], Any]] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 policies: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries
+        self.policies = copy.deepcopy(policies or CACHE_POLICIES)
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def policy(self, power_mode: str) -> Dict[str, Any]:
+        return self.policies.get(power_mode) or {"enabled": False, "ttl": 0, "similarity_threshold": None}
+
+    @staticmethod
+    def make_key(power_mode: str, normalized_query: str, fingerprint: str, variant: str = "") -> str:
+        raw = f"{power_mode}|{fingerprint}|{variant}|{normalized_query}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, power_mode: str, counter: str):
+        mode_counters = self._counters.setdefault(
+            power_mode, {"hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0,
+                         "skipped_directives": 0}
+        )
+        mode_counters[counter] += 1
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        if self.embed_fn is None:
+            return None
+        try:
+            return [float(x) for x in self.embed_fn([text])[0]]
+        except Exception:
+            return None
+
+    def _purge_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if entry["expires_at"] <= now]
+        for key in expired:
+            self._count(self._entries[key]["power_mode"], "expired")
+            del self._entries[key]
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, power_mode: str, query: str, fingerprint: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        """Return a deep copy of a cached result (with a "cache" block) or None."""
+        policy = self.policy(power_mode)
+        if not policy.get("enabled"):
+            return None
+
+        normalized = normalize_query(query)
+        key = self.make_key(power_mode, normalized, fingerprint, variant)
+        threshold = policy.get("similarity_threshold")
+        now = time.time()
+
+        with self._lock:
+            self._purge_expired(now)
+            if key in self._entries:
+                return self._hit(power_mode, key, "exact", 1.0, now)
+            semantic_possible = threshold is not None and any(
+                e["power_mode"] == power_mode and e["fingerprint"] == fingerprint and e["variant"] == variant
+                and e["embedding"]
+                for e in self._entries.values()
+            )
+            if not semantic_possible:
+                self._count(power_mode, "misses")
+                return None
+
+        # Encoder forward pass happens outside the lock. The raw query is
+        # embedded (the model is uncased) so a shared embedding cache can
+        # reuse the vector already computed for retrieval.
+        query_embedding = self._embed(query)
+
+        with self._lock:
+            best_key, best_score = None, -1.0
+            if query_embedding:
+                for candidate_key, candidate in self._entries.items():
+                    if (candidate["power_mode"] != power_mode or candidate["fingerprint"] != fingerprint
+                            or candidate["variant"] != variant or not candidate["embedding"]):
+                        continue
+                    score = _cosine(query_embedding, candidate["embedding"])
+                    if score > best_score:
+                        best_key, best_score = candidate_key, score
+
+            if best_key is None or best_score < threshold:
+                self._count(power_mode, "misses")
+                return None
+            return self._hit(power_mode, best_key, "semantic", best_score, now)
+
+    def _hit(self, power_mode: str, key: str, match: str, similarity: float, now: float) -> Dict[str, Any]:
+        """Record a hit and return a private copy of the entry (caller holds the lock)."""
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        entry["hits"] += 1
+        self._count(power_mode, "hits" if match == "exact" else "semantic_hits")
+
+        result = copy.deepcopy(entry["result"])
+        result["cache"] = {
+            "hit": True,
+            "match": match,
+            "similarity": round(similarity, 4),
+            "age_seconds": round(now - entry["stored_at"], 1),
+            "cached_query": entry["query"],
+            "original_time": entry["result"].get("total_time")
+        }
+        return result
+
+    def put(self, power_mode: str, query: str, fingerprint: str, result: Dict[str, Any], variant: str = ""):
+        """Store a result if the power mode allows caching and it carries no directives."""
+        policy = self.policy(power_mode)
+        if not policy.get("enabled") or policy.get("ttl", 0) <= 0:
+            return
+        if has_directives(result):
+            with self._lock:
+                self._count(power_mode, "skipped_directives")
+            return
+
+        normalized = normalize_query(query)
+        key = self.make_key(power_mode, normalized, fingerprint, variant)
+        embedding = self._embed(query) if policy.get("similarity_threshold") is not None else None
+        now = time.time()
+
+        with self._lock:
+            self._entries[key] = {
+                "power_mode": power_mode,
+                "query": query,
+                "fingerprint": fingerprint,
+                "variant": variant,
+                "embedding": embedding,
+                "result": copy.deepcopy(result),
+                "stored_at": now,
+                "expires_at": now + policy["ttl"],
+                "hits": 0
+            }
+            self._entries.move_to_end(key)
+            self._count(power_mode, "stores")
+
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._count(evicted["power_mode"], "evictions")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._purge_expired(time.time())
+            per_mode = copy.deepcopy(self._counters)
+            size = len(self._entries)
+
+        totals = {"hits": 0, "semantic_hits": 0, "misses": 0}
+        for counters in per_mode.values():
+            for name in totals:
+                totals[name] += counters.get(name, 0)
+        lookups = totals["hits"] + totals["semantic_hits"] + totals["misses"]
+
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "semantic_enabled": self.embed_fn is not None,
+            **totals,
+            "hit_rate": round((totals["hits"] + totals["semantic_hits"]) / lookups, 4) if lookups else 0.0,
+            "by_power_mode": per_mode,
+            "policies": self.policies
+        }
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+SHENRON Context Budget - fit prompts into each model's context window
+Tokenizer-aware when a matching tokenizer is available locally, estimated otherwise
+"""
+
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from transformers import AutoTokenizer
+except ImportError:
+    AutoTokenizer = None
+
+# Hugging Face tokenizers for the GGUF families served by LM Studio, matched
+# by substring of the lower-cased model id. Only loaded from the local HF
+# cache (never downloaded on the request path); unknown -> estimate.
+TOKENIZER_REPOS = {
+    "deepseek-coder-v2": "deepseek-ai/DeepSeek-Coder-V2-Lite-Instruct",
+    "llama-3.2": "meta-llama/Llama-3.2-3B-Instruct",
+    "qwen2.5-coder": "Qwen/Qwen2.5-Coder-7B-Instruct",
+    "mistral-7b": "mistralai/Mistral-7B-Instruct-v0.3",
+    "phi-3": "microsoft/Phi-3-mini-128k-instruct",
+}
+CHARS_PER_TOKEN = 3.0  # conservative: code, paths and IPs tokenize densely
+MESSAGE_OVERHEAD_TOKENS = 8  # chat template tokens per message
+MIN_TRUNCATED_TOKENS = 48  # a partial item shorter than this is dropped instead
+TRUNCATION_MARK = " …[trimmed to fit context]"
+
+
+class TokenCounter:
+    """Per-model token counting and truncation with a cached tokenizer per family."""
+
+    def __init__(self, repos: Optional[Dict[str, str]] = None):
+        self.repos = dict(TOKENIZER_REPOS if repos is None else repos)
+        self._tokenizers: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def tokenizer(self, model: str):
+        key = next((family for family in self.repos if family in (model or "").lower()), None)
+        if key is None or AutoTokenizer is None:
+            return None
+        with self._lock:
+            if key not in self._tokenizers:
+                try:
+                    self._tokenizers[key] = AutoTokenizer.from_pretrained(self.repos[key], local_files_only=True)
+                except Exception:
+                    self._tokenizers[key] = False
+            return self._tokenizers[key] or None
+
+    def method(self, model: str) -> str:
+        return "tokenizer" if self.tokenizer(model) is not None else "estimate"
+
+    def count(self, model: str, text: str) -> int:
+        if not text:
+            return 0
+        return _count_cached(self, model, text)
+
+    def _count(self, model: str, text: str) -> int:
+        tokenizer = self.tokenizer(model)
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        return int(len(text) / CHARS_PER_TOKEN) + 1
+
+    def truncate(self, model: str, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens (including the truncation mark)."""
+        budget = max_tokens - self.count(model, TRUNCATION_MARK)
+        if budget <= 0:
+            return ""
+        tokenizer = self.tokenizer(model)
+        if tokenizer is not None:
+            ids = tokenizer.encode(text, add_special_tokens=False)
+            if len(ids) <= max_tokens:
+                return text
+            return tokenizer.decode(ids[:budget]) + TRUNCATION_MARK
+        if self.count(model, text) <= max_tokens:
+            return text
+        return text[:int(budget * CHARS_PER_TOKEN)] + TRUNCATION_MARK
+
+
+@lru_cache(maxsize=2048)
+def _count_cached(counter: TokenCounter, model: str, text: str) -> int:
+    # Persona prompts and answers are counted repeatedly; strings hash fast
+    return counter._count(model, text)
+
+
+_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    global _counter
+    if _counter is None:
+        _counter = TokenCounter()
+    return _counter
+
+
+# ----------------------------------------------------------------------
+# Allocation
+# ----------------------------------------------------------------------
+
+def fit_ranked(counter: TokenCounter, model: str, items: List[str], budget: int) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Keep items (best first) while they fit; the first one that does not fit
+    is truncated to the remaining budget, everything ranked below is dropped.
+    """
+    kept: List[str] = []
+    used = truncated = 0
+    for item in items:
+        tokens = counter.count(model, item)
+        if used + tokens <= budget:
+            kept.append(item)
+            used += tokens
+            continue
+        remaining = budget - used
+        if remaining >= MIN_TRUNCATED_TOKENS:
+            kept.append(counter.truncate(model, item, remaining))
+            used += counter.count(model, kept[-1])
+            truncated += 1
+        break
+    return kept, {"kept": len(kept), "dropped": len(items) - len(kept), "truncated": truncated, "tokens": used}
+
+
+def fit_fair(counter: TokenCounter, model: str, items: List[str], budget: int) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Share the budget between all items (water-filling): short items are kept
+    whole and the long ones are truncated to an equal share of the rest.
+    """
+    sizes = [counter.count(model, item) for item in items]
+    if sum(sizes) <= budget:
+        return list(items), {"kept": len(items), "dropped": 0, "truncated": 0, "tokens": sum(sizes)}
+
+    shares = [0] * len(items)
+    open_items = set(range(len(items)))
+    remaining = budget
+    while open_items:
+        share = remaining // len(open_items)
+        small = {i for i in open_items if sizes[i] <= share}
+        if not small:
+            for i in open_items:
+                shares[i] = share
+            break
+        for i in small:
+            shares[i] = sizes[i]
+            remaining -= sizes[i]
+        open_items -= small
+
+    fitted, truncated = [], 0
+    for item, size, share in zip(items, sizes, shares):
+        if size <= share:
+            fitted.append(item)
+        elif share >= MIN_TRUNCATED_TOKENS:
+            fitted.append(counter.truncate(model, item, share))
+            truncated += 1
+        else:
+            fitted.append("")
+    kept = [item for item in fitted if item]
+    return fitted, {
+        "kept": len(kept),
+        "dropped": len(items) - len(kept),
+        "truncated": truncated,
+        "tokens": sum(counter.count(model, item) for item in fitted)
+    }
+
+
+def plan_prompt(model: str, context_length: int, max_tokens: int, fixed: Dict[str, str],
+                ranked: Optional[List[str]] = None, shared: Optional[List[str]] = None,
+                counter: Optional[TokenCounter] = None) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Fit one call into context_length - max_tokens.
+
+    fixed parts (persona, question, instructions) are always sent; then
+    either ranked items (RAG chunks, best first - lowest ranked dropped
+    first) or shared items (warrior answers - trimmed evenly) fill what is
+    left. Returns the items to send and a token report for the result.
+    """
+    counter = counter or get_token_counter()
+    window = context_length - max_tokens
+    fixed_tokens = {name: counter.count(model, text) for name, text in fixed.items()}
+    overhead = MESSAGE_OVERHEAD_TOKENS * 2
+    available = max(0, window - sum(fixed_tokens.values()) - overhead)
+
+    items = ranked if ranked is not None else (shared or [])
+    if ranked is not None:
+        fitted, stats = fit_ranked(counter, model, items, available)
+    else:
+        fitted, stats = fit_fair(counter, model, items, available)
+
+    total = sum(fixed_tokens.values()) + overhead + stats["tokens"]
+    return fitted, {
+        "model": model,
+        "counter": counter.method(model),
+        "context_length": context_length,
+        "max_tokens": max_tokens,
+        "prompt_tokens": total,
+        "tokens": {**fixed_tokens, "items": stats["tokens"]},
+        "items": {"total": len(items), "kept": stats["kept"], "dropped": stats["dropped"],
+                  "truncated": stats["truncated"]},
+        "over_budget": total > window
+    }
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+SHENRON Embedding Service - one embedding model per process + query embedding LRU
+Shared by the orchestrator (retrieval, answer cache), the API and ingestion
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    from chromadb.utils import embedding_functions
+except ImportError:
+    embedding_functions = None
+
+DEFAULT_QUERY_CACHE_SIZE = 1024
+
+
+class EmbeddingService:
+    """
+    Lazily loaded SentenceTransformer (via Chroma's embedding function, so
+    vectors match what the collection was built with) plus a thread-safe
+    LRU of query embeddings keyed on a hash of the exact text.
+
+    Instances are callable with a list of texts, so one can be passed
+    anywhere an embed_fn is expected (e.g. AnswerCache).
+    """
+
+    def __init__(self, model_name: str, cache_size: int = DEFAULT_QUERY_CACHE_SIZE):
+        self.model_name = model_name
+        self.cache_size = cache_size
+
+        self._function = None
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "encode_calls": 0, "encode_ms": 0.0}
+
+    @property
+    def embedding_function(self):
+        """The underlying Chroma embedding function (loads the model once)."""
+        if self._function is None:
+            with self._load_lock:
+                if self._function is None:
+                    if embedding_functions is None:
+                        raise RuntimeError("chromadb is not installed")
+                    self._function = embedding_functions.SentenceTransformerEmbeddingFunction(
+                        model_name=self.model_name
+                    )
+        return self._function
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed texts without caching (ingestion / one-off batches)."""
+        if not texts:
+            return []
+        start = time.perf_counter()
+        vectors = self.embedding_function(list(texts))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.stats["encode_calls"] += 1
+            self.stats["encode_ms"] += elapsed_ms
+        return [[float(x) for x in vector] for vector in vectors]
+
+    def embed_queries(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed query texts, running the encoder only for texts not cached yet."""
+        keys = [self._key(text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, str] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    results[i] = cached
+                    self.stats["hits"] += 1
+                else:
+                    missing.setdefault(key, texts[i])
+                    self.stats["misses"] += 1
+
+        # Encoder forward pass happens outside the lock
+        if missing:
+            vectors = self.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                for key, vector in computed.items():
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    results[i] = computed[key]
+
+        return results  # type: ignore[return-value]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def __call__(self, input: Sequence[str]) -> List[List[float]]:
+        return self.embed_queries(input)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            size = len(self._cache)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "model": self.model_name,
+            "loaded": self._function is not None,
+            "cached_queries": size,
+            "cache_size": self.cache_size,
+            **stats,
+            "encode_ms": round(stats["encode_ms"], 2),
+            "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+
+
+_services: Dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str, cache_size: int = DEFAULT_QUERY_CACHE_SIZE) -> EmbeddingService:
+    """Process-wide EmbeddingService for model_name (created on first use)."""
+    with _services_lock:
+        service = _services.get(model_name)
+        if service is None:
+            service = EmbeddingService(model_name, cache_size=cache_size)
+            _services[model_name] = service
+        return service
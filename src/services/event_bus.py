@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+SHENRON Event Bus - in-process publish/subscribe channel for job progress
+Subscribers block on a per-topic condition; no timer threads, no polling
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_HISTORY = 200  # events kept per topic for late subscribers
+DEFAULT_RETENTION = 3600  # seconds a closed/idle topic is kept
+
+
+class _Topic:
+    def __init__(self, lock: threading.Lock, history: int):
+        self.cond = threading.Condition(lock)
+        self.events: "deque[Dict[str, Any]]" = deque(maxlen=history)
+        self.last_seq = 0
+        self.closed = False
+        self.waiters = 0
+        self.touched_at = time.time()
+
+
+class EventBus:
+    """
+    Topics are job IDs. Each published event carries a monotonically
+    increasing "seq" (the publisher's own seq is kept if present, so it
+    can match a persisted event log); consumers pass the last seq they
+    saw and receive only newer events.
+
+    - wait(): long-poll - returns as soon as anything newer exists
+    - subscribe(): generator for SSE - yields events, None on keepalive
+    - close(): marks the topic finished; subscribers drain and stop
+    """
+
+    def __init__(self, history: int = DEFAULT_HISTORY, retention: float = DEFAULT_RETENTION):
+        self.history = history
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._topics: Dict[str, _Topic] = {}
+        self.stats = {"published": 0, "topics_removed": 0}
+
+    # ------------------------------------------------------------------
+    # Topics (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _topic(self, name: str) -> _Topic:
+        topic = self._topics.get(name)
+        if topic is None:
+            self._prune()
+            topic = self._topics[name] = _Topic(self._lock, self.history)
+        topic.touched_at = time.time()
+        return topic
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        stale = [name for name, topic in self._topics.items()
+                 if topic.touched_at < cutoff and not topic.waiters]
+        for name in stale:
+            del self._topics[name]
+        self.stats["topics_removed"] += len(stale)
+
+    def _newer(self, topic: _Topic, after: int) -> List[Dict[str, Any]]:
+        return [event for event in topic.events if event["seq"] > after]
+
+    # ------------------------------------------------------------------
+    # Publish
+    # ------------------------------------------------------------------
+
+    def publish(self, name: str, event: Dict[str, Any]) -> int:
+        with self._lock:
+            topic = self._topic(name)
+            seq = event.get("seq") or topic.last_seq + 1
+            topic.last_seq = max(topic.last_seq, seq)
+            topic.events.append({**event, "seq": seq})
+            self.stats["published"] += 1
+            topic.cond.notify_all()
+            return seq
+
+    def close(self, name: str):
+        with self._lock:
+            topic = self._topic(name)
+            topic.closed = True
+            topic.cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Consume
+    # ------------------------------------------------------------------
+
+    def wait(self, name: str, after: int = 0, timeout: float = 25.0) -> Tuple[List[Dict[str, Any]], bool]:
+        """Block until events newer than `after` exist (or close/timeout); returns (events, closed)."""
+        with self._lock:
+            topic = self._topic(name)
+            topic.waiters += 1
+            try:
+                topic.cond.wait_for(lambda: topic.last_seq > after or topic.closed, timeout=timeout)
+                return self._newer(topic, after), topic.closed
+            finally:
+                topic.waiters -= 1
+
+    def subscribe(self, name: str, after: int = 0,
+                  keepalive: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """Yield events newer than `after` as they arrive; yields None every `keepalive` idle seconds."""
+        while True:
+            events, closed = self.wait(name, after, timeout=keepalive)
+            if not events:
+                if closed:
+                    return
+                yield None
+                continue
+            for event in events:
+                after = event["seq"]
+                yield event
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "open_topics": sum(1 for topic in self._topics.values() if not topic.closed),
+                "subscribers": sum(topic.waiters for topic in self._topics.values()),
+                **self.stats
+            }
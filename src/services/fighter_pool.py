@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+SHENRON Fighter Pool - Long-lived event loop for warrior consultations
+Owned by ShenronOrchestrator and shared by every wish it grants
+"""
+
+import asyncio
+import atexit
+import threading
+import time
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from lm_studio_client import AsyncLMStudioClient
+from lm_backends import BackendRegistry
+
+HEALTH_CHECK_TIMEOUT = 5  # seconds
+BACKEND_REFRESH_INTERVAL = 60  # seconds between /models polls (routing + scheduler warmth)
+CANCEL_POLL_INTERVAL = 0.5  # seconds
+
+
+class FighterPool:
+    """
+    Background asyncio loop + pooled LM Studio client.
+
+    Fighter calls are I/O-bound, so all warriors of all wishes are fanned
+    out as coroutines on one loop instead of one process per fighter.
+
+    - The loop thread and HTTP sessions live as long as the orchestrator
+    - A bounded number of wishes may fan out at the same time
+    - Blocking callers can cancel a running wish via cancel_checker
+    - Generations are routed across the configured LM backends; each host
+      has its own LMStudioScheduler (per-model slots, priority by power mode)
+    - Backends are refreshed (served models, warm models) when the loop
+      starts and every refresh_interval seconds after that
+    - Shutdown is idempotent and registered with atexit
+    """
+
+    def __init__(self, base_url: str, max_connections: int = 8,
+                 max_concurrent_wishes: int = 2, model_slots: Optional[Dict[str, int]] = None,
+                 default_model_slots: int = 1, max_active_generations: int = 4,
+                 backends: Optional[List[Dict[str, Any]]] = None,
+                 refresh_interval: float = BACKEND_REFRESH_INTERVAL):
+        self.base_url = base_url
+        self.refresh_interval = refresh_interval
+        self.max_concurrent_wishes = max_concurrent_wishes
+        self.backends = BackendRegistry.from_config(
+            backends or [{"name": "primary", "url": base_url}],
+            model_slots=model_slots,
+            default_slots=default_model_slots,
+            max_active=max_active_generations
+        )
+        self.client = AsyncLMStudioClient(base_url, max_connections=max_connections,
+                                          backends=self.backends)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._refresher = None  # concurrent Future of _refresh_backends()
+        self._lifecycle = threading.Lock()  # guards loop creation/teardown
+        self._lock = threading.Lock()  # guards counters and stats
+        self._wish_slots = threading.BoundedSemaphore(max_concurrent_wishes)
+        self._closed = False
+
+        self.stats = {
+            "started_at": None,
+            "calls_submitted": 0,
+            "calls_cancelled": 0,
+            "calls_failed": 0,
+            "wishes_waiting": 0,
+            "wishes_active": 0,
+        }
+
+        atexit.register(self.shutdown)
+        self.start()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Start the background loop thread (no-op if already running)."""
+        with self._lifecycle:
+            if self._closed:
+                raise RuntimeError("FighterPool has been shut down")
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=self._run_loop, args=(loop,),
+                    name="shenron-fighter-loop", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+                self._refresher = asyncio.run_coroutine_threadsafe(self._refresh_backends(), loop)
+                with self._lock:
+                    self.stats["started_at"] = time.time()
+            return self._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    async def _refresh_backends(self):
+        """Keep model lists and scheduler warmth current without waiting for /metrics."""
+        while True:
+            try:
+                await self.backends.refresh(self.client, timeout=HEALTH_CHECK_TIMEOUT)
+            except Exception:
+                pass  # refresh() records per-backend errors; try again next round
+            await asyncio.sleep(self.refresh_interval)
+
+    def shutdown(self, timeout: float = 5):
+        """Close HTTP sessions and stop the loop. Safe to call more than once."""
+        with self._lifecycle:
+            if self._closed:
+                return
+            self._closed = True
+            loop, thread, refresher = self._loop, self._thread, self._refresher
+            self._loop = self._thread = self._refresher = None
+
+        if loop is None:
+            return
+        refresher.cancel()
+        try:
+            asyncio.run_coroutine_threadsafe(self.client.close(), loop).result(timeout=timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # Wish admission (bounded concurrency across concurrent wishes)
+    # ------------------------------------------------------------------
+
+    def acquire_slot(self, cancel_checker: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Block until this wish may fan out.
+        Returns False if the wish was cancelled while waiting.
+        """
+        with self._lock:
+            self.stats["wishes_waiting"] += 1
+        try:
+            while not self._wish_slots.acquire(timeout=CANCEL_POLL_INTERVAL):
+                if cancel_checker and cancel_checker():
+                    return False
+        finally:
+            with self._lock:
+                self.stats["wishes_waiting"] -= 1
+
+        with self._lock:
+            self.stats["wishes_active"] += 1
+        return True
+
+    def release_slot(self):
+        with self._lock:
+            self.stats["wishes_active"] -= 1
+        self._wish_slots.release()
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def run(self, coro: Awaitable[Any], cancel_checker: Optional[Callable[[], bool]] = None,
+            timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the pool loop and block for its result.
+        The coroutine sees the caller's context variables (wish priority).
+
+        Raises concurrent.futures.CancelledError if cancel_checker fires
+        first; the coroutine (and everything it awaits) is cancelled.
+        """
+        loop = self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        with self._lock:
+            self.stats["calls_submitted"] += 1
+
+        deadline = time.time() + timeout if timeout else None
+        try:
+            while True:
+                try:
+                    return future.result(timeout=CANCEL_POLL_INTERVAL)
+                except FutureTimeout:
+                    if cancel_checker and cancel_checker():
+                        future.cancel()
+                        with self._lock:
+                            self.stats["calls_cancelled"] += 1
+                        raise CancelledError()
+                    if deadline and time.time() > deadline:
+                        future.cancel()
+                        raise
+        except (CancelledError, FutureTimeout):
+            raise
+        except Exception:
+            with self._lock:
+                self.stats["calls_failed"] += 1
+            raise
+
+    # ------------------------------------------------------------------
+    # Health
+    # ------------------------------------------------------------------
+
+    def health_check(self, timeout: float = HEALTH_CHECK_TIMEOUT) -> Dict[str, Any]:
+        """Report loop state and round-trip a /models call to every LM backend."""
+        with self._lifecycle:
+            closed = self._closed
+            running = self._loop is not None and self._thread is not None and self._thread.is_alive()
+        with self._lock:
+            stats = dict(self.stats)
+
+        status: Dict[str, Any] = {
+            "healthy": False,
+            "running": running,
+            "endpoint": self.base_url,
+            "max_concurrent_wishes": self.max_concurrent_wishes,
+            **stats
+        }
+
+        if closed:
+            status["state"] = "closed"
+            return status
+
+        start = time.time()
+        try:
+            backends = self.run(self.backends.refresh(self.client, timeout=timeout), timeout=timeout + 1)
+            status["ping_ms"] = round((time.time() - start) * 1000, 2)
+            status["backends"] = backends
+            status["model_count"] = len(self.backends.served_models())
+            online = sum(1 for backend in backends.values() if backend["online"])
+            status["healthy"] = online > 0
+            status["state"] = "ready" if online == len(backends) else ("degraded" if online else "unreachable")
+        except Exception as exc:
+            status["state"] = "unreachable"
+            status["error"] = str(exc) or exc.__class__.__name__
+
+        return status
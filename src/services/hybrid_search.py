@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+SHENRON Hybrid Search - BM25 + vector retrieval with reciprocal rank fusion
+BM25 index is built by the ingest script; optional CPU cross-encoder rerank
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:
+    CrossEncoder = None
+
+BM25_INDEX_FILE = "bm25_index.json"
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60  # standard reciprocal rank fusion constant
+DEFAULT_CANDIDATES = 20  # per retriever, before fusion/rerank
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# Compound tokens are kept whole (192.168.1.10, vm150:22, qwen2.5-coder-7b)
+# and additionally split into their parts, so both exact and partial
+# mentions match.
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[._:/-][a-z0-9]+)*")
+PART_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case tokens that keep IPs, ports, hostnames and model names intact."""
+    tokens = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        token = match.group(0)
+        tokens.append(token)
+        parts = PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: score(d) = sum(1 / (k + rank)). Best first."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    Small in-memory Okapi BM25 inverted index, persisted as JSON.
+
+    Only term frequencies are stored - documents themselves live in
+    ChromaDB and are fetched by ID. Each document's term list is kept in
+    memory (rebuilt from the postings on load) so remove() only touches
+    that document's postings.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: str, text: str):
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+        counts = Counter(tokens)
+        self.doc_terms[doc_id] = list(counts)
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: str):
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id, ()):
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            docs.pop(doc_id, None)
+            if not docs:
+                del self.postings[term]
+
+    def search(self, query: str, n_results: int = DEFAULT_CANDIDATES) -> List[Tuple[str, float]]:
+        """Return up to n_results (doc_id, score) pairs, best first."""
+        if not self.doc_lengths:
+            return []
+        n_docs = len(self.doc_lengths)
+        avg_length = self.total_length / n_docs or 1.0
+        scores: Dict[str, float] = {}
+
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+    def save(self, path: str):
+        """Write the index atomically (readers never see a partial file)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "doc_lengths": self.doc_lengths,
+                "postings": self.postings
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data.get("k1", BM25_K1), b=data.get("b", BM25_B))
+        index.doc_lengths = data.get("doc_lengths", {})
+        index.postings = data.get("postings", {})
+        index.total_length = sum(index.doc_lengths.values())
+        for term, docs in index.postings.items():
+            for doc_id in docs:
+                index.doc_terms.setdefault(doc_id, []).append(term)
+        return index
+
+
+class HybridRetriever:
+    """
+    Vector + BM25 retrieval over the knowledge_base collection.
+
+    - Both retrievers return DEFAULT_CANDIDATES candidates, fused with RRF
+    - rerank=True scores the fused candidates with a CPU cross-encoder
+    - The BM25 index is reloaded when the ingest script rewrites it
+    - With an embedder (EmbeddingService) the query vector is computed
+      once and passed to Chroma as query_embeddings
+    - Every call reports per-stage latency in milliseconds
+    """
+
+    def __init__(self, collection, index_path: str, rerank_model: str = RERANK_MODEL,
+                 embedder=None):
+        self.collection = collection
+        self.index_path = index_path
+        self.embedder = embedder
+        self.rerank_model = rerank_model
+
+        self._index: Optional[BM25Index] = None
+        self._index_mtime: Optional[float] = None
+        self._reranker = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Lazy resources
+    # ------------------------------------------------------------------
+
+    def bm25_index(self) -> Optional[BM25Index]:
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return None
+        with self._lock:
+            if self._index is None or mtime != self._index_mtime:
+                try:
+                    self._index = BM25Index.load(self.index_path)
+                    self._index_mtime = mtime
+                except (OSError, ValueError):
+                    return self._index
+            return self._index
+
+    def reranker(self):
+        if CrossEncoder is None:
+            return None
+        with self._lock:
+            if self._reranker is None:
+                try:
+                    self._reranker = CrossEncoder(self.rerank_model, device="cpu")
+                except Exception:
+                    self._reranker = False
+            return self._reranker or None
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, n_results: int = 3, rerank: bool = False,
+               candidates: int = DEFAULT_CANDIDATES) -> Dict[str, Any]:
+        """
+        Return {"ids", "documents", "metadatas", "scores", "timings", "mode"}
+        with at most n_results hits, best first.
+        """
+        timings: Dict[str, float] = {}
+        total_start = time.perf_counter()
+        n_candidates = max(candidates, n_results)
+
+        stage = time.perf_counter()
+        if self.embedder is not None:
+            query_embedding = self.embedder.embed_query(query)
+            timings["embed_ms"] = (time.perf_counter() - stage) * 1000
+            stage = time.perf_counter()
+            vector = self.collection.query(query_embeddings=[query_embedding], n_results=n_candidates)
+        else:
+            vector = self.collection.query(query_texts=[query], n_results=n_candidates)
+        timings["vector_ms"] = (time.perf_counter() - stage) * 1000
+
+        documents: Dict[str, str] = {}
+        metadatas: Dict[str, Dict[str, Any]] = {}
+        vector_ids = list(vector["ids"][0]) if vector.get("ids") else []
+        for i, doc_id in enumerate(vector_ids):
+            documents[doc_id] = vector["documents"][0][i]
+            metadatas[doc_id] = vector["metadatas"][0][i]
+
+        stage = time.perf_counter()
+        index = self.bm25_index()
+        bm25_ids = [doc_id for doc_id, _ in index.search(query, n_candidates)] if index else []
+        timings["bm25_ms"] = (time.perf_counter() - stage) * 1000
+
+        stage = time.perf_counter()
+        if bm25_ids:
+            fused = reciprocal_rank_fusion([vector_ids, bm25_ids])
+            mode = "hybrid"
+        else:
+            fused = [(doc_id, 1.0 / (RRF_K + rank)) for rank, doc_id in enumerate(vector_ids, start=1)]
+            mode = "vector"
+        timings["fusion_ms"] = (time.perf_counter() - stage) * 1000
+
+        # BM25-only hits are not in the vector result - fetch their text
+        pool_size = n_candidates if rerank else n_results
+        ranked = fused[:pool_size]
+        missing = [doc_id for doc_id, _ in ranked if doc_id not in documents]
+        if missing:
+            stage = time.perf_counter()
+            fetched = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            for i, doc_id in enumerate(fetched["ids"]):
+                documents[doc_id] = fetched["documents"][i]
+                metadatas[doc_id] = fetched["metadatas"][i]
+            timings["fetch_ms"] = (time.perf_counter() - stage) * 1000
+            # IDs deleted since the index was written are skipped
+            ranked = [(doc_id, score) for doc_id, score in ranked if doc_id in documents]
+
+        if rerank:
+            model = self.reranker()
+            if model is not None and ranked:
+                stage = time.perf_counter()
+                scores = model.predict([(query, documents[doc_id]) for doc_id, _ in ranked])
+                ranked = sorted(
+                    ((doc_id, float(score)) for (doc_id, _), score in zip(ranked, scores)),
+                    key=lambda item: item[1], reverse=True
+                )
+                timings["rerank_ms"] = (time.perf_counter() - stage) * 1000
+                mode += "+rerank"
+
+        ranked = ranked[:n_results]
+        timings["total_ms"] = (time.perf_counter() - total_start) * 1000
+
+        return {
+            "ids": [doc_id for doc_id, _ in ranked],
+            "documents": [documents[doc_id] for doc_id, _ in ranked],
+            "metadatas": [metadatas[doc_id] for doc_id, _ in ranked],
+            "scores": [round(score, 6) for _, score in ranked],
+            "timings": {name: round(ms, 2) for name, ms in timings.items()},
+            "mode": mode
+        }
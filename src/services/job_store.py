@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+SHENRON Job Store - durable async wish queue (SQLite WAL) + bounded worker pool
+Jobs survive restarts; queued work is resumed, finished work expires after a TTL
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled", "action_required")
+DEFAULT_JOB_TTL = 24 * 3600  # seconds finished jobs are kept
+DEFAULT_GC_INTERVAL = 300  # seconds
+MAX_EVENTS_PER_JOB = 100
+MAX_ATTEMPTS = 2  # a job interrupted by a restart is retried once
+
+
+class JobStore:
+    """
+    Async wish jobs persisted in SQLite (WAL journal).
+
+    Each row keeps the indexed fields (status, power mode, timestamps) as
+    columns and the full job record - events, progress, result - as JSON.
+    All access goes through one connection guarded by a lock; the API
+    runs in a single process, so this is both simple and fast.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_JOB_TTL):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                power_mode TEXT,
+                created_at REAL NOT NULL,
+                completed_at REAL,
+                record TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_completed ON jobs (completed_at)")
+
+    # ------------------------------------------------------------------
+    # Row helpers (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, job_id: str, record: Dict[str, Any]):
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, power_mode = ?, completed_at = ?, record = ? WHERE job_id = ?",
+            (record.get("status", "queued"), record.get("power_mode"), record.get("completed_at"),
+             json.dumps(record, default=str), job_id)
+        )
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def create(self, record: Dict[str, Any]) -> str:
+        job_id = str(uuid.uuid4())
+        record.setdefault("status", "queued")
+        record.setdefault("created_at", time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, power_mode, created_at, completed_at, record) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, record["status"], record.get("power_mode"), record["created_at"],
+                 record.get("completed_at"), json.dumps(record, default=str))
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return self._load(job_id) or {}
+
+    def update(self, job_id: str, **fields) -> bool:
+        return self.mutate(job_id, lambda record: record.update(fields)) is not None
+
+    def mutate(self, job_id: str, fn: Callable[[Dict[str, Any]], Any]) -> Optional[Any]:
+        """
+        Atomically read-modify-write one record. fn edits the dict in place
+        and may return a value; returns None if the job does not exist.
+        """
+        with self._lock:
+            record = self._load(job_id)
+            if record is None:
+                return None
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = fn(record)
+                self._save(job_id, record)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return True if value is None else value
+
+    def append_event(self, job_id: str, event_message: str, event_type: str = "info",
+                     publish: Optional[Callable[[Dict[str, Any]], None]] = None,
+                     **fields) -> Optional[Dict[str, Any]]:
+        """
+        Append a numbered event and apply `fields` in the same transaction.
+        publish(event) runs under the store lock, so listeners see events
+        in seq order; the event carries the job's status and progress.
+        """
+        def add(record):
+            record.update(fields)
+            seq = record.get("last_event_seq", len(record.get("events") or [])) + 1
+            record["last_event_seq"] = seq
+            event = {"seq": seq, "timestamp": time.time(), "type": event_type, "message": event_message}
+            events = record.setdefault("events", [])
+            events.append(event)
+            if len(events) > MAX_EVENTS_PER_JOB:
+                del events[:-MAX_EVENTS_PER_JOB]
+            event = {**event, "status": record.get("status"), "progress": record.get("progress")}
+            if publish is not None:
+                publish(event)
+            return event
+        return self.mutate(job_id, add)
+
+    def list_jobs(self) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT job_id, record FROM jobs ORDER BY created_at").fetchall()
+        return [(job_id, json.loads(record)) for job_id, record in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    # ------------------------------------------------------------------
+    # Queue
+    # ------------------------------------------------------------------
+
+    def queued_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def claim_next(self, can_run: Callable[[str], bool]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Mark the oldest queued job whose power mode has capacity as running
+        and return (job_id, record). FIFO per mode; a full mode does not
+        block jobs of other modes.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, power_mode FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+            for job_id, power_mode in rows:
+                if not can_run(power_mode):
+                    continue
+
+                def start(record):
+                    record["status"] = "running"
+                    record["started_at"] = time.time()
+                    record["attempts"] = record.get("attempts", 0) + 1
+                    return dict(record)
+
+                record = self.mutate(job_id, start)
+                if record:
+                    return job_id, record
+        return None
+
+    def recover(self) -> Dict[str, int]:
+        """
+        Called once at startup: jobs left "running" by a crash are queued
+        again (or failed after MAX_ATTEMPTS, cancelled if a cancel was
+        requested); queued jobs simply resume.
+        """
+        resumed = failed = cancelled = 0
+        with self._lock:
+            running = [job_id for (job_id,) in self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'running'"
+            ).fetchall()]
+            for job_id in running:
+                record = self._load(job_id) or {}
+                if record.get("cancel_requested"):
+                    self.append_event(job_id, "Wish cancelled (interrupted by server restart)", "warning",
+                                      status="cancelled", completed_at=time.time(), progress=100,
+                                      message="Wish cancelled by user")
+                    cancelled += 1
+                elif record.get("attempts", 0) >= MAX_ATTEMPTS:
+                    self.append_event(job_id, "Interrupted by server restart", "error",
+                                      status="failed", completed_at=time.time(), progress=100,
+                                      error="Interrupted by server restart",
+                                      message="Interrupted by server restart")
+                    failed += 1
+                else:
+                    self.append_event(job_id, "Server restarted - wish re-queued", "warning",
+                                      status="queued", started_at=None, progress=0,
+                                      message="Re-queued after server restart")
+                    resumed += 1
+            queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        return {"queued": queued, "resumed_running": resumed, "failed": failed, "cancelled": cancelled}
+
+    def gc(self, now: Optional[float] = None) -> int:
+        """Delete finished jobs older than the TTL; returns the number removed."""
+        cutoff = (now or time.time()) - self.ttl
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND completed_at IS NOT NULL "
+                f"AND completed_at < ?",
+                (*FINISHED_STATUSES, cutoff)
+            )
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorkerPool:
+    """
+    Fixed-size pool of worker threads draining the JobStore.
+
+    - Admission control: submissions beyond max_queued are rejected
+    - Per power mode concurrency limits (e.g. one ultra wish at a time)
+    - Periodic TTL garbage collection of finished jobs
+    - Jobs queued before a restart are picked up on start()
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[str, Dict[str, Any]], None],
+                 workers: int = 3, mode_limits: Optional[Dict[str, int]] = None,
+                 max_queued: int = 50, gc_interval: float = DEFAULT_GC_INTERVAL):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.mode_limits = dict(mode_limits or {})
+        self.max_queued = max_queued
+        self.gc_interval = gc_interval
+
+        self._cond = threading.Condition()
+        self._running: Dict[str, int] = {}
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self.stats = {"rejected": 0, "processed": 0, "gc_removed": 0, "recovered": {}}
+
+    def start(self):
+        if self._threads:
+            return
+        self.stats["recovered"] = self.store.recover()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"shenron-job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        gc_thread = threading.Thread(target=self._gc_loop, name="shenron-job-gc", daemon=True)
+        gc_thread.start()
+        self._threads.append(gc_thread)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def admit(self) -> Tuple[bool, str]:
+        """Check queue capacity before creating a job."""
+        queued = self.store.queued_count()
+        if queued >= self.max_queued:
+            with self._cond:
+                self.stats["rejected"] += 1
+            return False, f"Wish queue is full ({queued} waiting) - try again shortly"
+        return True, ""
+
+    def notify(self):
+        """Wake a worker after a job was queued."""
+        with self._cond:
+            self._cond.notify()
+
+    def _can_run(self, power_mode: str) -> bool:
+        limit = self.mode_limits.get(power_mode)
+        return limit is None or self._running.get(power_mode, 0) < limit
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                claimed = None
+                while not self._stopping:
+                    claimed = self.store.claim_next(self._can_run)
+                    if claimed:
+                        power_mode = claimed[1].get("power_mode")
+                        self._running[power_mode] = self._running.get(power_mode, 0) + 1
+                        break
+                    # Woken by notify(), a finishing job, or periodically
+                    self._cond.wait(timeout=5)
+                if self._stopping:
+                    return
+
+            job_id, record = claimed
+            try:
+                self.handler(job_id, record)
+            except Exception as exc:
+                self.store.append_event(job_id, f"Wish failed: {exc}", "error",
+                                        status="failed", completed_at=time.time(), progress=100,
+                                        error=str(exc), message=f"Failed: {exc}")
+            finally:
+                with self._cond:
+                    self._running[power_mode] -= 1
+                    self.stats["processed"] += 1
+                    # A slot for this mode is free again
+                    self._cond.notify_all()
+
+    def _gc_loop(self):
+        while True:
+            with self._cond:
+                if self._cond.wait_for(lambda: self._stopping, timeout=self.gc_interval):
+                    return
+            try:
+                removed = self.store.gc()
+            except sqlite3.Error:
+                continue
+            with self._cond:
+                self.stats["gc_removed"] += removed
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            running = dict(self._running)
+            stats = dict(self.stats)
+        return {
+            "workers": self.workers,
+            "mode_limits": self.mode_limits,
+            "max_queued": self.max_queued,
+            "running_by_mode": running,
+            "queued": self.store.queued_count(),
+            "ttl_seconds": self.store.ttl,
+            **stats
+        }
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+SHENRON LM Backends - registry of LM Studio / OpenAI-compatible inference hosts
+Least-outstanding routing per model, failover on errors, latency EWMA
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from lm_scheduler import LMStudioScheduler
+
+EWMA_ALPHA = 0.3
+FAILURE_COOLDOWN = 30  # seconds a failing backend is skipped while others are healthy
+REFRESH_TIMEOUT = 5  # seconds
+
+
+class Backend:
+    """One inference host with its own scheduler (slots are per host)."""
+
+    def __init__(self, name: str, base_url: str, scheduler: LMStudioScheduler,
+                 models: Optional[Iterable[str]] = None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.scheduler = scheduler
+        # Configured models are authoritative; otherwise learnt from /models
+        self.pinned_models = set(models) if models else None
+        self.models: Optional[set] = set(self.pinned_models) if self.pinned_models else None
+        # model -> context length it is loaded with (LM Studio only, from /api/v0/models)
+        self.context_lengths: Dict[str, int] = {}
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.down_until = 0.0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.stats = {"requests": 0, "failures": 0}
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def load(self) -> float:
+        """Outstanding requests relative to the host's generation capacity."""
+        return self.outstanding / max(1, self.scheduler.max_active)
+
+
+class BackendRegistry:
+    """
+    Routes each generation to a healthy backend serving its model.
+
+    - Least outstanding requests (scaled by host capacity) wins; the
+      latency EWMA breaks ties
+    - Connection errors, timeouts and 5xx/429/404 answers put the backend
+      in a short cooldown and the call fails over to the next candidate
+    - refresh() learns which models each host serves from /models and,
+      on LM Studio hosts, the context length each loaded model runs with
+    """
+
+    def __init__(self, backends: List[Backend], ewma_alpha: float = EWMA_ALPHA,
+                 failure_cooldown: float = FAILURE_COOLDOWN):
+        if not backends:
+            raise ValueError("At least one LM backend is required")
+        self.backends = backends
+        self.ewma_alpha = ewma_alpha
+        self.failure_cooldown = failure_cooldown
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: List[Dict[str, Any]], model_slots: Optional[Dict[str, int]] = None,
+                    default_slots: int = 1, max_active: int = 4) -> "BackendRegistry":
+        """
+        Build from [{"name", "url", "models"?, "model_slots"?, "max_active"?}];
+        per-backend keys override the shared scheduler settings.
+        """
+        backends = []
+        for i, entry in enumerate(config):
+            slots = dict(model_slots or {})
+            slots.update(entry.get("model_slots") or {})
+            scheduler = LMStudioScheduler(slots, default_slots=entry.get("default_slots", default_slots),
+                                          max_active=entry.get("max_active", max_active))
+            backends.append(Backend(entry.get("name") or f"backend-{i}", entry["url"], scheduler,
+                                    models=entry.get("models")))
+        return cls(backends)
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def pick(self, model: str, exclude: Iterable[str] = ()) -> Optional[Backend]:
+        """
+        Best backend for model, or None when every candidate was tried.
+        Preference: hosts listing the model, then hosts whose model list is
+        unknown, then any host (it may load the model on demand); cooling
+        down hosts only when nothing healthy is left.
+        """
+        excluded = set(exclude)
+        now = time.time()
+        with self._lock:
+            available = [b for b in self.backends if b.name not in excluded
+                         and (not b.pinned_models or model in b.pinned_models)]
+            if not available:
+                return None
+            healthy = [b for b in available if b.healthy(now)] or available
+            listed = [b for b in healthy if b.models is not None and model in b.models]
+            unknown = [b for b in healthy if b.models is None]
+            candidates = listed or unknown or healthy
+            return min(candidates, key=lambda b: (b.load(), b.ewma_latency or 0.0))
+
+    @staticmethod
+    def is_retryable(exc: BaseException) -> bool:
+        status = getattr(exc, "status", None)
+        if status is not None:
+            return status >= 500 or status in (404, 408, 429)
+        return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError))
+
+    @asynccontextmanager
+    async def lease(self, backend: Backend, model: str):
+        """Hold a scheduler slot on backend and account the call's outcome."""
+        with self._lock:
+            backend.outstanding += 1
+            backend.stats["requests"] += 1
+        try:
+            async with backend.scheduler.slot(model):
+                start = time.perf_counter()
+                yield backend
+            self.record_success(backend, time.perf_counter() - start)
+        except Exception as exc:
+            if self.is_retryable(exc):
+                self.record_failure(backend, model, exc)
+            raise
+        finally:
+            with self._lock:
+                backend.outstanding -= 1
+
+    def record_success(self, backend: Backend, latency: float):
+        with self._lock:
+            if backend.ewma_latency is None:
+                backend.ewma_latency = latency
+            else:
+                backend.ewma_latency = self.ewma_alpha * latency + (1 - self.ewma_alpha) * backend.ewma_latency
+            backend.consecutive_failures = 0
+            backend.down_until = 0.0
+
+    def record_failure(self, backend: Backend, model: str, exc: BaseException):
+        with self._lock:
+            backend.stats["failures"] += 1
+            backend.consecutive_failures += 1
+            backend.last_error = str(exc) or exc.__class__.__name__
+            if getattr(exc, "status", None) == 404 and backend.models is not None and not backend.pinned_models:
+                # Host does not (or no longer) serve this model - prefer others for it
+                backend.models.discard(model)
+            else:
+                backend.down_until = time.time() + self.failure_cooldown * min(backend.consecutive_failures, 4)
+
+    # ------------------------------------------------------------------
+    # Discovery / health
+    # ------------------------------------------------------------------
+
+    async def refresh(self, client, timeout: float = REFRESH_TIMEOUT) -> Dict[str, Any]:
+        """List models on every backend concurrently; returns {name: model count or error}."""
+        async def probe(backend: Backend):
+            try:
+                models = await client.list_models(timeout=timeout, base_url=backend.base_url)
+            except Exception as exc:
+                with self._lock:
+                    backend.down_until = time.time() + self.failure_cooldown
+                    backend.last_error = str(exc) or exc.__class__.__name__
+                return backend.name, {"online": False, "error": backend.last_error}
+            backend.scheduler.update_models(models)
+            try:
+                info = await client.model_info(timeout=timeout, base_url=backend.base_url)
+            except Exception:
+                info = None  # not LM Studio (or an older one) - keep the configured windows
+            with self._lock:
+                if info is not None:
+                    backend.context_lengths = {
+                        model: int(entry["loaded_context_length"]) for model, entry in info.items()
+                        if entry.get("state") == "loaded" and entry.get("loaded_context_length")
+                    }
+                if not backend.pinned_models:
+                    backend.models = set(models)
+                backend.down_until = 0.0
+                backend.consecutive_failures = 0
+            return backend.name, {"online": True, "model_count": len(models)}
+
+        results = await asyncio.gather(*(probe(backend) for backend in self.backends))
+        return dict(results)
+
+    def context_length(self, model: str) -> Optional[int]:
+        """Smallest loaded window any host reports for model (calls may go to any of them)."""
+        with self._lock:
+            lengths = [b.context_lengths[model] for b in self.backends if model in b.context_lengths]
+        return min(lengths) if lengths else None
+
+    def served_models(self) -> List[str]:
+        with self._lock:
+            return sorted({model for backend in self.backends if backend.models for model in backend.models})
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        backends = []
+        for backend in self.backends:
+            with self._lock:
+                entry = {
+                    "name": backend.name,
+                    "url": backend.base_url,
+                    "healthy": backend.healthy(now),
+                    "outstanding": backend.outstanding,
+                    "ewma_latency": round(backend.ewma_latency, 3) if backend.ewma_latency is not None else None,
+                    "models": sorted(backend.models) if backend.models is not None else None,
+                    "context_lengths": dict(backend.context_lengths),
+                    "last_error": backend.last_error,
+                    **backend.stats
+                }
+                if not entry["healthy"]:
+                    entry["retry_in"] = round(backend.down_until - now, 1)
+            entry["scheduler"] = backend.scheduler.snapshot()
+            backends.append(entry)
+        return {
+            "backends": backends,
+            "healthy": sum(1 for b in backends if b["healthy"]),
+            "queue_depth": sum(b["scheduler"]["queue_depth"] for b in backends)
+        }
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+SHENRON LM Scheduler - per-model generation slots in front of LM Studio
+Queued calls run Lightning > Council > Ultra, preferring already loaded models
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+
+PRIORITIES = {"lightning": 0, "council": 1, "ultra": 2}
+DEFAULT_PRIORITY = PRIORITIES["council"]
+AGING_SECONDS = 30  # a waiting call gains one priority tier per interval (no starvation)
+
+# Priority of the wish the current code runs for. Set by the orchestrator
+# around a wish; coroutines submitted to the FighterPool inherit it.
+wish_priority: ContextVar[int] = ContextVar("wish_priority", default=DEFAULT_PRIORITY)
+
+
+def priority_for(power_mode: Optional[str]) -> int:
+    return PRIORITIES.get(power_mode or "", DEFAULT_PRIORITY)
+
+
+def priority_name(priority: int) -> str:
+    for name, value in PRIORITIES.items():
+        if value == priority:
+            return name
+    return str(priority)
+
+
+@contextmanager
+def priority_scope(power_mode: Optional[str]):
+    """Run the enclosed LM calls at the priority of power_mode."""
+    token = wish_priority.set(priority_for(power_mode))
+    try:
+        yield
+    finally:
+        wish_priority.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("model", "priority", "seq", "enqueued_at", "future")
+
+    def __init__(self, model: str, priority: int, seq: int, future: "asyncio.Future"):
+        self.model = model
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = time.time()
+        self.future = future
+
+
+class LMStudioScheduler:
+    """
+    Admission queue for generations on one LM Studio host.
+
+    - Each model runs at most model_slots[model] (default_slots) requests
+    - At most max_active generations run on the host at once
+    - Waiting calls are ordered by (aged priority, model warmth, arrival):
+      a model that is already generating beats one that is merely listed
+      as loaded, which beats a cold model that would have to be swapped in
+    - update_models() feeds in the /v1/models list (loaded models)
+
+    acquire()/release() run on the FighterPool loop; snapshot() may be
+    called from any thread.
+    """
+
+    def __init__(self, model_slots: Optional[Dict[str, int]] = None, default_slots: int = 1,
+                 max_active: int = 4):
+        self.model_slots = dict(model_slots or {})
+        self.default_slots = default_slots
+        self.max_active = max_active
+
+        self._lock = threading.Lock()
+        self._waiters: List[_Waiter] = []
+        self._active: Dict[str, int] = {}
+        self._loaded: set = set()
+        self._seq = itertools.count()
+        self.stats = {
+            "requests": 0,
+            "queued": 0,
+            "cancelled_waiting": 0,
+            "cold_starts": 0,
+            "max_queue_depth": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0
+        }
+        self._wait_by_priority: Dict[str, Dict[str, float]] = {}
+
+    # ------------------------------------------------------------------
+    # Model state
+    # ------------------------------------------------------------------
+
+    def update_models(self, models: Iterable[str]):
+        """Replace the set of models LM Studio reports as loaded."""
+        with self._lock:
+            self._loaded = {m for m in models if m}
+
+    def slots_for(self, model: str) -> int:
+        return self.model_slots.get(model, self.default_slots)
+
+    # ------------------------------------------------------------------
+    # Admission (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _rank(self, waiter: _Waiter, now: float):
+        aged = waiter.priority - int((now - waiter.enqueued_at) // AGING_SECONDS)
+        if self._active.get(waiter.model):
+            warmth = 0
+        elif waiter.model in self._loaded:
+            warmth = 1
+        else:
+            warmth = 2
+        return (aged, warmth, waiter.seq)
+
+    def _dispatch(self):
+        self._waiters = [w for w in self._waiters if not w.future.done()]
+        while self._waiters and sum(self._active.values()) < self.max_active:
+            now = time.time()
+            eligible = [w for w in self._waiters if self._active.get(w.model, 0) < self.slots_for(w.model)]
+            if not eligible:
+                return
+            waiter = min(eligible, key=lambda w: self._rank(w, now))
+            self._waiters.remove(waiter)
+            self._start(waiter, now)
+            waiter.future.set_result(now - waiter.enqueued_at)
+
+    def _start(self, waiter: _Waiter, now: float):
+        model = waiter.model
+        if not self._active.get(model) and model not in self._loaded:
+            self.stats["cold_starts"] += 1
+        self._active[model] = self._active.get(model, 0) + 1
+        self._loaded.add(model)
+
+        waited = now - waiter.enqueued_at
+        self.stats["wait_total"] += waited
+        self.stats["wait_max"] = max(self.stats["wait_max"], waited)
+        bucket = self._wait_by_priority.setdefault(
+            priority_name(waiter.priority), {"requests": 0, "wait_total": 0.0, "wait_max": 0.0}
+        )
+        bucket["requests"] += 1
+        bucket["wait_total"] += waited
+        bucket["wait_max"] = max(bucket["wait_max"], waited)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def acquire(self, model: str, priority: Optional[int] = None) -> float:
+        """Wait for a generation slot on model; returns seconds spent queued."""
+        priority = wish_priority.get() if priority is None else priority
+        waiter = _Waiter(model, priority, next(self._seq), asyncio.get_running_loop().create_future())
+        with self._lock:
+            self.stats["requests"] += 1
+            self._waiters.append(waiter)
+            self._dispatch()
+            if not waiter.future.done():
+                self.stats["queued"] += 1
+                self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._waiters))
+
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # Slot was granted just before the cancellation landed
+                    self._release(model)
+                else:
+                    self.stats["cancelled_waiting"] += 1
+                    self._dispatch()
+            raise
+
+    def _release(self, model: str):
+        self._active[model] = max(0, self._active.get(model, 0) - 1)
+        if not self._active[model]:
+            del self._active[model]
+        self._dispatch()
+
+    def release(self, model: str):
+        with self._lock:
+            self._release(model)
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: Optional[int] = None):
+        await self.acquire(model, priority)
+        try:
+            yield
+        finally:
+            self.release(model)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            waiting = [w for w in self._waiters if not w.future.done()]
+            stats = dict(self.stats)
+            by_priority = {name: dict(bucket) for name, bucket in self._wait_by_priority.items()}
+            active = dict(self._active)
+            loaded = sorted(self._loaded)
+
+        queued_by_model: Dict[str, int] = {}
+        queued_by_priority: Dict[str, int] = {}
+        for waiter in waiting:
+            queued_by_model[waiter.model] = queued_by_model.get(waiter.model, 0) + 1
+            name = priority_name(waiter.priority)
+            queued_by_priority[name] = queued_by_priority.get(name, 0) + 1
+
+        started = stats["requests"] - len(waiting) - stats["cancelled_waiting"]
+        for bucket in by_priority.values():
+            bucket["avg_wait"] = round(bucket["wait_total"] / bucket["requests"], 3) if bucket["requests"] else 0.0
+            bucket["wait_total"] = round(bucket["wait_total"], 3)
+            bucket["wait_max"] = round(bucket["wait_max"], 3)
+
+        return {
+            "max_active": self.max_active,
+            "default_slots": self.default_slots,
+            "model_slots": self.model_slots,
+            "active": active,
+            "active_total": sum(active.values()),
+            "queue_depth": len(waiting),
+            "queued_by_model": queued_by_model,
+            "queued_by_priority": queued_by_priority,
+            "oldest_wait": round(max((now - w.enqueued_at for w in waiting), default=0.0), 3),
+            "loaded_models": loaded,
+            **stats,
+            "wait_total": round(stats["wait_total"], 3),
+            "wait_max": round(stats["wait_max"], 3),
+            "avg_wait": round(stats["wait_total"] / started, 3) if started > 0 else 0.0,
+            "wait_by_priority": by_priority
+        }
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+SHENRON LM Studio Client - asyncio-native, keep-alive HTTP client
+One pooled aiohttp session per LM Studio / OpenAI-compatible endpoint
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+DEFAULT_MAX_CONNECTIONS = 8  # per endpoint
+KEEPALIVE_SECONDS = 120
+
+
+class LMStudioError(Exception):
+    """Raised when an endpoint answers with a non-200 status."""
+
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or f"HTTP {status}")
+        self.status = status
+
+
+class AsyncLMStudioClient:
+    """
+    Shared client for all fighter and synthesis calls.
+
+    Sessions are created lazily on the running event loop and reused, so
+    every call after the first rides an already-open TCP connection.
+    With a BackendRegistry each generation is routed to a healthy host
+    serving its model, waits for a slot in that host's scheduler and fails
+    over to the next host on connection errors, timeouts and 5xx answers.
+    """
+
+    def __init__(self, base_url: str, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 backends=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.backends = backends
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    def _session(self, base_url: Optional[str] = None) -> aiohttp.ClientSession:
+        endpoint = (base_url or self.base_url).rstrip("/")
+        session = self._sessions.get(endpoint)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.max_connections,
+                keepalive_timeout=KEEPALIVE_SECONDS
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self._sessions[endpoint] = session
+        return session
+
+    def _route(self, model: str, tried: List[str], last_error: Optional[Exception]):
+        backend = self.backends.pick(model, tried)
+        if backend is None:
+            if last_error is not None:
+                raise last_error
+            raise LMStudioError(503, f"No LM backend serves {model}")
+        return backend
+
+    # ------------------------------------------------------------------
+    # Single endpoint requests
+    # ------------------------------------------------------------------
+
+    async def _post_chat(self, endpoint: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        async with self._session(endpoint).post(
+            f"{endpoint}/chat/completions",
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            if response.status != 200:
+                raise LMStudioError(response.status)
+            return await response.json(content_type=None)
+
+    async def _stream_chat(self, endpoint: str, payload: Dict[str, Any], timeout: float) -> AsyncIterator[str]:
+        async with self._session(endpoint).post(
+            f"{endpoint}/chat/completions",
+            json={**payload, "stream": True},
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            if response.status != 200:
+                raise LMStudioError(response.status)
+
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+    # ------------------------------------------------------------------
+    # Routed requests
+    # ------------------------------------------------------------------
+
+    async def chat_completion(self, model: str, messages: List[Dict[str, str]],
+                              temperature: float, max_tokens: int, timeout: float = 900,
+                              base_url: Optional[str] = None) -> Dict[str, Any]:
+        """POST /chat/completions and return the decoded JSON body."""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if base_url is not None or self.backends is None:
+            return await self._post_chat((base_url or self.base_url).rstrip("/"), payload, timeout)
+
+        tried: List[str] = []
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self._route(model, tried, last_error)
+            try:
+                async with self.backends.lease(backend, model):
+                    return await self._post_chat(backend.base_url, payload, timeout)
+            except Exception as exc:
+                if not self.backends.is_retryable(exc):
+                    raise
+                tried.append(backend.name)
+                last_error = exc
+
+    async def stream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                     temperature: float, max_tokens: int, timeout: float = 900,
+                                     base_url: Optional[str] = None) -> AsyncIterator[str]:
+        """POST /chat/completions with stream=true and yield content deltas as they arrive."""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if base_url is not None or self.backends is None:
+            async for delta in self._stream_chat((base_url or self.base_url).rstrip("/"), payload, timeout):
+                yield delta
+            return
+
+        tried: List[str] = []
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self._route(model, tried, last_error)
+            streamed = False
+            try:
+                async with self.backends.lease(backend, model):
+                    async for delta in self._stream_chat(backend.base_url, payload, timeout):
+                        streamed = True
+                        yield delta
+                return
+            except Exception as exc:
+                # Once deltas reached the caller a retry would duplicate them
+                if streamed or not self.backends.is_retryable(exc):
+                    raise
+                tried.append(backend.name)
+                last_error = exc
+
+    async def list_models(self, timeout: float = 5, base_url: Optional[str] = None) -> List[str]:
+        """GET /models - used for health checks."""
+        endpoint = (base_url or self.base_url).rstrip("/")
+        async with self._session(endpoint).get(
+            f"{endpoint}/models",
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            if response.status != 200:
+                raise LMStudioError(response.status)
+            data = await response.json(content_type=None)
+        models = data.get("data") or data.get("models") or []
+        return [m.get("id") or m.get("name") if isinstance(m, dict) else m for m in models]
+
+    async def model_info(self, timeout: float = 5, base_url: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        GET /api/v0/models (LM Studio REST API, next to /v1): per model id its
+        state and max_context_length, plus loaded_context_length once loaded.
+        """
+        endpoint = (base_url or self.base_url).rstrip("/")
+        root = endpoint[:-len("/v1")] if endpoint.endswith("/v1") else endpoint
+        async with self._session(endpoint).get(
+            f"{root}/api/v0/models",
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            if response.status != 200:
+                raise LMStudioError(response.status)
+            data = await response.json(content_type=None)
+        return {m["id"]: m for m in data.get("data") or [] if isinstance(m, dict) and m.get("id")}
+
+    async def close(self):
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            if not session.closed:
+                await session.close()
+        # Give aiohttp a tick to release the underlying transports
+        await asyncio.sleep(0)
@@ -9,17 +9,29 @@ SHENRON v4.0 Orchestrator - Importable Module
 For use by Flask API server
 """
 
-import requests
+import asyncio
 import json
+import os
+import threading
 import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import List, Dict, Any, Tuple, Optional, Callable
 from dataclasses import dataclass
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeout
 import chromadb
-from chromadb.utils import embedding_functions
-import paramiko
 import re
 
+from answer_cache import AnswerCache, cache_variant, context_fingerprint
+from context_budget import plan_prompt
+from embedding_service import get_embedding_service
+from fighter_pool import FighterPool
+from hybrid_search import BM25_INDEX_FILE, HybridRetriever
+from lm_scheduler import priority_scope
+from lm_studio_client import AsyncLMStudioClient, LMStudioError
+from ssh_pool import get_ssh_pool
+
 RISK_KEYWORDS = {
     "delete", "remove", "rm", "drop", "destroy",
     "invest", "trade", "buy", "sell", "money",
@@ -38,8 +50,115 @@ LOW_CONFIDENCE_PHRASES = {
 
 # Configuration
 LM_STUDIO_API = "http://<VM100_IP>:1234/v1"
+# Inference hosts serving the fighter models. Each generation goes to the
+# healthy host with the fewest outstanding requests that serves its model
+# ("models" pins the list; otherwise it is learnt from /v1/models) and fails
+# over to the next host on errors. Add entries to scale the council out.
+LM_BACKENDS = [
+    {"name": "vm100", "url": LM_STUDIO_API},
+    # {"name": "vm110", "url": "http://<VM110_IP>:1234/v1", "max_active": 2},
+]
 CHROMA_DB_PATH = r"C:\GOKU-AI\chroma_db"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+BM25_INDEX_PATH = os.path.join(CHROMA_DB_PATH, BM25_INDEX_FILE)  # written by the ingest script
+
+# Fighter pool (long-lived event loop + keep-alive sessions, shared by all wishes)
+LM_STUDIO_MAX_CONNECTIONS = 8
+MAX_CONCURRENT_WISHES = 2
+FIGHTER_TIMEOUT = 900  # seconds
+COUNCIL_FIGHTER_TIMEOUT = 300  # seconds
+SYNTHESIS_MODEL = "deepseek-coder-v2-lite-instruct"  # GOKU's model
+SYNTHESIS_FIGHTER = "GOKU"  # synthesis prompts are fit to this fighter's window
+SYNTHESIS_MAX_TOKENS = 4096
+# Prompts are fit to the context length each model is loaded with. LM Studio
+# reports it (/api/v0/models, refreshed by the fighter pool); until it has,
+# or on other servers, Fighter.context_length is used.
+DEFAULT_CONTEXT_LENGTH = 32768  # Fighter.context_length default
+
+# LM Studio scheduler: every generation waits for a slot on its model.
+# Queued calls run Lightning > Council > Ultra and prefer models that are
+# already loaded, so concurrent wishes do not thrash VRAM with model swaps.
+LM_MODEL_SLOTS = {
+    "Goku-deepseek-coder-v2-lite-instruct": 2,  # GOKU answers every wish
+    SYNTHESIS_MODEL: 2
+}
+LM_DEFAULT_MODEL_SLOTS = 1
+LM_MAX_ACTIVE_GENERATIONS = 4  # across all models on one host
+
+# Speculative cascade: start the secondary council while GOKU is answering
+#   off     - GOKU first, council only after GOKU's answer demands it
+#   forced  - launch the council with GOKU when risk keywords / query length
+#             already force validation (never wasted work)
+#   eager   - always launch with GOKU; cancel if GOKU turns out confident
+SPECULATION_MODES = ("off", "forced", "eager")
+SPECULATION_MODE = "forced"
+
+# Early quorum per power mode: synthesis starts once k warriors (GOKU
+# included) have answered or the deadline (seconds into the council
+# fan-out) passes. Stragglers are cancelled, or kept running through
+# synthesis and attached as late addenda. None = wait for every warrior.
+QUORUM_POLICIES = {
+    "council": {"k": 4, "deadline": 120, "stragglers": "addenda"},
+    "ultra": None,  # maximum accuracy - always hear the whole council
+}
+# Warriors a quorum always waits for (up to the deadline), however many others answered
+QUORUM_REQUIRED = ("GOKU",)
+
+# Pipelined synthesis: each warrior answer is compressed into key points
+# (by the warrior's own, already loaded model) as soon as it arrives, so
+# the final SHENRON prompt carries digests instead of full answers.
+#   full      - one big prompt with every full answer (v4.0 behaviour)
+#   pipelined - digest on arrival, synthesize from digests
+SYNTHESIS_MODES = ("full", "pipelined")
+SYNTHESIS_MODE = "pipelined"
+DIGEST_MIN_CHARS = 800  # shorter answers go into the prompt verbatim
+DIGEST_MAX_TOKENS = 300
+# The last warrior's digest is on the critical path: synthesis waits at most
+# this long for outstanding digests, then uses those answers in full.
+DIGEST_WAIT = 8  # seconds
+
+# Fighter prompt layout
+#   single - persona + context + question in one user message (v4.0)
+#   system - persona as a stable system message (computed once at startup),
+#            context + question as the user message; lets LM Studio /
+#            llama.cpp reuse the cached persona prefix across calls
+PROMPT_LAYOUTS = ("single", "system")
+PROMPT_LAYOUT = "system"
+
+# Lightning fast path: one GOKU call over the fighter pool - no cascade,
+# no synthesis. RAG is opt-in and served from a short-lived retrieval cache.
+LIGHTNING_FIGHTER = "GOKU"
+LIGHTNING_TIMEOUT = 120  # seconds
+LIGHTNING_SLO_SECONDS = 10.0  # end-to-end latency target per wish
+LIGHTNING_LATENCY_WINDOW = 200  # recent wishes kept for p50/p95
+LIGHTNING_RAG_CACHE_SIZE = 256
+LIGHTNING_RAG_CACHE_TTL = 300  # seconds
+
+# Ultra Instinct refinement (pass 2): instead of a second full wish, only
+# warriors whose answer disagrees with the council (and, in a weak pass,
+# the ones that failed) are asked again with their peers' pass-1 answers.
+# RAG context and the agreeing answers are reused; one new synthesis.
+REFINE_AGREEMENT_THRESHOLDS = {"embedding": 0.6, "lexical": 0.2}  # mean similarity to peers
+REFINE_MIN_ANSWERS = 3  # fewer successful answers = nothing to disagree with
+REFINE_MAX_WARRIORS = 3
+REFINE_TIMEOUT = COUNCIL_FIGHTER_TIMEOUT
+
+# Token streaming: fighter and synthesis calls stream from LM Studio only
+# for wishes whose caller forwards the deltas (stream_tokens=True - the SSE
+# endpoint). Stage listeners such as async job progress get plain calls.
+# Like the scheduler priority, the flag is a context variable, so
+# coroutines submitted to the FighterPool inherit it.
+_stream_tokens: ContextVar[bool] = ContextVar("stream_tokens", default=False)
+
+
+@contextmanager
+def token_streaming(enabled: bool):
+    """Stream the enclosed LM calls' tokens to on_event (when enabled)."""
+    token = _stream_tokens.set(enabled)
+    try:
+        yield
+    finally:
+        _stream_tokens.reset(token)
 
 # SSH Configuration (for agent mode)
 SSH_HOSTS = {
@@ -56,13 +175,41 @@ class Fighter:
     model: str
     temperature: float
     persona: str
-    context_length: int = 32768
+    context_length: int = DEFAULT_CONTEXT_LENGTH  # tokens loaded in LM Studio (fallback when it does not report it)
     max_tokens: int = 2048
 
 # Custom exception used to signal an external cancellation request
 class WishCancelled(Exception):
     pass
 
+class CouncilQuorum:
+    """Early-quorum policy for one wish, plus the warriors it cut off."""
+
+    def __init__(self, k: int, deadline: Optional[float] = None, stragglers: str = "cancel",
+                 required: Tuple[str, ...] = QUORUM_REQUIRED):
+        if stragglers not in ("cancel", "addenda"):
+            raise ValueError(f"Unknown straggler policy: {stragglers}")
+        self.k = k
+        self.deadline = deadline
+        self.required = tuple(required)
+        self.keep_stragglers = stragglers == "addenda"
+        self.cut_off: List[str] = []
+        self.pending: Dict[str, "asyncio.Future"] = {}  # name -> still-running task (addenda)
+
+    @classmethod
+    def for_power_mode(cls, power_mode: str) -> Optional["CouncilQuorum"]:
+        policy = QUORUM_POLICIES.get(power_mode)
+        return cls(**policy) if policy else None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "deadline": self.deadline,
+            "required": list(self.required),
+            "stragglers": "addenda" if self.keep_stragglers else "cancel",
+            "cut_off": list(self.cut_off)
+        }
+
 # The 6 DBZ-Warriors
 FIGHTERS = [
     Fighter(
@@ -71,6 +218,7 @@ FIGHTERS = [
         "Adaptive Warrior & Growth Catalyst",
         "Goku-deepseek-coder-v2-lite-instruct",
         0.7,
+        context_length=8192,
         persona="Energetic Saiyan hero who speaks with upbeat encouragement, references training and growth, keeps things simple and motivational while still giving concrete guidance."
     ),
     Fighter(
@@ -79,6 +227,7 @@ FIGHTERS = [
         "Technical Authority",
         "Vegeta-llama-3.2-3b-instruct",
         0.3,
+        context_length=4096,
         persona="Proud Saiyan prince with sharp sarcasm; delivers precise technical insights, battle metaphors, and confident critiques without losing professionalism."
     ),
     Fighter(
@@ -87,6 +236,7 @@ FIGHTERS = [
         "Strategic Sage",
         "Piccolo-qwen2.5-coder-7b-instruct",
         0.5,
+        context_length=8192,
         persona="Calm Namekian tactician who analyzes situations methodically, balances offense/defense, and offers stepwise strategies with disciplined tone."
     ),
     Fighter(
@@ -95,6 +245,7 @@ FIGHTERS = [
         "Risk Sentinel",
         "Gohan-mistral-7b-instruct-v0.3",
         0.4,
+        context_length=8192,
         persona="Thoughtful scholar-warrior focused on risk, safeguards, and preparedness; careful tone, highlights edge cases and mitigation paths."
     ),
     Fighter(
@@ -103,6 +254,7 @@ FIGHTERS = [
         "Practical Engineer",
         "Krillin-phi-3-mini-128k-instruct",
         0.6,
+        context_length=4096,
         persona="Down-to-earth human engineer with hands-on tips, light humor, and actionable checklists aimed at quick wins and reliability."
     ),
     Fighter(
@@ -111,6 +263,7 @@ FIGHTERS = [
         "Chaos Tyrant",
         "Frieza-phi-3-mini-128k-instruct",
         0.9,
+        context_length=4096,
         persona="Elegant villain who relishes controlled chaos; offers cunning insights, hints at domination, yet remains begrudgingly helpful."
     ),
 ]
@@ -148,35 +301,49 @@ DANGEROUS_COMMANDS = [
 ]
 
 # ============================================================================
-# PARALLEL EXECUTION FUNCTION (ProcessPoolExecutor compatible)
+# ASYNC FIGHTER CALLS (fanned out on the FighterPool event loop)
 # ============================================================================
 
-def build_persona_prompt(fighter_source) -> str:
-    """Create persona instructions for a fighter."""
-    if isinstance(fighter_source, dict):
-        name = fighter_source.get("name")
-        emoji = fighter_source.get("emoji")
-        role = fighter_source.get("role")
-        persona = fighter_source.get("persona", "")
-    else:
-        name = getattr(fighter_source, "name")
-        emoji = getattr(fighter_source, "emoji")
-        role = getattr(fighter_source, "role")
-        persona = getattr(fighter_source, "persona", "")
+class RagContext(str):
+    """
+    Formatted RAG context. Behaves as the plain prompt string everywhere,
+    but keeps its labelled chunks (best first) so a context budget can drop
+    the lowest ranked ones for small-window models.
+    """
 
-    return f"""You are {name} {emoji}, {role}.
+    chunks: List[str]
 
-Personality Profile:
-{persona}
+    def __new__(cls, chunks: List[str]):
+        text = "**KNOWLEDGE BASE CONTEXT:**\n" + "\n\n".join(chunks) + "\n\n" if chunks else ""
+        context = super().__new__(cls, text)
+        context.chunks = list(chunks)
+        return context
 
-Communication Guidelines:
-- Stay fully in-character with Dragon Ball tone and references.
-- Speak in first person, weaving brief character flavor before diving into advice.
-- Deliver concise, actionable guidance with clear steps or bullet lists when helpful.
-- Avoid generic AI disclaimers; focus on decisive insight tailored to the user's question.
-- Keep the main response under 350 words while remaining informative and practical.
 
-MCP Directive Protocol:
+def fit_context(fighter_data: dict, user_query: str, context: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Trim RAG context to the fighter's window: context_length minus max_tokens,
+    minus the persona and the question. Returns (context, token report).
+    """
+    chunks = list(getattr(context, "chunks", [context] if context else []))
+    kept, budget = plan_prompt(
+        fighter_data['model'],
+        fighter_data.get('context_length', DEFAULT_CONTEXT_LENGTH),
+        fighter_data.get('max_tokens', 2048),
+        fixed={
+            "system": persona_system_prompt(fighter_data),
+            "question": build_user_content(user_query)
+        },
+        ranked=chunks
+    )
+    if isinstance(context, RagContext):
+        return RagContext(kept), budget
+    return "".join(kept), budget
+
+
+# Stable tail of every persona prompt. A plain string on purpose: the JSON
+# example's braces must reach the model verbatim.
+MCP_DIRECTIVE_PROTOCOL = """MCP Directive Protocol:
 - Whenever you need to run automation (read/write files, run commands, inspect repos, etc.), emit a JSON directive inside a fenced code block exactly like:
 ```json
 {
@@ -184,7 +351,7 @@ MCP Directive Protocol:
   "summary": "Short recap of current progress or need.",
   "directives": [
     {
-      "tool": "run_command|read_file|write_file|search_files|list_directory|get_system_info",
+      "tool": "run_command|read_file|write_file|search_files|list_directory|get_system_info|tail_log",
       "vm": "<VM150_IP>",
       "path": "/var/www/shenron.lightspeedup.com/script-fixed.js",
       "command": "git pull",
@@ -205,112 +372,287 @@ MCP Directive Protocol:
 }
 ```
 - `directives` may contain up to 5 actions per response. Omit unused fields. Every directive MUST include `tool`, `vm`, and either `command` or `path` depending on the tool.
+- To inspect a log use `tail_log` with `path` (plus optional `pattern` regex or `level` such as "error") rather than `read_file` or `search_files`; its result carries a `cursor` - repeat it with that `cursor` to get only the lines added since.
 - Use VM IPs already documented (e.g., <VM150_IP> for web server, <VM100_IP> for orchestrator).
 - If you have enough information to produce verified results (private keys, proofs), set `"status": "solved"` and describe the artifacts under `"artifacts"`.
 - If a previous attempt failed, return `"status": "blocked"` and suggest alternative hypotheses in `"summary"`.
 - Always keep your narrative explanation separate from the JSON block so humans can read the plan AND machines can parse the directives.
 """
 
+_SYSTEM_PROMPTS: Dict[str, str] = {}
+
+
+def build_persona_prompt(fighter_source) -> str:
+    """Create persona instructions for a fighter."""
+    if isinstance(fighter_source, dict):
+        name = fighter_source.get("name")
+        emoji = fighter_source.get("emoji")
+        role = fighter_source.get("role")
+        persona = fighter_source.get("persona", "")
+    else:
+        name = getattr(fighter_source, "name")
+        emoji = getattr(fighter_source, "emoji")
+        role = getattr(fighter_source, "role")
+        persona = getattr(fighter_source, "persona", "")
+
+    return f"""You are {name} {emoji}, {role}.
+
+Personality Profile:
+{persona}
+
+Communication Guidelines:
+- Stay fully in-character with Dragon Ball tone and references.
+- Speak in first person, weaving brief character flavor before diving into advice.
+- Deliver concise, actionable guidance with clear steps or bullet lists when helpful.
+- Avoid generic AI disclaimers; focus on decisive insight tailored to the user's question.
+- Keep the main response under 350 words while remaining informative and practical.
+
+""" + MCP_DIRECTIVE_PROTOCOL
+
+
+def persona_system_prompt(fighter_source) -> str:
+    """Persona prompt built once per fighter and reused byte-for-byte (prefix cache friendly)."""
+    name = fighter_source.get("name") if isinstance(fighter_source, dict) else fighter_source.name
+    prompt = _SYSTEM_PROMPTS.get(name)
+    if prompt is None:
+        prompt = _SYSTEM_PROMPTS.setdefault(name, build_persona_prompt(fighter_source))
+    return prompt
+
+
+def precompute_system_prompts(fighters: List[Fighter]) -> Dict[str, str]:
+    return {fighter.name: persona_system_prompt(fighter) for fighter in fighters}
+
 
-def query_fighter_parallel(fighter_data: dict, user_query: str, context: str) -> dict:
+def build_fighter_prompt(fighter_source, user_query: str, context: str = "") -> str:
+    """Assemble persona, optional RAG context and the question into one prompt (single layout)."""
+    return f"{persona_system_prompt(fighter_source)}\n{build_user_content(user_query, context)}"
+
+
+def build_user_content(user_query: str, context: str = "") -> str:
+    """The per-query part of a fighter prompt: optional RAG context and the question."""
+    if context:
+        return (
+            f"KNOWLEDGE BASE INTEL:\n{context}\n\n"
+            f"USER QUESTION:\n{user_query}\n\n"
+            f"Provide your expert analysis:"
+        )
+    return (
+        f"USER QUESTION:\n{user_query}\n\n"
+        f"Provide your expert analysis:"
+    )
+
+
+def build_fighter_messages(fighter_source, user_query: str, context: str = "",
+                           layout: Optional[str] = None) -> List[Dict[str, str]]:
     """
-    Standalone function for parallel execution (ProcessPoolExecutor compatible)
-    
-    This function is designed to work with ProcessPoolExecutor by being:
-    1. A module-level function (not a class method)
-    2. Using only picklable arguments
-    3. Self-contained with all necessary imports
-    
+    Chat messages for a fighter call. The "system" layout sends the stable
+    persona as its own system message so backends with KV/prefix caching
+    only process the variable user content per call.
+    """
+    layout = layout or PROMPT_LAYOUT
+    if layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Unknown prompt layout: {layout}")
+    if layout == "single":
+        return [{"role": "user", "content": build_fighter_prompt(fighter_source, user_query, context)}]
+    return [
+        {"role": "system", "content": persona_system_prompt(fighter_source)},
+        {"role": "user", "content": build_user_content(user_query, context)}
+    ]
+
+
+async def complete_chat(client: AsyncLMStudioClient, model: str, messages: List[Dict[str, str]],
+                        temperature: float, max_tokens: int, timeout: float,
+                        on_token: Optional[Callable[[str], None]] = None) -> str:
+    """Return the full completion text; stream deltas to on_token when given."""
+    if on_token is None:
+        data = await client.chat_completion(
+            model=model, messages=messages, temperature=temperature,
+            max_tokens=max_tokens, timeout=timeout
+        )
+        return data['choices'][0]['message']['content']
+
+    parts: List[str] = []
+    async for delta in client.stream_chat_completion(
+        model=model, messages=messages, temperature=temperature,
+        max_tokens=max_tokens, timeout=timeout
+    ):
+        parts.append(delta)
+        on_token(delta)
+    return "".join(parts)
+
+
+async def query_fighter_async(client: AsyncLMStudioClient, fighter_data: dict, user_query: str,
+                              context: str, timeout: float = FIGHTER_TIMEOUT,
+                              on_token: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Query one warrior over the shared keep-alive session.
+
     Args:
+        client: Pooled LM Studio client owned by the FighterPool
         fighter_data: Dict with fighter attributes
         user_query: User's question
         context: RAG context
-    
+        timeout: Per-call timeout in seconds
+        on_token: Optional callback receiving streamed content deltas
+
     Returns:
-        Dict with fighter response
+        Dict with fighter response (same shape for council and single calls)
     """
-    import requests
-    import time
-    
     start_time = time.time()
-    
-    # Build prompt
-    persona_prompt = build_persona_prompt(fighter_data)
-
-    if context:
-        prompt = f"""{persona_prompt}
+    context, budget = fit_context(fighter_data, user_query, context)
+    messages = build_fighter_messages(fighter_data, user_query, context)
 
-KNOWLEDGE BASE INTEL:
-{context}
+    try:
+        answer = await complete_chat(
+            client,
+            model=fighter_data['model'],
+            messages=messages,
+            temperature=fighter_data['temperature'],
+            max_tokens=fighter_data.get('max_tokens', 2048),
+            timeout=timeout,
+            on_token=on_token
+        )
+        return {
+            "fighter": fighter_data['name'],
+            "emoji": fighter_data['emoji'],
+            "role": fighter_data['role'],
+            "answer": answer,
+            "success": True,
+            "response_time": time.time() - start_time,
+            "temperature": fighter_data['temperature'],
+            "model": fighter_data['model'],
+            "prompt_budget": budget
+        }
 
-USER QUESTION:
-{user_query}
+    except LMStudioError as e:
+        return {
+            "fighter": fighter_data['name'],
+            "emoji": fighter_data['emoji'],
+            "role": fighter_data['role'],
+            "answer": f"Error: HTTP {e.status}",
+            "success": False,
+            "response_time": time.time() - start_time,
+            "prompt_budget": budget
+        }
 
-Provide your expert analysis:"""
-    else:
-        prompt = f"""{persona_prompt}
-USER QUESTION:
-{user_query}
+    except asyncio.CancelledError:
+        raise
 
-Provide your expert analysis:"""
-    
-    try:
-        response = requests.post(
-            "http://<VM100_IP>:1234/v1/chat/completions",  # Hardcoded for subprocess compatibility
-            json={
-                "model": fighter_data['model'],
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": fighter_data['temperature'],
-                "max_tokens": fighter_data.get('max_tokens', 2048)
-            },
-            timeout=300
-        )
-        
-        elapsed_time = time.time() - start_time
-        
-        if response.status_code == 200:
-            data = response.json()
-            answer = data['choices'][0]['message']['content']
-            return {
-                "fighter": fighter_data['name'],
-                "emoji": fighter_data['emoji'],
-                "role": fighter_data['role'],
-                "answer": answer,
-                "success": True,
-                "response_time": elapsed_time
-            }
-        else:
-            return {
-                "fighter": fighter_data['name'],
-                "emoji": fighter_data['emoji'],
-                "role": fighter_data['role'],
-                "answer": f"Error: HTTP {response.status_code}",
-                "success": False,
-                "response_time": elapsed_time
-            }
-    
     except Exception as e:
         return {
             "fighter": fighter_data['name'],
             "emoji": fighter_data['emoji'],
             "role": fighter_data['role'],
-            "answer": f"Error: {str(e)}",
+            "answer": f"Error: {str(e) or e.__class__.__name__}",
             "success": False,
-            "response_time": time.time() - start_time
+            "response_time": time.time() - start_time,
+            "prompt_budget": budget
         }
 
 
+async def digest_answer(client: AsyncLMStudioClient, response: dict, user_query: str) -> str:
+    """Compress one warrior answer into terse key points for the synthesis prompt."""
+    prompt = f"""Compress the answer below into at most 6 terse bullet points.
+Keep every concrete fact: commands, paths, numbers, hostnames, IPs, model names, warnings.
+Drop pleasantries and repetition. Output only the bullets.
+
+QUESTION:
+{user_query}
+
+ANSWER FROM {response['fighter']} ({response['role']}):
+{response['answer']}"""
+    return await complete_chat(
+        client,
+        model=response.get('model') or SYNTHESIS_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2,
+        max_tokens=DIGEST_MAX_TOKENS,
+        timeout=COUNCIL_FIGHTER_TIMEOUT
+    )
+
+
+class SynthesisDigests:
+    """
+    Key-point digests of one wish's warrior answers, started the moment each
+    warrior finishes. Thread-safe: submit() may be called from the pool loop
+    or from a blocking caller.
+    """
+
+    def __init__(self, fighter_pool: FighterPool, client: AsyncLMStudioClient, user_query: str):
+        self.fighter_pool = fighter_pool
+        self.client = client
+        self.user_query = user_query
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"mode": "pipelined"}
+
+    def submit(self, response: Dict[str, Any]):
+        if not response.get("success"):
+            return
+        name = response["fighter"]
+        with self._lock:
+            if name in self._futures:
+                return
+            if len(response["answer"]) < DIGEST_MIN_CHARS:
+                future: Future = Future()
+                future.set_result(response["answer"])
+            else:
+                future = asyncio.run_coroutine_threadsafe(
+                    digest_answer(self.client, response, self.user_query), self.fighter_pool.start()
+                )
+            self._futures[name] = future
+
+    def collect(self, names: List[str], timeout: float = DIGEST_WAIT) -> Dict[str, str]:
+        """Wait (bounded) for the named digests; missing/failed ones are left out."""
+        deadline = time.time() + timeout
+        digests = {}
+        for name in names:
+            with self._lock:
+                future = self._futures.get(name)
+            if future is None:
+                continue
+            try:
+                digest = future.result(timeout=max(0.0, deadline - time.time()))
+            except (FutureTimeout, CancelledError, Exception):
+                continue
+            if digest and digest.strip():
+                digests[name] = digest.strip()
+        return digests
+
+    def cancel_pending(self):
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+
+
+def _similarity(a, b) -> float:
+    """Cosine similarity of two dense vectors or two term-count Counters."""
+    if isinstance(a, Counter):
+        dot = sum(count * b.get(term, 0) for term, count in a.items())
+        norm_a = sum(c * c for c in a.values()) ** 0.5
+        norm_b = sum(c * c for c in b.values()) ** 0.5
+    else:
+        dot = sum(x * y for x, y in zip(a, b))
+        norm_a = sum(x * x for x in a) ** 0.5
+        norm_b = sum(y * y for y in b) ** 0.5
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
 class ShenronOrchestrator:
     """The Eternal Dragon that grants wishes through AI consensus + TRUE synthesis + Agent mode"""
 
     def __init__(self):
         """Initialize SHENRON with RAG and SSH capabilities"""
+        # Process-wide embedding model + query embedding LRU (shared with the API)
+        self.embedding_service = get_embedding_service(EMBEDDING_MODEL)
+
         # Initialize ChromaDB client
+        self.embedding_function = None
         try:
             self.chroma_client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
-            self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name=EMBEDDING_MODEL
-            )
+            self.embedding_function = self.embedding_service.embedding_function
             self.collection = self.chroma_client.get_collection(
                 name="knowledge_base",
                 embedding_function=self.embedding_function
@@ -318,8 +660,97 @@ class ShenronOrchestrator:
         except Exception as e:
             self.collection = None
 
-        # Initialize SSH connections (lazy loading)
-        self.ssh_connections = {}
+        # Hybrid BM25 + vector retrieval (falls back to vector-only without an index)
+        self.retriever = (
+            HybridRetriever(self.collection, BM25_INDEX_PATH, embedder=self.embedding_service)
+            if self.collection else None
+        )
+
+        # Keep-alive SSH transports per host (connected lazily, shared with the MCP tools)
+        self.ssh_pool = get_ssh_pool()
+
+        # Fighter pool: one event loop + keep-alive sessions reused by every wish
+        self.fighter_pool = FighterPool(
+            LM_STUDIO_API,
+            max_connections=LM_STUDIO_MAX_CONNECTIONS,
+            max_concurrent_wishes=MAX_CONCURRENT_WISHES,
+            model_slots=LM_MODEL_SLOTS,
+            default_model_slots=LM_DEFAULT_MODEL_SLOTS,
+            max_active_generations=LM_MAX_ACTIVE_GENERATIONS,
+            backends=LM_BACKENDS
+        )
+        self.lm_client = self.fighter_pool.client
+
+        # Persona system prompts are built once; every call reuses the same bytes
+        self.system_prompts = precompute_system_prompts(FIGHTERS)
+        # Speculative cascade totals (per-wish numbers are in each result)
+        self._stats_lock = threading.Lock()
+        self.speculation_stats = {
+            "mode": SPECULATION_MODE,
+            "wishes": 0,
+            "launched": 0,
+            "used": 0,
+            "cancelled": 0,
+            "time_saved_total": 0.0,
+            "wasted_time_total": 0.0
+        }
+
+        # Answer cache in front of grant_wish (exact + embedding similarity);
+        # shares query embeddings with retrieval through the embedding service
+        self.answer_cache = AnswerCache(embed_fn=self.embedding_service if self.embedding_function else None)
+
+        # Lightning fast path: retrieval cache and latency against the SLO
+        self._rag_cache: "OrderedDict[str, Tuple[float, Tuple[str, List[str], Dict[str, Any]]]]" = OrderedDict()
+        self._lightning_latencies: "deque[float]" = deque(maxlen=LIGHTNING_LATENCY_WINDOW)
+        self.lightning_stats = {
+            "wishes": 0,
+            "cache_hits": 0,
+            "rag_cache_hits": 0,
+            "slo_missed": 0,
+            "failed": 0
+        }
+
+    def shutdown(self):
+        """Release long-lived resources (fighter pool, HTTP sessions, SSH transports)."""
+        self.fighter_pool.shutdown()
+        self.ssh_pool.close_all()
+
+    def context_length_for(self, fighter: Fighter) -> int:
+        """Window the fighter's model is loaded with: as reported by LM Studio, else configured."""
+        return self.fighter_pool.backends.context_length(fighter.model) or fighter.context_length
+
+    @property
+    def synthesis_context_length(self) -> int:
+        """Synthesis runs on GOKU's weights, so its insights are fit to GOKU's window."""
+        reported = self.fighter_pool.backends.context_length(SYNTHESIS_MODEL)
+        return reported or self.context_length_for(self.get_fighter(SYNTHESIS_FIGHTER))
+
+    @staticmethod
+    def _emit(on_event: Optional[Callable[[Dict[str, Any]], None]], event_type: str, **payload):
+        """Deliver a progress/stream event; a failing listener never breaks a wish."""
+        if on_event is None:
+            return
+        try:
+            on_event({"type": event_type, "timestamp": time.time(), **payload})
+        except Exception:
+            pass
+
+    def _token_sink(self, on_event: Optional[Callable[[Dict[str, Any]], None]],
+                    event_type: str, source: str) -> Optional[Callable[[str], None]]:
+        """Build an on_token callback that forwards deltas as events (None = no streaming)."""
+        if on_event is None or not _stream_tokens.get():
+            return None
+        return lambda delta: self._emit(on_event, event_type, fighter=source, delta=delta)
+
+    @staticmethod
+    def _response_summary(response: Dict[str, Any]) -> Dict[str, Any]:
+        """Event payload for a finished warrior (answer already streamed as tokens)."""
+        return {
+            "fighter": response.get("fighter"),
+            "emoji": response.get("emoji"),
+            "success": response.get("success"),
+            "response_time": response.get("response_time")
+        }
 
     def get_fighter(self, name: str) -> Fighter:
         for fighter in FIGHTERS:
@@ -343,121 +774,103 @@ class ShenronOrchestrator:
     def is_long_query(user_query: str) -> bool:
         return len(user_query.strip()) > CRITICAL_LENGTH_THRESHOLD
 
-    def search_knowledge_base(self, query: str, n_results: int = 3) -> str:
+    def search_knowledge_base(self, query: str, n_results: int = 3, rerank: bool = False) -> str:
         """Search the knowledge base for relevant context."""
-        if not self.collection:
-            return ""
+        context, _, _ = self.retrieve_context(query, n_results=n_results, rerank=rerank)
+        return context
+
+    def retrieve_context(self, query: str, n_results: int = 3,
+                         rerank: bool = False) -> Tuple[str, List[str], Dict[str, Any]]:
+        """
+        Hybrid search of the knowledge base.
+        Returns (formatted context, chunk IDs, retrieval stats incl. per-stage timings).
+        """
+        if not self.retriever:
+            return "", [], {}
 
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
+            results = self.retriever.search(query, n_results=n_results, rerank=rerank)
+            retrieval = {"mode": results["mode"], "timings": results["timings"]}
 
-            if not results['documents'] or not results['documents'][0]:
-                return ""
+            if not results['documents']:
+                return "", [], retrieval
 
             context_parts = []
-            for i, doc in enumerate(results['documents'][0]):
-                source = results['metadatas'][0][i]['source']
-                context_parts.append(f"[{source}] {doc}")
+            for doc, metadata in zip(results['documents'], results['metadatas']):
+                source = metadata['source']
+                heading_path = metadata.get('heading_path')
+                label = f"{source} > {heading_path}" if heading_path else source
+                context_parts.append(f"[{label}] {doc}")
 
-            context = "\n\n".join(context_parts)
-            return f"**KNOWLEDGE BASE CONTEXT:**\n{context}\n\n"
+            return RagContext(context_parts), results['ids'], retrieval
 
         except Exception as e:
-            return ""
+            return "", [], {"error": str(e)}
 
-    def query_fighter(self, fighter: Fighter, user_query: str, context: str = "") -> Dict[str, Any]:
+    def query_fighter(self, fighter: Fighter, user_query: str, context: str = "",
+                      cancel_checker: Optional[Callable[[], bool]] = None,
+                      on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      timeout: float = FIGHTER_TIMEOUT) -> Dict[str, Any]:
         """Query a single DBZ-Warrior."""
-        start_time = time.time()
-
-        if context:
-            prompt = (
-                f"{build_persona_prompt(fighter)}\n"
-                f"KNOWLEDGE BASE INTEL:\n{context}\n\n"
-                f"USER QUESTION:\n{user_query}\n\n"
-                f"Provide your expert analysis:"
-            )
-        else:
-            prompt = (
-                f"{build_persona_prompt(fighter)}\n"
-                f"USER QUESTION:\n{user_query}\n\n"
-                f"Provide your expert analysis:"
-            )
-
         try:
-            response = requests.post(
-                f"{LM_STUDIO_API}/chat/completions",
-                json={
-                    "model": fighter.model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": fighter.temperature,
-                    "max_tokens": fighter.max_tokens
-                },
-                timeout=900
+            response = self.fighter_pool.run(
+                query_fighter_async(
+                    self.lm_client, self._fighter_payload(fighter), user_query, context, timeout=timeout,
+                    on_token=self._token_sink(on_event, "warrior_token", fighter.name)
+                ),
+                cancel_checker=cancel_checker
             )
+        except CancelledError:
+            raise WishCancelled()
 
-            elapsed_time = time.time() - start_time
-
-            if response.status_code == 200:
-                data = response.json()
-                answer = data['choices'][0]['message']['content']
-
-                return {
-                    "fighter": fighter.name,
-                    "emoji": fighter.emoji,
-                    "role": fighter.role,
-                    "answer": answer,
-                    "success": True,
-                    "response_time": elapsed_time,
-                    "temperature": fighter.temperature,
-                    "model": fighter.model
-                }
-            else:
-                return {
-                    "fighter": fighter.name,
-                    "emoji": fighter.emoji,
-                    "role": fighter.role,
-                    "answer": f"Error: HTTP {response.status_code}",
-                    "success": False,
-                    "response_time": elapsed_time
-                }
+        self._emit(on_event, "warrior_done", **self._response_summary(response))
+        return response
 
-        except Exception as e:
-            return {
-                "fighter": fighter.name,
-                "emoji": fighter.emoji,
-                "role": fighter.role,
-                "answer": f"Error: {str(e)}",
-                "success": False,
-                "response_time": time.time() - start_time
-            }
-
-    def synthesize_responses(self, user_query: str, responses: List[Dict[str, Any]]) -> str:
+    def synthesize_responses(self, user_query: str, responses: List[Dict[str, Any]],
+                             on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             digests: Optional[SynthesisDigests] = None,
+                             stats: Optional[Dict[str, Any]] = None) -> str:
         """
         NEW v4.0: TRUE SYNTHESIS - 7th AI call to create unified response
         Uses GOKU as synthesis engine
+
+        With digests (pipelined mode) each warrior contributes its key
+        points instead of its full answer; warriors whose digest is not
+        ready within DIGEST_WAIT fall back to the full answer.
+
+        The insights share what is left of GOKU's context window evenly;
+        the token report lands in stats["prompt_budget"].
         """
         successful = [r for r in responses if r["success"]]
         
         if len(successful) == 0:
             return "The council was unable to provide guidance on this matter."
 
+        key_points: Dict[str, str] = {}
+        if digests is not None:
+            wait_start = time.time()
+            key_points = digests.collect([r['fighter'] for r in successful])
+            digests.stats["digest_wait"] = round(time.time() - wait_start, 3)
+            digests.stats["digested"] = sorted(key_points)
+
         # Build synthesis prompt
-        synthesis_prompt = f"""You are SHENRON, the Eternal Dragon and orchestrator of the AI Council.
+        synthesis_header = f"""You are SHENRON, the Eternal Dragon and orchestrator of the AI Council.
 
 USER'S QUESTION:
 {user_query}
 
-The 6 DBZ-Warriors have provided their insights:
+The 6 DBZ-Warriors have provided their insights{" (condensed to key points)" if key_points else ""}:
 
 """
-        
-        for resp in successful:
-            synthesis_prompt += f"---\n{resp['emoji']} {resp['fighter']} ({resp['role']}):\n{resp['answer']}\n\n"
 
-        synthesis_prompt += """---
+        full_answers_chars = sum(len(resp['answer']) for resp in successful)
+        insights = [
+            f"---\n{resp['emoji']} {resp['fighter']} ({resp['role']}):\n"
+            f"{key_points.get(resp['fighter'], resp['answer'])}\n\n"
+            for resp in successful
+        ]
+
+        synthesis_task = """---
 
 YOUR TASK:
 Read ALL warrior responses above and synthesize them into ONE unified, coherent answer that:
@@ -471,25 +884,35 @@ Do NOT just repeat one warrior's response. Create a TRUE synthesis.
 
 SHENRON's Unified Response:"""
 
+        insights, budget = plan_prompt(
+            SYNTHESIS_MODEL,
+            self.synthesis_context_length,
+            SYNTHESIS_MAX_TOKENS,
+            fixed={"question": synthesis_header, "task": synthesis_task},
+            shared=insights
+        )
+        synthesis_prompt = synthesis_header + "".join(insights) + synthesis_task
+        if stats is not None:
+            stats["prompt_budget"] = budget
+
+        if digests is not None:
+            digest_chars = sum(len(key_points.get(r['fighter'], r['answer'])) for r in successful)
+            digests.stats["prompt_chars"] = len(synthesis_prompt)
+            digests.stats["prompt_chars_saved"] = full_answers_chars - digest_chars
+
         # Call GOKU for synthesis
+        self._emit(on_event, "synthesis_start", fighters=[r['fighter'] for r in successful],
+                   digested=sorted(key_points))
         try:
-            response = requests.post(
-                f"{LM_STUDIO_API}/chat/completions",
-                json={
-                    "model": "deepseek-coder-v2-lite-instruct",  # GOKU's model
-                    "messages": [{"role": "user", "content": synthesis_prompt}],
-                    "temperature": 0.6,  # Balanced for synthesis
-                    "max_tokens": 4096  # Allow longer synthesis
-                },
-                timeout=900
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                synthesized = data['choices'][0]['message']['content']
-                return synthesized
-            else:
-                return self._fallback_synthesis(successful)
+            return self.fighter_pool.run(complete_chat(
+                self.lm_client,
+                model=SYNTHESIS_MODEL,
+                messages=[{"role": "user", "content": synthesis_prompt}],
+                temperature=0.6,  # Balanced for synthesis
+                max_tokens=SYNTHESIS_MAX_TOKENS,  # Allow longer synthesis
+                timeout=FIGHTER_TIMEOUT,
+                on_token=self._token_sink(on_event, "synthesis_token", "SHENRON")
+            ))
 
         except Exception as e:
             return self._fallback_synthesis(successful)
@@ -506,21 +929,33 @@ SHENRON's Unified Response:"""
         
         return "The council provides these insights:\n\n" + "\n\n".join(parts)
 
+    def _fighter_payload(self, fighter: Fighter) -> Dict[str, Any]:
+        """Convert a Fighter to the plain dict consumed by query_fighter_async."""
+        return {
+            "name": fighter.name,
+            "emoji": fighter.emoji,
+            "role": fighter.role,
+            "model": fighter.model,
+            "temperature": fighter.temperature,
+            "persona": fighter.persona,
+            "context_length": self.context_length_for(fighter),
+            "max_tokens": fighter.max_tokens,
+        }
+
     def consult_council(self, user_query: str, use_rag: bool = True,
-                        cancel_checker: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
-        """
-        Consult all 6 DBZ-Warriors in PARALLEL using ProcessPoolExecutor.
-        
-        v4.1 PERFORMANCE FIX:
-        - Changed from ThreadPoolExecutor to ProcessPoolExecutor
-        - TRUE parallel execution (6 separate Python processes)
-        - Bypasses Python GIL (Global Interpreter Lock)
-        - Expected: 4-6x faster (60s → 10-30s)
+                        cancel_checker: Optional[Callable[[], bool]] = None,
+                        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                        quorum: Optional[CouncilQuorum] = None) -> Dict[str, Any]:
         """
-        def cancelled() -> bool:
-            return bool(cancel_checker and cancel_checker())
+        Consult all 6 DBZ-Warriors CONCURRENTLY on the fighter pool event loop.
 
-        if cancelled():
+        v4.2 PERFORMANCE FIX:
+        - Fighter calls are I/O-bound: coroutines instead of one process each
+        - One keep-alive session per LM Studio endpoint (no TCP setup per call)
+        - Concurrent wishes share the loop with bounded admission
+        - Optional early quorum: return once quorum.k warriors answered
+        """
+        if cancel_checker and cancel_checker():
             raise WishCancelled()
 
         # Step 1: RAG Search
@@ -528,189 +963,379 @@ SHENRON's Unified Response:"""
         if use_rag:
             context = self.search_knowledge_base(user_query, n_results=3)
 
-        # Step 2: Prepare fighter data for parallel execution
-        # Convert Fighter objects to dicts (picklable)
-        fighter_data_list = [
-            {
-                "name": f.name,
-                "emoji": f.emoji,
-                "role": f.role,
-                "model": f.model,
-                "temperature": f.temperature,
-                "persona": f.persona,
-                "max_tokens": f.max_tokens,
-            }
-            for f in FIGHTERS
-        ]
+        # Step 2: Query all warriors in parallel
+        responses = self.consult_subset(user_query, FIGHTERS, context, cancel_checker=cancel_checker,
+                                        on_event=on_event, quorum=quorum,
+                                        needed=quorum.k if quorum else None)
 
-        # Step 3: Query all warriors in parallel (TRUE parallelism!)
-        responses = []
+        return {
+            "query": user_query,
+            "rag_context_used": bool(context),
+            "responses": responses,
+            "success_count": sum(1 for r in responses if r["success"]),
+            "total_fighters": len(FIGHTERS),
+            "cut_off_fighters": list(quorum.cut_off) if quorum else []
+        }
 
-        executor = ProcessPoolExecutor(max_workers=6)
-        futures = {
-            executor.submit(query_fighter_parallel, fighter_data, user_query, context): fighter_data
+    async def _consult_one(self, fighter_data: Dict[str, Any], user_query: str, context: str,
+                           timeout: float = COUNCIL_FIGHTER_TIMEOUT,
+                           on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                           digests: Optional[SynthesisDigests] = None) -> Dict[str, Any]:
+        """Query one warrior on the pool loop and announce it as done."""
+        response = await query_fighter_async(
+            self.lm_client, fighter_data, user_query, context,
+            timeout=timeout,
+            on_token=self._token_sink(on_event, "warrior_token", fighter_data['name'])
+        )
+        self._emit(on_event, "warrior_done", **self._response_summary(response))
+        if digests is not None:
+            digests.submit(response)
+        return response
+
+    async def _fan_out(self, fighter_data_list: List[Dict[str, Any]], user_query: str,
+                       context: str,
+                       on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       quorum: Optional[CouncilQuorum] = None,
+                       needed: Optional[int] = None,
+                       digests: Optional[SynthesisDigests] = None) -> List[Dict[str, Any]]:
+        """
+        Query every listed warrior concurrently on the pool loop.
+        With digests, each answer starts its key-point digest on arrival.
+
+        With a quorum, return as soon as `needed` warriors answered
+        successfully and every listed quorum.required warrior has finished
+        (or the quorum deadline passes); the rest are recorded as cut off
+        and either cancelled or handed to quorum.pending.
+        """
+        loop = asyncio.get_running_loop()
+        tasks = {
+            asyncio.ensure_future(
+                self._consult_one(fighter_data, user_query, context, on_event=on_event, digests=digests)
+            ): fighter_data
             for fighter_data in fighter_data_list
         }
+        pending = set(tasks)
 
         try:
-            for future in as_completed(futures):
-                if cancelled():
-                    for f in futures:
-                        f.cancel()
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    raise WishCancelled()
-
-                fighter_data = futures[future]
-                try:
-                    result = future.result()
-                    responses.append(result)
-                except Exception as e:
-                    responses.append({
-                        "fighter": fighter_data['name'],
-                        "emoji": fighter_data['emoji'],
-                        "role": fighter_data['role'],
-                        "answer": f"Error: {str(e)}",
-                        "success": False,
-                        "response_time": 0
-                    })
-        finally:
-            try:
-                executor.shutdown(wait=False, cancel_futures=True)
-            except TypeError:
-                executor.shutdown(wait=False)
+            if quorum is None:
+                await asyncio.wait(pending)
+                pending = set()
+            else:
+                deadline_at = loop.time() + quorum.deadline if quorum.deadline else None
+                required = {task for task, fighter_data in tasks.items() if fighter_data['name'] in quorum.required}
+                successes = 0
+                while pending and (needed is None or successes < needed or not required.isdisjoint(pending)):
+                    timeout = None if deadline_at is None else deadline_at - loop.time()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    done, pending = await asyncio.wait(pending, timeout=timeout,
+                                                       return_when=asyncio.FIRST_COMPLETED)
+                    successes += sum(
+                        1 for task in done
+                        if not task.cancelled() and task.exception() is None and task.result().get("success")
+                    )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
 
-        # Sort by original order
-        response_order = {f.name: i for i, f in enumerate(FIGHTERS)}
-        responses.sort(key=lambda r: response_order.get(r['fighter'], 999))
+        responses = []
+        for task, fighter_data in tasks.items():
+            if task in pending:
+                quorum.cut_off.append(fighter_data['name'])
+                self._emit(on_event, "warrior_cut_off", fighter=fighter_data['name'],
+                           kept_as_addendum=quorum.keep_stragglers)
+                if quorum.keep_stragglers:
+                    quorum.pending[fighter_data['name']] = task
+                else:
+                    task.cancel()
+                continue
 
-        return {
-            "query": user_query,
-            "rag_context_used": bool(context),
-            "responses": responses,
-            "success_count": sum(1 for r in responses if r["success"]),
-            "total_fighters": len(FIGHTERS)
-        }
+            error = None if task.cancelled() else task.exception()
+            if task.cancelled() or error is not None:
+                result = {
+                    "fighter": fighter_data['name'],
+                    "emoji": fighter_data['emoji'],
+                    "role": fighter_data['role'],
+                    "answer": f"Error: {error or 'cancelled'}",
+                    "success": False,
+                    "response_time": 0
+                }
+            else:
+                result = task.result()
+            responses.append(result)
+        return responses
+
+    async def _collect_late(self, quorum: CouncilQuorum) -> List[Dict[str, Any]]:
+        """Take finished stragglers as addenda; cancel the ones still running."""
+        late = []
+        for name, task in list(quorum.pending.items()):
+            if task.done() and not task.cancelled() and task.exception() is None:
+                response = dict(task.result(), late=True)
+                late.append(response)
+            else:
+                task.cancel()
+        quorum.pending.clear()
+        return late
+
+    def collect_late_addenda(self, quorum: Optional[CouncilQuorum]) -> List[Dict[str, Any]]:
+        """Blocking wrapper around _collect_late (no-op without stragglers)."""
+        if quorum is None or not quorum.pending:
+            return []
+        try:
+            return self.fighter_pool.run(self._collect_late(quorum), timeout=5)
+        except Exception:
+            return []
 
     def consult_subset(self, user_query: str, fighters: List[Fighter], context: str,
-                       cancel_checker: Optional[Callable[[], bool]] = None) -> List[Dict[str, Any]]:
+                       cancel_checker: Optional[Callable[[], bool]] = None,
+                       on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       quorum: Optional[CouncilQuorum] = None,
+                       needed: Optional[int] = None,
+                       digests: Optional[SynthesisDigests] = None) -> List[Dict[str, Any]]:
         if not fighters:
             return []
 
         if cancel_checker and cancel_checker():
             raise WishCancelled()
 
-        fighter_data_list = [
-            {
-                "name": f.name,
-                "emoji": f.emoji,
-                "role": f.role,
-                "model": f.model,
-                "temperature": f.temperature,
-                "persona": f.persona,
-                "max_tokens": f.max_tokens,
-            }
-            for f in fighters
-        ]
+        fighter_data_list = [self._fighter_payload(f) for f in fighters]
 
-        responses = []
-        executor = ProcessPoolExecutor(max_workers=len(fighter_data_list))
-        futures = {
-            executor.submit(query_fighter_parallel, fighter_data, user_query, context): fighter_data
-            for fighter_data in fighter_data_list
-        }
+        if not self.fighter_pool.acquire_slot(cancel_checker):
+            raise WishCancelled()
 
         try:
-            for future in as_completed(futures):
-                if cancel_checker and cancel_checker():
-                    for f in futures:
-                        f.cancel()
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    raise WishCancelled()
-
-                fighter_data = futures[future]
-                try:
-                    responses.append(future.result())
-                except Exception as exc:
-                    responses.append({
-                        "fighter": fighter_data['name'],
-                        "emoji": fighter_data['emoji'],
-                        "role": fighter_data['role'],
-                        "answer": f"Error: {exc}",
-                        "success": False,
-                        "response_time": 0
-                    })
+            responses = self.fighter_pool.run(
+                self._fan_out(fighter_data_list, user_query, context, on_event=on_event,
+                              quorum=quorum, needed=needed, digests=digests),
+                cancel_checker=cancel_checker
+            )
+        except CancelledError:
+            raise WishCancelled()
         finally:
-            try:
-                executor.shutdown(wait=False, cancel_futures=True)
-            except TypeError:
-                executor.shutdown(wait=False)
+            self.fighter_pool.release_slot()
 
         response_order = {f.name: i for i, f in enumerate(fighters)}
         responses.sort(key=lambda r: response_order.get(r['fighter'], 999))
         return responses
 
 
-    def cascading_consult(self, user_query: str, use_rag: bool = True,
-                          cancel_checker: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
-        context = ""
-        if use_rag:
-            context = self.search_knowledge_base(user_query, n_results=3)
+    def precheck_validation(self, user_query: str) -> List[str]:
+        """Validation reasons that are known before GOKU answers."""
+        reasons = []
+        risk_hit, risks = self.contains_risk_keywords(user_query)
+        if risk_hit:
+            reasons.append(f"Risk keywords detected: {', '.join(risks)}")
+        if self.is_long_query(user_query):
+            reasons.append("Query length exceeds safe threshold.")
+        return reasons
 
-        validation_reasons: List[str] = []
+    def answer_validation(self, goku: Dict[str, Any]) -> List[str]:
+        """Validation reasons that depend on GOKU's answer."""
+        if not goku["success"]:
+            return ["Primary warrior failed to answer."]
+        low_confidence_flag, low_confidence = self.looks_low_confidence(goku["answer"])
+        if low_confidence_flag:
+            return [f"Low confidence language: {', '.join(low_confidence)}"]
+        return []
+
+    async def _speculative_consult(self, goku_data: Dict[str, Any], secondary_data: List[Dict[str, Any]],
+                                   user_query: str, context: str, forced: bool,
+                                   on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                   quorum: Optional[CouncilQuorum] = None,
+                                   digests: Optional[SynthesisDigests] = None) -> Dict[str, Any]:
+        """
+        Run GOKU and the secondary council side by side. Unless validation
+        was already forced, the council is cancelled once GOKU's answer
+        proves confident.
+        """
+        council_start = time.time()
+        council_done_at: List[float] = []
 
-        if cancel_checker and cancel_checker():
-            raise WishCancelled()
+        async def council() -> List[Dict[str, Any]]:
+            responses = await self._fan_out(secondary_data, user_query, context, on_event=on_event,
+                                            quorum=quorum, needed=quorum.k - 1 if quorum else None,
+                                            digests=digests)
+            council_done_at.append(time.time())
+            return responses
 
-        goku = self.query_fighter(self.get_fighter("GOKU"), user_query, context)
+        council_task = asyncio.ensure_future(council())
+        try:
+            goku = await self._consult_one(goku_data, user_query, context,
+                                           timeout=FIGHTER_TIMEOUT, on_event=on_event)
+        except BaseException:
+            council_task.cancel()
+            raise
+        goku_done_at = time.time()
+
+        answer_reasons = self.answer_validation(goku)
+        if forced or answer_reasons:
+            # GOKU's answer will be synthesized - digest it while the council runs
+            if digests is not None:
+                digests.submit(goku)
+            secondary = await council_task
+            return {
+                "goku": goku,
+                "secondary": secondary,
+                "answer_reasons": answer_reasons,
+                "goku_time": goku_done_at - council_start,
+                "council_time": council_done_at[0] - council_start,
+                "cancelled_after": None
+            }
 
-        if not goku["success"]:
-            validation_reasons.append("Primary warrior failed to answer.")
+        council_task.cancel()
+        try:
+            await council_task
+        except asyncio.CancelledError:
+            pass
+        return {
+            "goku": goku,
+            "secondary": None,
+            "answer_reasons": [],
+            "goku_time": goku_done_at - council_start,
+            "council_time": None,
+            "cancelled_after": time.time() - council_start
+        }
 
-        risk_hit, risks = self.contains_risk_keywords(user_query)
-        if risk_hit:
-            validation_reasons.append(f"Risk keywords detected: {', '.join(risks)}")
+    def cascading_consult(self, user_query: str, use_rag: bool = True,
+                          cancel_checker: Optional[Callable[[], bool]] = None,
+                          on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          context: Optional[str] = None,
+                          speculation: Optional[str] = None,
+                          quorum: Optional[CouncilQuorum] = None,
+                          digests: Optional[SynthesisDigests] = None) -> Dict[str, Any]:
+        """
+        GOKU first; the other five warriors validate when the query or
+        GOKU's answer calls for it. With speculation ("forced" / "eager",
+        see SPECULATION_MODE) the council starts together with GOKU, and
+        the result carries a "speculation" block with the time saved.
+        With a quorum the council stops waiting once quorum.k warriors
+        (GOKU included) have answered.
+        """
+        if context is None:
+            context = ""
+            if use_rag:
+                context = self.search_knowledge_base(user_query, n_results=3)
 
-        if self.is_long_query(user_query):
-            validation_reasons.append("Query length exceeds safe threshold.")
+        speculation = speculation or SPECULATION_MODE
+        if speculation not in SPECULATION_MODES:
+            raise ValueError(f"Unknown speculation mode: {speculation}")
 
-        low_confidence = []
-        if goku["success"]:
-            low_confidence_flag, low_confidence = self.looks_low_confidence(goku["answer"])
-            if low_confidence_flag:
-                validation_reasons.append(f"Low confidence language: {', '.join(low_confidence)}")
+        if cancel_checker and cancel_checker():
+            raise WishCancelled()
 
+        pre_reasons = self.precheck_validation(user_query)
+        speculate = speculation == "eager" or (speculation == "forced" and bool(pre_reasons))
+        secondary_fighters = [f for f in FIGHTERS if f.name != "GOKU"]
+        stats: Dict[str, Any] = {"mode": speculation, "launched": speculate, "used": False,
+                                 "cancelled": False, "time_saved": 0.0}
+
+        if speculate:
+            self._emit(on_event, "speculation_start", fighters=[f.name for f in secondary_fighters],
+                       forced=bool(pre_reasons))
+            if not self.fighter_pool.acquire_slot(cancel_checker):
+                raise WishCancelled()
+            try:
+                outcome = self.fighter_pool.run(
+                    self._speculative_consult(
+                        self._fighter_payload(self.get_fighter("GOKU")),
+                        [self._fighter_payload(f) for f in secondary_fighters],
+                        user_query, context, forced=bool(pre_reasons), on_event=on_event,
+                        quorum=quorum, digests=digests
+                    ),
+                    cancel_checker=cancel_checker
+                )
+            except CancelledError:
+                raise WishCancelled()
+            finally:
+                self.fighter_pool.release_slot()
+
+            goku = outcome["goku"]
+            secondary_responses = outcome["secondary"]
+            answer_reasons = outcome["answer_reasons"]
+            stats["goku_time"] = round(outcome["goku_time"], 3)
+            if secondary_responses is not None:
+                # Sequential would have been GOKU, then the council
+                overlapped = outcome["goku_time"] + outcome["council_time"]
+                actual = max(outcome["goku_time"], outcome["council_time"])
+                stats.update(used=True, council_time=round(outcome["council_time"], 3),
+                             time_saved=round(overlapped - actual, 3))
+            else:
+                stats.update(cancelled=True, wasted_time=round(outcome["cancelled_after"], 3))
+                self._emit(on_event, "speculation_cancelled",
+                           fighters=[f.name for f in secondary_fighters])
+        else:
+            goku = self.query_fighter(self.get_fighter("GOKU"), user_query, context,
+                                      cancel_checker=cancel_checker, on_event=on_event)
+            answer_reasons = self.answer_validation(goku)
+            secondary_responses = None
+            if pre_reasons or answer_reasons:
+                if digests is not None:
+                    digests.submit(goku)
+                secondary_responses = self.consult_subset(
+                    user_query, secondary_fighters, context,
+                    cancel_checker=cancel_checker, on_event=on_event,
+                    quorum=quorum, needed=quorum.k - 1 if quorum else None,
+                    digests=digests
+                )
+
+        # Same order as the original cascade: GOKU failure, risks, length, confidence
+        failure_reasons = [r for r in answer_reasons if r.startswith("Primary warrior failed")]
+        confidence_reasons = [r for r in answer_reasons if r not in failure_reasons]
+        validation_reasons = failure_reasons + pre_reasons + confidence_reasons
         requires_validation = len(validation_reasons) > 0
 
         responses = [goku]
         consulted = ["GOKU"]
 
-        if requires_validation:
-            secondary_fighters = [f for f in FIGHTERS if f.name != "GOKU"]
-            secondary_responses = self.consult_subset(user_query, secondary_fighters, context, cancel_checker=cancel_checker)
+        if secondary_responses:
             responses.extend(secondary_responses)
             consulted.extend([resp["fighter"] for resp in secondary_responses])
 
         response_order = {f.name: i for i, f in enumerate(FIGHTERS)}
         responses.sort(key=lambda r: response_order.get(r['fighter'], 999))
 
+        self._record_speculation(stats)
+
         return {
             "responses": responses,
             "validation_required": requires_validation,
             "validation_reasons": validation_reasons,
             "consulted_fighters": consulted,
-            "rag_context_used": bool(context)
+            "rag_context_used": bool(context),
+            "speculation": stats,
+            "cut_off_fighters": list(quorum.cut_off) if quorum else []
         }
 
-
-    def analyze_consensus(self, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze responses to detect consensus."""
+    def _record_speculation(self, stats: Dict[str, Any]):
+        with self._stats_lock:
+            totals = self.speculation_stats
+            totals["wishes"] += 1
+            if stats["launched"]:
+                totals["launched"] += 1
+            if stats["used"]:
+                totals["used"] += 1
+                totals["time_saved_total"] = round(totals["time_saved_total"] + stats["time_saved"], 3)
+            if stats["cancelled"]:
+                totals["cancelled"] += 1
+                totals["wasted_time_total"] = round(totals["wasted_time_total"] + stats["wasted_time"], 3)
+
+    def analyze_consensus(self, responses: List[Dict[str, Any]],
+                          cut_off: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Analyze responses to detect consensus.
+        Warriors cut off by an early quorum did not fail - they are
+        reported separately and left out of the success rate.
+        """
         successful_responses = [r for r in responses if r["success"]]
+        cut_off = list(cut_off or [])
 
         if not successful_responses:
             return {
                 "type": "failure",
                 "message": "No warriors were able to respond.",
-                "consensus_level": 0
+                "consensus_level": 0,
+                "cut_off_fighters": cut_off
             }
 
         success_rate = len(successful_responses) / len(responses)
@@ -728,45 +1353,121 @@ SHENRON's Unified Response:"""
             consensus_type = "weak"
             message = f"Only {len(successful_responses)}/{len(responses)} warriors responded."
 
+        if cut_off:
+            message += f" Quorum reached; cut off: {', '.join(cut_off)}."
+
         return {
             "type": consensus_type,
             "message": message,
             "consensus_level": success_rate,
             "successful_fighters": [r['fighter'] for r in successful_responses],
-            "failed_fighters": [r['fighter'] for r in responses if not r['success']]
+            "failed_fighters": [r['fighter'] for r in responses if not r['success']],
+            "cut_off_fighters": cut_off
         }
 
     def grant_wish(self, user_query: str, use_rag: bool = True,
-                   cancel_checker: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+                   cancel_checker: Optional[Callable[[], bool]] = None,
+                   on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                   power_mode: str = "council", use_cache: bool = True,
+                   rerank: bool = False, speculation: Optional[str] = None,
+                   synthesis_mode: Optional[str] = None,
+                   retrieved: Optional[Tuple[str, List[str], Dict[str, Any]]] = None,
+                   stream_tokens: bool = False) -> Dict[str, Any]:
         """
         Main entry point: Grant the user's wish
         v4.0: Now with TRUE synthesis!
-        """
-        start_time = time.time()
 
-        cascade_result = self.cascading_consult(user_query, use_rag=use_rag, cancel_checker=cancel_checker)
-        responses = cascade_result["responses"]
+        on_event receives stage events (rag_done, cache_hit, warrior_done,
+        warrior_cut_off, synthesis_start, ...). With stream_tokens=True the
+        fighter and synthesis calls also stream from LM Studio and every
+        token delta is forwarded (warrior_token / synthesis_token).
 
-        consensus = self.analyze_consensus(responses)
+        Results are served from / stored in the answer cache according to
+        the power mode's cache policy; the key includes the RAG chunk IDs
+        (a changed knowledge base never serves a stale answer) and the
+        rerank / speculation / synthesis options. Answers with tool
+        directives are not cached.
 
-        if cascade_result["validation_required"] and responses:
-            synthesized_answer = self.synthesize_responses(user_query, responses)
-            synthesis_method = "true_ai"
-        else:
-            synthesized_answer = responses[0]["answer"] if responses else "No response from GOKU."
-            synthesis_method = "single_pass"
+        RAG context comes from hybrid BM25 + vector retrieval; rerank=True
+        adds a cross-encoder pass. Per-stage timings are in result["retrieval"].
+
+        power_mode also sets the LM Studio scheduler priority of every
+        generation the wish makes (lightning > council > ultra).
+
+        retrieved is a retrieve_context() result the caller already has;
+        it is used as is instead of searching again.
+        """
+        start_time = time.time()
+
+        context, chunk_ids, retrieval = "", [], {}
+        if retrieved is not None:
+            context, chunk_ids, retrieval = retrieved
+        elif use_rag:
+            context, chunk_ids, retrieval = self.retrieve_context(user_query, n_results=3, rerank=rerank)
+            self._emit(on_event, "rag_done", chunks=len(chunk_ids), mode=retrieval.get("mode"),
+                       total_ms=retrieval.get("timings", {}).get("total_ms"))
+        fingerprint = context_fingerprint(chunk_ids)
+
+        synthesis_mode = synthesis_mode or SYNTHESIS_MODE
+        if synthesis_mode not in SYNTHESIS_MODES:
+            raise ValueError(f"Unknown synthesis mode: {synthesis_mode}")
+        variant = cache_variant(rerank=rerank, speculation=speculation or SPECULATION_MODE,
+                                synthesis_mode=synthesis_mode)
+
+        if use_cache:
+            cached = self.answer_cache.get(power_mode, user_query, fingerprint, variant)
+            if cached is not None:
+                cached["total_time"] = time.time() - start_time
+                cached["retrieval"] = retrieval
+                self._emit(on_event, "cache_hit", **cached["cache"])
+                return cached
+        digests = (SynthesisDigests(self.fighter_pool, self.lm_client, user_query)
+                   if synthesis_mode == "pipelined" else None)
+        synthesis_stats = digests.stats if digests is not None else {"mode": "full"}
+
+        quorum = CouncilQuorum.for_power_mode(power_mode)
+        # LM calls of this wish queue at its power mode's priority
+        with priority_scope(power_mode), token_streaming(stream_tokens):
+            try:
+                cascade_result = self.cascading_consult(user_query, use_rag=use_rag, cancel_checker=cancel_checker,
+                                                        on_event=on_event, context=context, speculation=speculation,
+                                                        quorum=quorum, digests=digests)
+                responses = cascade_result["responses"]
+
+                consensus = self.analyze_consensus(responses, cut_off=cascade_result["cut_off_fighters"])
+
+                if cascade_result["validation_required"] and responses:
+                    synthesized_answer = self.synthesize_responses(user_query, responses, on_event=on_event,
+                                                                   digests=digests, stats=synthesis_stats)
+                    synthesis_method = "true_ai"
+                else:
+                    synthesized_answer = responses[0]["answer"] if responses else "No response from GOKU."
+                    synthesis_method = "single_pass"
+            finally:
+                # Stragglers kept running through synthesis; whatever finished is
+                # attached as an addendum, the rest is cancelled
+                late_addenda = self.collect_late_addenda(quorum)
+                if digests is not None:
+                    digests.cancel_pending()
+        for late in late_addenda:
+            self._emit(on_event, "warrior_late", **self._response_summary(late))
  
         elapsed_time = time.time() - start_time
 
         result = {
             "query": user_query,
             "rag_used": cascade_result["rag_context_used"],
+            "retrieval": retrieval,
+            "speculation": cascade_result["speculation"],
+            "quorum": quorum.summary() if quorum else None,
+            "late_addenda": late_addenda,
             "consensus": consensus,
             "synthesized_answer": synthesized_answer,
             "warrior_responses": responses,
             "total_time": elapsed_time,
             "wish_granted": consensus["consensus_level"] > 0,
             "synthesis_method": synthesis_method,
+            "synthesis": synthesis_stats,
             "validation": {
                 "required": cascade_result["validation_required"],
                 "reasons": cascade_result["validation_reasons"],
@@ -774,7 +1475,317 @@ SHENRON's Unified Response:"""
             }
         }
 
-        return self.post_process_result(result)
+        result = self.post_process_result(result)
+        if use_cache and consensus["consensus_level"] > 0:
+            self.answer_cache.put(power_mode, user_query, fingerprint, result, variant)
+        return result
+
+    # ========================================================================
+    # ULTRA INSTINCT MODE - council pass + targeted refinement
+    # ========================================================================
+
+    def answer_agreement(self, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Mean similarity of each successful answer to the other successful
+        ones: embedding cosine when the embedding model is available,
+        bag-of-words cosine otherwise.
+        """
+        successful = [r for r in responses if r["success"]]
+        if len(successful) < 2:
+            return {"method": None, "scores": {}}
+
+        answers = [r["answer"] for r in successful]
+        method = "lexical"
+        vectors: List[Any] = []
+        if self.embedding_function:
+            try:
+                vectors = self.embedding_service.embed_documents(answers)
+                method = "embedding"
+            except Exception:
+                vectors = []
+        if not vectors:
+            vectors = [Counter(re.findall(r"[a-z0-9_./:-]+", answer.lower())) for answer in answers]
+
+        scores = {}
+        for i, response in enumerate(successful):
+            peers = [_similarity(vectors[i], vectors[j]) for j in range(len(vectors)) if j != i]
+            scores[response["fighter"]] = round(sum(peers) / len(peers), 3)
+        return {"method": method, "scores": scores}
+
+    def find_conflicts(self, responses: List[Dict[str, Any]],
+                       consensus: Dict[str, Any]) -> Dict[str, Any]:
+        """Warriors to refine: dissenters (low agreement) first, then failures of a weak pass."""
+        agreement = self.answer_agreement(responses)
+        scores = agreement["scores"]
+        threshold = REFINE_AGREEMENT_THRESHOLDS.get(agreement["method"])
+
+        dissenting = []
+        if threshold is not None and len(scores) >= REFINE_MIN_ANSWERS:
+            dissenting = sorted((name for name, score in scores.items() if score < threshold), key=scores.get)
+        failed = []
+        if consensus.get("type") == "weak":
+            failed = [r["fighter"] for r in responses if not r["success"]]
+
+        return {
+            **agreement,
+            "threshold": threshold,
+            "dissenting": dissenting,
+            "failed": failed,
+            "targets": (dissenting + failed)[:REFINE_MAX_WARRIORS]
+        }
+
+    def build_refinement_prompt(self, fighter: Fighter, user_query: str, context: str,
+                                responses: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """Pass-2 question for one warrior: its own pass-1 answer plus its peers', fit to its window."""
+        own = next((r for r in responses if r["fighter"] == fighter.name), None)
+        if own is not None and own["success"]:
+            own_part = f"Your first answer:\n{own['answer']}\n\n"
+        else:
+            own_part = "You did not answer in the first pass.\n\n"
+        intro = (f"{user_query}\n\nULTRA INSTINCT REFINEMENT - the council disagreed on this question.\n\n"
+                 f"{own_part}Your fellow warriors answered:\n\n")
+        task = ("---\nRe-examine the points where the answers disagree. Keep what you can defend, "
+                "correct what your peers show to be wrong, and give your final answer.")
+
+        fighter_data = self._fighter_payload(fighter)
+        peers, budget = plan_prompt(
+            fighter.model,
+            fighter_data["context_length"],
+            fighter.max_tokens,
+            fixed={
+                "system": persona_system_prompt(fighter_data),
+                "context": context,
+                "question": intro + task
+            },
+            shared=[
+                f"---\n{r['emoji']} {r['fighter']} ({r['role']}):\n{r['answer']}\n\n"
+                for r in responses if r["success"] and r["fighter"] != fighter.name
+            ]
+        )
+        return intro + "".join(peers) + task, budget
+
+    def refine_council(self, user_query: str, context: str, responses: List[Dict[str, Any]],
+                       targets: List[str], cancel_checker: Optional[Callable[[], bool]] = None,
+                       on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """Ask only the target warriors again (concurrently), each with its own refinement prompt."""
+        jobs = []
+        for name in targets:
+            fighter = self.get_fighter(name)
+            prompt, _ = self.build_refinement_prompt(fighter, user_query, context, responses)
+            jobs.append((self._fighter_payload(fighter), prompt))
+
+        async def run_all():
+            return await asyncio.gather(*(
+                self._consult_one(fighter_data, prompt, context, timeout=REFINE_TIMEOUT, on_event=on_event)
+                for fighter_data, prompt in jobs
+            ))
+
+        if cancel_checker and cancel_checker():
+            raise WishCancelled()
+        if not self.fighter_pool.acquire_slot(cancel_checker):
+            raise WishCancelled()
+        try:
+            return self.fighter_pool.run(run_all(), cancel_checker=cancel_checker)
+        except CancelledError:
+            raise WishCancelled()
+        finally:
+            self.fighter_pool.release_slot()
+
+    def ultra_wish(self, user_query: str, use_rag: bool = True,
+                   cancel_checker: Optional[Callable[[], bool]] = None,
+                   on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                   rerank: bool = False, stream_tokens: bool = False) -> Dict[str, Any]:
+        """
+        🐉 Ultra Instinct: a full council pass, then - only where the council
+        disagrees - a refinement pass over the conflicting warriors.
+
+        Pass 2 reuses pass 1's RAG context and every agreeing answer; only
+        the targets (see find_conflicts) are re-queried, then one synthesis
+        runs over the merged answers. result["refinement"] lists what was
+        re-asked and what was reused.
+        """
+        start_time = time.time()
+
+        context, chunk_ids, retrieval = "", [], {}
+        if use_rag:
+            context, chunk_ids, retrieval = self.retrieve_context(user_query, n_results=3, rerank=rerank)
+            self._emit(on_event, "rag_done", chunks=len(chunk_ids), mode=retrieval.get("mode"),
+                       total_ms=retrieval.get("timings", {}).get("total_ms"))
+        retrieved = (context, chunk_ids, retrieval)
+
+        result = self.grant_wish(user_query, use_rag=use_rag, cancel_checker=cancel_checker, on_event=on_event,
+                                 power_mode="ultra", use_cache=False, retrieved=retrieved,
+                                 stream_tokens=stream_tokens)
+        responses = result["warrior_responses"]
+        pass1_time = time.time() - start_time
+
+        conflicts = self.find_conflicts(responses, result["consensus"])
+        refinement = {
+            "agreement": conflicts["scores"],
+            "method": conflicts["method"],
+            "threshold": conflicts["threshold"],
+            "dissenting": conflicts["dissenting"],
+            "failed": conflicts["failed"],
+            "refined": [],
+            "reused": [r["fighter"] for r in responses if r["fighter"] not in conflicts["targets"]],
+            "pass1_time": round(pass1_time, 3)
+        }
+        result["refinement"] = refinement
+        result["synthesis_method"] = "ultra_instinct"
+        result["passes"] = 1
+
+        if conflicts["targets"]:
+            self._emit(on_event, "refinement_start", fighters=conflicts["targets"],
+                       dissenting=conflicts["dissenting"], failed=conflicts["failed"])
+            refine_start = time.time()
+            with priority_scope("ultra"), token_streaming(stream_tokens):
+                refined = self.refine_council(user_query, context, responses, conflicts["targets"],
+                                              cancel_checker=cancel_checker, on_event=on_event)
+
+                # Refined answers replace the pass-1 ones; a failed refinement keeps pass 1
+                by_name = {r["fighter"]: dict(r, refined=True) for r in refined if r["success"]}
+                responses = [by_name.get(r["fighter"], r) for r in responses]
+                refinement["refined"] = sorted(by_name)
+                refinement["refine_failed"] = [r["fighter"] for r in refined if not r["success"]]
+
+                if by_name:
+                    synthesis_stats = {"mode": "full"}
+                    result["synthesized_answer"] = self.synthesize_responses(
+                        user_query, responses, on_event=on_event, stats=synthesis_stats
+                    )
+                    result["synthesis"] = synthesis_stats
+            refinement["pass2_time"] = round(time.time() - refine_start, 3)
+
+            result["warrior_responses"] = responses
+            result["consensus"] = self.analyze_consensus(responses)
+            result["passes"] = 2
+            result = self.post_process_result(result)
+
+        result["total_time"] = time.time() - start_time
+        return result
+
+    # ========================================================================
+    # LIGHTNING MODE - single-shot fast path
+    # ========================================================================
+
+    def cached_retrieve_context(self, query: str,
+                                n_results: int = 3) -> Tuple[str, List[str], Dict[str, Any]]:
+        """retrieve_context behind a small TTL cache (repeated lightning questions skip retrieval)."""
+        key = f"{n_results}:{query.strip().lower()}"
+        now = time.time()
+        with self._stats_lock:
+            entry = self._rag_cache.get(key)
+            if entry is not None and now - entry[0] < LIGHTNING_RAG_CACHE_TTL:
+                self._rag_cache.move_to_end(key)
+                self.lightning_stats["rag_cache_hits"] += 1
+                context, chunk_ids, retrieval = entry[1]
+                return context, chunk_ids, {**retrieval, "cached": True}
+
+        retrieved = self.retrieve_context(query, n_results=n_results)
+        if "error" not in retrieved[2]:
+            with self._stats_lock:
+                self._rag_cache[key] = (now, retrieved)
+                self._rag_cache.move_to_end(key)
+                while len(self._rag_cache) > LIGHTNING_RAG_CACHE_SIZE:
+                    self._rag_cache.popitem(last=False)
+        return retrieved
+
+    def lightning_wish(self, user_query: str, use_rag: bool = False,
+                       cancel_checker: Optional[Callable[[], bool]] = None,
+                       on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       use_cache: bool = True, stream_tokens: bool = False) -> Dict[str, Any]:
+        """
+        ⚡ Lightning: exactly one GOKU generation over the fighter pool.
+
+        No validation cascade, no synthesis call; with stream_tokens=True
+        the answer streams to on_event as warrior_token events. Runs at lightning
+        scheduler priority and is measured against LIGHTNING_SLO_SECONDS
+        (per-wish verdict in result["slo"], totals in lightning_snapshot()).
+        """
+        start_time = time.time()
+        if cancel_checker and cancel_checker():
+            raise WishCancelled()
+
+        context, chunk_ids, retrieval = "", [], {}
+        if use_rag:
+            context, chunk_ids, retrieval = self.cached_retrieve_context(user_query)
+            self._emit(on_event, "rag_done", chunks=len(chunk_ids), mode=retrieval.get("mode"),
+                       total_ms=retrieval.get("timings", {}).get("total_ms"), cached=retrieval.get("cached", False))
+        fingerprint = context_fingerprint(chunk_ids)
+
+        if use_cache:
+            cached = self.answer_cache.get("lightning", user_query, fingerprint)
+            if cached is not None:
+                cached["total_time"] = time.time() - start_time
+                cached["retrieval"] = retrieval
+                cached["slo"] = self._record_lightning(cached["total_time"], success=True, cache_hit=True)
+                self._emit(on_event, "cache_hit", **cached["cache"])
+                return cached
+
+        with priority_scope("lightning"), token_streaming(stream_tokens):
+            response = self.query_fighter(self.get_fighter(LIGHTNING_FIGHTER), user_query, context,
+                                          cancel_checker=cancel_checker, on_event=on_event,
+                                          timeout=LIGHTNING_TIMEOUT)
+
+        elapsed_time = time.time() - start_time
+        answer = response["answer"] if response["success"] else "No response from GOKU."
+        result = {
+            "query": user_query,
+            "rag_used": bool(context),
+            "retrieval": retrieval,
+            "consensus": {
+                "type": "single_warrior" if response["success"] else "failure",
+                "message": "Lightning mode - single warrior response",
+                "consensus_level": 1.0 if response["success"] else 0
+            },
+            "synthesized_answer": answer,
+            "warrior_responses": [response],
+            "total_time": elapsed_time,
+            "synthesis_method": "lightning",
+            "slo": self._record_lightning(elapsed_time, success=response["success"])
+        }
+
+        # Directive scanning only matters when the answer carries a ```json block;
+        # otherwise the outcome of post_process_result is known up front
+        if "```json" in answer.lower():
+            result = self.post_process_result(result)
+        else:
+            result.update(artifacts=[], pending_actions=[], tool_directives=[], wish_granted=False)
+
+        if use_cache and response["success"]:
+            self.answer_cache.put("lightning", user_query, fingerprint, result)
+        return result
+
+    def _record_lightning(self, elapsed: float, success: bool, cache_hit: bool = False) -> Dict[str, Any]:
+        met = success and elapsed <= LIGHTNING_SLO_SECONDS
+        with self._stats_lock:
+            self.lightning_stats["wishes"] += 1
+            self.lightning_stats["cache_hits"] += int(cache_hit)
+            self.lightning_stats["failed"] += int(not success)
+            self.lightning_stats["slo_missed"] += int(not met)
+            self._lightning_latencies.append(elapsed)
+        return {"target_seconds": LIGHTNING_SLO_SECONDS, "met": met}
+
+    def lightning_snapshot(self) -> Dict[str, Any]:
+        """Lightning totals plus p50/p95 of recent end-to-end latencies."""
+        with self._stats_lock:
+            stats = dict(self.lightning_stats)
+            latencies = sorted(self._lightning_latencies)
+            rag_cache_size = len(self._rag_cache)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            **stats,
+            "slo_seconds": LIGHTNING_SLO_SECONDS,
+            "slo_attainment": round(1 - stats["slo_missed"] / stats["wishes"], 4) if stats["wishes"] else None,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "rag_cache_size": rag_cache_size
+        }
 
     # ========================================================================
     # AGENT MODE - SSH Command Execution
@@ -851,23 +1862,8 @@ SHENRON's Unified Response:"""
         host_config = SSH_HOSTS[host_key]
 
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            ssh.connect(
-                hostname=host_config["host"],
-                username=host_config["user"],
-                port=host_config["port"],
-                timeout=30
-            )
-
-            stdin, stdout, stderr = ssh.exec_command(command, timeout=30)
-            
-            exit_code = stdout.channel.recv_exit_status()
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-
-            ssh.close()
+            # Pooled transport: no handshake per command, reconnects if it died
+            exit_code, output, error = self.ssh_pool.exec(host_config, command, timeout=30)
 
             return {
                 "success": exit_code == 0,
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+SHENRON SSH Pool - one keep-alive SSH transport per host, shared process-wide
+Commands multiplex channels over it; dead transports are detected and reconnected
+"""
+
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+import paramiko
+
+CONNECT_TIMEOUT = 10  # seconds (TCP connect, banner and auth each)
+KEEPALIVE_INTERVAL = 30  # seconds between transport keepalives
+LIVENESS_IDLE = 15  # probe a transport idle for longer than this before reuse
+MAX_CHANNELS_PER_HOST = 4  # OpenSSH allows 10 sessions per connection by default
+CHANNEL_WAIT_TIMEOUT = 30  # seconds to wait for a free channel slot
+IDLE_CLOSE_SECONDS = 600  # transports unused this long are closed by prune()
+
+# Errors meaning the transport is gone (as opposed to the command failing)
+CONNECTION_ERRORS = (paramiko.SSHException, EOFError, socket.error)
+
+
+class SSHPoolError(Exception):
+    """No channel slot became free in time, or the host could not be reached."""
+
+
+class _Host:
+    def __init__(self, target: Dict[str, Any], max_channels: int):
+        self.target = target
+        self.client: Optional[paramiko.SSHClient] = None
+        self.connect_lock = threading.Lock()
+        self.channels = threading.BoundedSemaphore(max_channels)
+        self.max_channels = max_channels
+        self.active = 0
+        self.last_used = 0.0
+        self.connected_at = 0.0
+        self.last_error: Optional[str] = None
+        self.stats = {"commands": 0, "connects": 0, "reconnects": 0, "dead_detected": 0, "channel_waits": 0}
+
+
+def target_key(target: Dict[str, Any]) -> str:
+    """Connection identity: the same user@host:port (and compression) shares one transport."""
+    key = f"{target.get('user') or ''}@{target['host']}:{target.get('port') or 22}"
+    return key + "+zlib" if target.get("compress") else key
+
+
+class SSHConnectionPool:
+    """
+    Targets are dicts shaped like SSH_HOSTS entries:
+    {"host", "user", "port"?, "password"?, "key_filename"?, "compress"?}.
+    compress=True negotiates zlib on its own transport (bulk transfers).
+
+    - One paramiko transport per user@host:port, reused by every caller;
+      each command opens its own channel on it (multiplexing)
+    - At most max_channels commands run per host at once; others wait
+      (up to CHANNEL_WAIT_TIMEOUT)
+    - Keepalives every KEEPALIVE_INTERVAL; a transport idle for more than
+      LIVENESS_IDLE is probed before reuse, dead ones are reconnected
+    - exec() retries once on a fresh transport when the channel could not
+      be opened (the command never started, so the retry is safe)
+    """
+
+    def __init__(self, max_channels: int = MAX_CHANNELS_PER_HOST, keepalive: int = KEEPALIVE_INTERVAL,
+                 connect_timeout: float = CONNECT_TIMEOUT, channel_wait: float = CHANNEL_WAIT_TIMEOUT):
+        self.max_channels = max_channels
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.channel_wait = channel_wait
+        self._hosts: Dict[str, _Host] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    def _host(self, target: Dict[str, Any]) -> _Host:
+        key = target_key(target)
+        with self._lock:
+            host = self._hosts.get(key)
+            if host is None:
+                host = self._hosts[key] = _Host(dict(target), target.get("max_channels") or self.max_channels)
+            return host
+
+    @staticmethod
+    def _alive(host: _Host) -> bool:
+        transport = host.client.get_transport() if host.client else None
+        if transport is None or not transport.is_active() or not transport.is_authenticated():
+            return False
+        if time.time() - host.last_used > LIVENESS_IDLE:
+            # Cheap round trip: fails at once on a half-closed socket
+            try:
+                transport.send_ignore()
+            except CONNECTION_ERRORS:
+                return False
+        return True
+
+    def _connect(self, host: _Host):
+        target = host.target
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(
+            hostname=target["host"],
+            port=target.get("port") or 22,
+            username=target.get("user"),
+            password=target.get("password"),
+            key_filename=target.get("key_filename"),
+            compress=bool(target.get("compress")),
+            timeout=self.connect_timeout,
+            banner_timeout=self.connect_timeout,
+            auth_timeout=self.connect_timeout
+        )
+        client.get_transport().set_keepalive(self.keepalive)
+        host.client = client
+        host.connected_at = time.time()
+        host.stats["connects"] += 1
+
+    def _client(self, host: _Host, force_new: bool = False) -> paramiko.SSHClient:
+        """The host's live client, (re)connecting if needed."""
+        with host.connect_lock:
+            if host.client is not None and not force_new and self._alive(host):
+                return host.client
+            if host.client is not None:
+                if not force_new:
+                    host.stats["dead_detected"] += 1
+                host.stats["reconnects"] += 1
+                self._drop(host)
+            try:
+                self._connect(host)
+            except Exception as exc:
+                host.last_error = str(exc) or exc.__class__.__name__
+                raise
+            return host.client
+
+    @staticmethod
+    def _drop(host: _Host):
+        client, host.client = host.client, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def session(self, target: Dict[str, Any]):
+        """
+        Hold one channel slot on the target and yield its live SSHClient.
+        Open channels (exec_command / open_sftp) on it inside the block.
+        """
+        host = self._host(target)
+        if not host.channels.acquire(blocking=False):
+            host.stats["channel_waits"] += 1
+            if not host.channels.acquire(timeout=self.channel_wait):
+                raise SSHPoolError(f"No free SSH channel on {target_key(target)} after {self.channel_wait}s")
+        with self._lock:
+            host.active += 1
+        try:
+            client = self._client(host)
+            try:
+                yield client
+            except CONNECTION_ERRORS as exc:
+                transport = client.get_transport()
+                if not isinstance(exc, socket.timeout) and transport is not None and transport.is_active():
+                    # Remote status error (SFTP raises IOError, i.e. socket.error) - transport is fine
+                    raise
+                host.last_error = str(exc) or exc.__class__.__name__
+                if not isinstance(exc, socket.timeout):
+                    # Transport died under us - make the next caller reconnect
+                    with host.connect_lock:
+                        if host.client is client:
+                            self._drop(host)
+                raise
+            finally:
+                host.last_used = time.time()
+        finally:
+            with self._lock:
+                host.active -= 1
+            host.channels.release()
+
+    @contextmanager
+    def sftp(self, target: Dict[str, Any], timeout: Optional[float] = None):
+        """
+        SFTP client on the pooled transport (one channel slot while open).
+        With a timeout, any request waiting longer for its reply raises
+        socket.timeout (the transport stays up).
+        """
+        with self.session(target) as client:
+            sftp = client.open_sftp()
+            if timeout is not None:
+                sftp.get_channel().settimeout(timeout)
+            try:
+                yield sftp
+            finally:
+                sftp.close()
+
+    def exec(self, target: Dict[str, Any], command: str, timeout: Optional[float] = 30) -> Tuple[int, str, str]:
+        """
+        Run command over the pooled transport; returns (exit_code, stdout, stderr).
+        A command exceeding timeout raises socket.timeout (the transport stays up).
+        """
+        host = self._host(target)
+        for attempt in (1, 2):
+            with self.session(target) as client:
+                try:
+                    channel = client.get_transport().open_session(timeout=self.connect_timeout)
+                except CONNECTION_ERRORS:
+                    if attempt == 2:
+                        raise
+                    # Transport looked alive but cannot open channels - reconnect and retry
+                    self._client(host, force_new=True)
+                    continue
+                host.stats["commands"] += 1
+                with channel:
+                    channel.settimeout(timeout)
+                    channel.exec_command(command)
+                    stdout = channel.makefile("rb").read().decode("utf-8", errors="replace")
+                    stderr = channel.makefile_stderr("rb").read().decode("utf-8", errors="replace")
+                    exit_code = channel.recv_exit_status()
+                return exit_code, stdout, stderr
+        raise SSHPoolError(f"Could not open an SSH channel on {target_key(target)}")
+
+    def close(self, target: Dict[str, Any]):
+        host = self._hosts.get(target_key(target))
+        if host is not None:
+            with host.connect_lock:
+                self._drop(host)
+
+    def close_all(self):
+        with self._lock:
+            hosts = list(self._hosts.values())
+        for host in hosts:
+            with host.connect_lock:
+                self._drop(host)
+
+    def prune(self, idle: float = IDLE_CLOSE_SECONDS) -> int:
+        """Close transports nobody used for `idle` seconds; returns how many."""
+        cutoff = time.time() - idle
+        closed = 0
+        with self._lock:
+            hosts = list(self._hosts.values())
+        for host in hosts:
+            with host.connect_lock:
+                if host.client is not None and not host.active and host.last_used < cutoff:
+                    self._drop(host)
+                    closed += 1
+        return closed
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            hosts = dict(self._hosts)
+        entries = {}
+        for key, host in hosts.items():
+            transport = host.client.get_transport() if host.client else None
+            entries[key] = {
+                "connected": bool(transport and transport.is_active()),
+                "active_channels": host.active,
+                "max_channels": host.max_channels,
+                "idle": round(now - host.last_used, 1) if host.last_used else None,
+                "connected_for": round(now - host.connected_at, 1) if transport else None,
+                "last_error": host.last_error,
+                **host.stats
+            }
+        return {
+            "hosts": entries,
+            "connected": sum(1 for entry in entries.values() if entry["connected"]),
+            "active_channels": sum(entry["active_channels"] for entry in entries.values())
+        }
+
+
+_pool: Optional[SSHConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_ssh_pool() -> SSHConnectionPool:
+    """Process-wide SSH pool (shared by agent mode and the MCP tools)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SSHConnectionPool()
+        return _pool